@@ -42,6 +42,84 @@ def handler(event, context):
     except Exception as e:
         import_status["playwright"] = f"ERROR: {str(e)}"
     
+    try:
+        from f1_http import get_http_stats
+        http_stats = get_http_stats()
+    except Exception as e:
+        http_stats = f"ERROR: {str(e)}"
+
+    try:
+        from f1_ttl import get_ttl_status
+        ttl_status = get_ttl_status()
+    except Exception as e:
+        ttl_status = f"ERROR: {str(e)}"
+
+    try:
+        from f1_outbound import get_outbound_status
+        outbound_status = get_outbound_status()
+    except Exception as e:
+        outbound_status = f"ERROR: {str(e)}"
+
+    try:
+        from f1_bot_live import get_router_status
+        router_status = get_router_status()
+    except Exception as e:
+        router_status = f"ERROR: {str(e)}"
+
+    try:
+        from f1_weather import get_weather_status
+        weather_status = get_weather_status()
+    except Exception as e:
+        weather_status = f"ERROR: {str(e)}"
+
+    try:
+        from f1_render import get_render_status
+        render_status = get_render_status()
+    except Exception as e:
+        render_status = f"ERROR: {str(e)}"
+
+    try:
+        from f1_live_producer import get_producer_status
+        producer_status = get_producer_status()
+    except Exception as e:
+        producer_status = f"ERROR: {str(e)}"
+
+    try:
+        from f1_store import get_store_status
+        store_status = get_store_status()
+    except Exception as e:
+        store_status = f"ERROR: {str(e)}"
+
+    try:
+        from f1_trace import get_trace_status
+        trace_status = get_trace_status()
+    except Exception as e:
+        trace_status = f"ERROR: {str(e)}"
+
+    try:
+        from f1_profiler import get_profiler_status
+        profiler_status = get_profiler_status()
+    except Exception as e:
+        profiler_status = f"ERROR: {str(e)}"
+
+    try:
+        from f1_loop_monitor import get_loop_status
+        loop_status = get_loop_status()
+    except Exception as e:
+        loop_status = f"ERROR: {str(e)}"
+
+    try:
+        from f1_executor import get_executor_status
+        executor_status = get_executor_status()
+    except Exception as e:
+        executor_status = f"ERROR: {str(e)}"
+
+    try:
+        from f1_live_sources import get_live_source_status
+        live_source_status = get_live_source_status()
+    except Exception as e:
+        live_source_status = f"ERROR: {str(e)}"
+
     return {
         'statusCode': 200,
         'headers': {'Content-Type': 'application/json'},
@@ -49,6 +127,19 @@ def handler(event, context):
             "bot_token_set": bool(get_bot_token()),
             "version": "2.0.0",
             "imports": import_status,
+            "http_stats": http_stats,
+            "ttl_policy": ttl_status,
+            "outbound": outbound_status,
+            "deferred_renders": render_status,
+            "callback_routes": router_status,
+            "weather": weather_status,
+            "shared_cache": store_status,
+            "live_producer": producer_status,
+            "live_sources": live_source_status,
+            "tracing": trace_status,
+            "profiler": profiler_status,
+            "event_loop": loop_status,
+            "cpu_stage": executor_status,
             "python_version": f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
             "webhook_url": get_webhook_url(),
             "environment": {
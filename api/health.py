@@ -1,25 +1,38 @@
 """
 Health check endpoint for Vercel
+/health reports liveness (503 only when this instance is wedged);
+/health?ready=1 and /ready report readiness (503 on any critical check)
 """
 
 import os
+import sys
 import json
 from datetime import datetime
 
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from f1_health import get_health
+
 def handler(event, context):
     """Health check endpoint - Vercel serverless function"""
+    event = event or {}
+    params = event.get('queryStringParameters') or {}
+    readiness = params.get('ready') == '1' or event.get('path', '').rstrip('/').endswith('/ready')
+    healthy, report = get_health(readiness=readiness)
     return {
-        'statusCode': 200,
-        'headers': {'Content-Type': 'application/json'},
+        'statusCode': 200 if healthy else 503,
+        'headers': {'Content-Type': 'application/json', 'Cache-Control': 'no-store'},
         'body': json.dumps({
-            "status": "healthy",
+            "status": "healthy" if healthy else "unhealthy",
             "service": "F1 Telegram Bot",
             "timestamp": datetime.now().isoformat(),
             "webhook_url": os.getenv("WEBHOOK_URL", "Not set"),
             "bot_token": "SET" if os.getenv("TELEGRAM_BOT_TOKEN") else "NOT_SET",
-            "version": "2.0.0"
+            "version": "2.0.0",
+            **report
         })
     }
 
 # Vercel compatibility
-app = handler
\ No newline at end of file
+app = handler
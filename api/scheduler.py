@@ -0,0 +1,72 @@
+"""
+Prefetch scheduler status endpoint for Vercel
+GET /scheduler shows planned jobs and outcomes; /scheduler?tick=1 runs due jobs
+and delivers queued notification broadcasts (admin token or cron secret only)
+"""
+
+import os
+import sys
+import json
+import asyncio
+from datetime import datetime
+from http import HTTPStatus
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from f1_scheduler import get_scheduler_status, refresh_schedule, run_due_jobs, SCHEDULER_STATE
+from f1_broadcast import get_broadcast_status, pending_broadcasts, resume_broadcasts
+from f1_admin import is_cron_request
+
+# Seconds of each tick spent delivering broadcasts; the rest resumes on the next tick
+BROADCAST_TICK_BUDGET = int(os.getenv("F1_BROADCAST_TICK_BUDGET", "45"))
+
+async def tick():
+    await run_due_jobs()
+    token = os.getenv("TELEGRAM_BOT_TOKEN")
+    if token and pending_broadcasts():
+        from telegram import Bot
+        from f1_http import TELEGRAM_BOT_API_URL
+        async with Bot(token, base_url=TELEGRAM_BOT_API_URL) as bot:
+            await resume_broadcasts(bot, budget=BROADCAST_TICK_BUDGET)
+
+def handler(event, context):
+    """Scheduler status endpoint - Vercel serverless function"""
+    params = (event or {}).get('queryStringParameters') or {}
+
+    if params.get('tick') == '1' and not is_cron_request(event):
+        # A tick sends broadcasts and hits upstream APIs; anonymous callers only get status
+        return {
+            'statusCode': HTTPStatus.FORBIDDEN,
+            'body': 'Forbidden'
+        }
+
+    try:
+        if params.get('tick') == '1':
+            # Serverless deployments have no persistent loop - an external cron drives ticks
+            asyncio.run(tick())
+        elif SCHEDULER_STATE["schedule_built_at"] is None:
+            refresh_schedule()
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps({
+                "status": "error",
+                "message": str(e)
+            })
+        }
+
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json'},
+        'body': json.dumps({
+            "status": "ok",
+            "scheduler": get_scheduler_status(),
+            "broadcasts": get_broadcast_status(),
+            "timestamp": datetime.now().isoformat()
+        })
+    }
+
+# Vercel compatibility
+app = handler
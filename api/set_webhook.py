@@ -12,6 +12,7 @@ from http import HTTPStatus
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from telegram import Bot
+from f1_http import TELEGRAM_BOT_API_URL
 
 def get_bot_token():
     return os.getenv("TELEGRAM_BOT_TOKEN")
@@ -26,7 +27,7 @@ async def set_webhook_manually(webhook_url):
         return False
     
     try:
-        bot = Bot(token=token)
+        bot = Bot(token=token, base_url=TELEGRAM_BOT_API_URL)
         result = await bot.set_webhook(url=webhook_url)
         return result
     except Exception as e:
@@ -22,11 +22,25 @@ from f1_bot_live import (
     show_menu,
     button_handler,
     live_cmd,
+    subscribe_cmd,
+    unsubscribe_cmd,
+    timezone_cmd,
+    get_chat_timezone,
     get_current_standings,
     get_constructor_standings,
     get_last_session_results,
     get_next_race,
+    CALLBACK_ROUTER,
 )
+from f1_store import claim
+from f1_metrics import (
+    UPDATE_LATENCY, UPDATE_ERRORS, DEDUP_DROPS, update_route, register_routes, render_metrics, CONTENT_TYPE,
+)
+from f1_trace import start_trace, span, current_span, current_trace_id, get_traces
+from f1_admin import is_admin_request
+import f1_profiler
+from f1_loop_monitor import start_loop_monitor, pause_loop_monitor, get_blocking_events
+from api.health import handler as health_handler
 
 # Configure logging
 logging.basicConfig(
@@ -40,9 +54,9 @@ logger = logging.getLogger(__name__)
 BOT_APP = None
 BOT_INITIALIZED = False
 
-# Cache for processed updates to prevent duplicates
-PROCESSED_UPDATES = set()
-MAX_PROCESSED_UPDATES = 1000
+# Telegram redelivers unacknowledged updates for up to 24h; claims are kept
+# long enough to cover retries (shared between workers via f1_store)
+UPDATE_DEDUP_TTL = int(os.getenv("F1_UPDATE_DEDUP_TTL", "3600"))
 
 def get_bot_token():
     """Get bot token from environment"""
@@ -56,16 +70,9 @@ def get_webhook_url():
     """Get webhook URL from environment"""
     return os.getenv("WEBHOOK_URL", "")
 
-def is_update_processed(update_id):
-    """Check if update has already been processed"""
-    return update_id in PROCESSED_UPDATES
-
-def mark_update_processed(update_id):
-    """Mark update as processed"""
-    PROCESSED_UPDATES.add(update_id)
-    # Keep only recent updates to prevent memory issues
-    if len(PROCESSED_UPDATES) > MAX_PROCESSED_UPDATES:
-        PROCESSED_UPDATES.clear()
+def claim_update(update_id):
+    """Atomically claim an update; False if this or another worker already has it"""
+    return claim(f"update:{update_id}", UPDATE_DEDUP_TTL)
 
 async def setup_bot():
     """Initialize the Telegram bot application"""
@@ -95,10 +102,16 @@ async def setup_bot():
                 timeout=httpx.Timeout(30.0, read=30.0, write=30.0, pool=30.0),
             )
         
+        # All outbound sends go through the token-bucket scheduler
+        from f1_outbound import OUTBOUND_SCHEDULER
+        from f1_http import TELEGRAM_BOT_API_URL
+
         application = (
             Application.builder()
             .token(token)
+            .base_url(TELEGRAM_BOT_API_URL)
             .request(httpx_request)
+            .rate_limiter(OUTBOUND_SCHEDULER)
             .concurrent_updates(True)
             .build()
         )
@@ -110,29 +123,30 @@ async def setup_bot():
         application.add_handler(CommandHandler("start", start))
         application.add_handler(CommandHandler("menu", show_menu))
         
-        # Async wrapper functions for command handlers
+        # Async wrapper functions for command handlers; the blocking fetchers run in worker threads
         async def standings_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if update.message:
                 await update.message.reply_text("⏳ Yüklənir...")
-                message = get_current_standings()
+                message = await asyncio.to_thread(get_current_standings)
                 await update.message.reply_text(message, parse_mode="Markdown")
         
         async def constructors_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if update.message:
                 await update.message.reply_text("⏳ Yüklənir...")
-                message = get_constructor_standings()
+                message = await asyncio.to_thread(get_constructor_standings)
                 await update.message.reply_text(message, parse_mode="Markdown")
         
         async def lastrace_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if update.message:
                 await update.message.reply_text("⏳ Yüklənir...")
-                message = get_last_session_results()
+                message = await asyncio.to_thread(get_last_session_results)
                 await update.message.reply_text(message, parse_mode="Markdown")
         
         async def nextrace_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if update.message:
                 await update.message.reply_text("⏳ Yüklənir...")
-                message = get_next_race()
+                timezone = await asyncio.to_thread(get_chat_timezone, update.message.chat_id)
+                message = await asyncio.to_thread(get_next_race, timezone)
                 await update.message.reply_text(message, parse_mode="Markdown")
         
         application.add_handler(CommandHandler("standings", standings_handler))
@@ -140,7 +154,17 @@ async def setup_bot():
         application.add_handler(CommandHandler("lastrace", lastrace_handler))
         application.add_handler(CommandHandler("nextrace", nextrace_handler))
         application.add_handler(CommandHandler("live", live_cmd))
+        application.add_handler(CommandHandler("subscribe", subscribe_cmd))
+        application.add_handler(CommandHandler("unsubscribe", unsubscribe_cmd))
+        application.add_handler(CommandHandler("timezone", timezone_cmd))
         application.add_handler(CallbackQueryHandler(button_handler))
+
+        # Only these become update metric labels; anything else is counted as "other"
+        register_routes(
+            commands=[command for handler in application.handlers[0] if isinstance(handler, CommandHandler)
+                      for command in handler.commands],
+            callbacks=CALLBACK_ROUTER.routes,
+        )
         
         logger.info("✅ Bot setup successful")
         return application
@@ -168,6 +192,12 @@ async def initialize_bot():
         BOT_APP = bot_app
         BOT_INITIALIZED = True
         logger.info("✅ Bot application initialized successfully")
+
+        # Calendar-aware cache prewarming needs a persistent event loop
+        if os.getenv("F1_PREFETCH_SCHEDULER") == "1":
+            from f1_scheduler import start_prefetch_scheduler
+            start_prefetch_scheduler(bot=bot_app.bot)
+            logger.info("✅ Prefetch scheduler started")
         
         # Set webhook if URL is provided
         webhook_url = get_webhook_url()
@@ -197,8 +227,20 @@ async def process_update_isolated(bot_app, update, update_id):
             logger.error(f"❌ Bot app is None for update {update_id}")
             return
         
-        await bot_app.process_update(update)
-        logger.info(f"✅ Update {update_id} processed successfully")
+        route = update_route(update)
+        current_span().set(route=route)
+        with UPDATE_LATENCY.time(route):
+            try:
+                with span("handle"):
+                    await bot_app.process_update(update)
+                # Button renders continue after the handler returns; finish them before the loop closes
+                from f1_render import wait_pending_renders
+                with span("pending_renders"):
+                    await wait_pending_renders()
+            except Exception:
+                UPDATE_ERRORS.inc(route)
+                raise
+        logger.info(f"✅ Update {update_id} processed successfully (trace {current_trace_id()})")
         
     except Exception as e:
         logger.error(f"❌ Error processing update {update_id}: {e}")
@@ -207,6 +249,11 @@ async def process_update_isolated(bot_app, update, update_id):
 
 async def webhook_handler(event):
     """Main webhook handler for Vercel"""
+    start_loop_monitor()
+    with start_trace("update"):
+        return await _webhook_handler(event)
+
+async def _webhook_handler(event):
     global BOT_APP
     
     try:
@@ -227,7 +274,8 @@ async def webhook_handler(event):
         
         import json
         try:
-            json_data = json.loads(body)
+            with span("decode", bytes=len(body)):
+                json_data = json.loads(body)
         except json.JSONDecodeError:
             return {
                 'statusCode': HTTPStatus.BAD_REQUEST,
@@ -236,21 +284,24 @@ async def webhook_handler(event):
         
         update_id = json_data.get('update_id', 'unknown')
         logger.info(f"📥 Update {update_id} received")
+        current_span().set(update_id=update_id)
         
-        # Check for duplicates
-        if is_update_processed(update_id):
+        # Check for duplicates (claim is atomic across workers and instances)
+        with span("dedup_claim"):
+            claimed = claim_update(update_id)
+        if not claimed:
             logger.info(f"⚠️ Duplicate update {update_id} detected, skipping")
+            DEDUP_DROPS.inc()
             return {
                 'statusCode': HTTPStatus.OK,
                 'body': '{"status": "ok", "message": "duplicate"}'
             }
         
-        mark_update_processed(update_id)
-        
         # Initialize bot if needed
         if BOT_APP is None:
             logger.info("Initializing bot application...")
-            success = await initialize_bot()
+            with span("initialize_bot"):
+                success = await initialize_bot()
             if not success:
                 logger.error("❌ Failed to initialize bot")
                 return {
@@ -268,7 +319,8 @@ async def webhook_handler(event):
             }
         
         bot = bot_app.bot
-        update = Update.de_json(json_data, bot)
+        with span("decode_update"):
+            update = Update.de_json(json_data, bot)
         if update is None:
             logger.warning("Failed to create update object")
             return {
@@ -294,12 +346,149 @@ async def webhook_handler(event):
             'body': '{"status": "error", "message": "Internal server error"}'
         }
 
+# One event loop per process: BOT_APP's pooled connections are bound to the
+# loop they were opened on, so a fresh asyncio.run() per update would fail
+# every reused connection on a warm instance with "Event loop is closed"
+EVENT_LOOP = None
+
+def get_event_loop():
+    global EVENT_LOOP
+    if EVENT_LOOP is None or EVENT_LOOP.is_closed():
+        EVENT_LOOP = asyncio.new_event_loop()
+        asyncio.set_event_loop(EVENT_LOOP)
+    return EVENT_LOOP
+
+def traces_response(event):
+    """Admin-only dump of the slow-trace and loop-stall ring buffers (?min_ms=&limit=)"""
+    import json
+
+    if not is_admin_request(event):
+        return {
+            'statusCode': HTTPStatus.FORBIDDEN,
+            'body': 'Forbidden'
+        }
+    params = event.get('queryStringParameters') or {}
+    try:
+        min_ms = float(params.get('min_ms', 0))
+        limit = int(params['limit']) if params.get('limit') else None
+    except ValueError:
+        return {
+            'statusCode': HTTPStatus.BAD_REQUEST,
+            'body': 'Bad Request: min_ms and limit must be numbers'
+        }
+    return {
+        'statusCode': HTTPStatus.OK,
+        'headers': {'Content-Type': 'application/json'},
+        'body': json.dumps({
+            "traces": get_traces(min_ms, limit),
+            # Event-loop stalls with the stack of the blocking code
+            "loop_blocks": get_blocking_events(limit),
+        }, default=str)
+    }
+
+def profile_response(event):
+    """Admin-only CPU sampling and tracemalloc control (?action=...)
+
+    cpu_start (interval_ms, seconds, idle=1), cpu_stop (format=collapsed|speedscope|summary),
+    mem_start, mem_snapshot (limit, group_by=lineno|traceback), mem_dump, mem_stop, status
+    """
+    import json
+    import base64
+
+    if not is_admin_request(event):
+        return {
+            'statusCode': HTTPStatus.FORBIDDEN,
+            'body': 'Forbidden'
+        }
+    params = event.get('queryStringParameters') or {}
+    action = params.get('action', 'status')
+
+    def reply(payload, status=HTTPStatus.OK):
+        return {
+            'statusCode': status,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps(payload, default=str)
+        }
+
+    try:
+        if action == 'cpu_start':
+            profiler = f1_profiler.start_cpu_profile(
+                interval=float(params.get('interval_ms', f1_profiler.DEFAULT_INTERVAL * 1000)) / 1000,
+                max_seconds=float(params.get('seconds', f1_profiler.MAX_PROFILE_SECONDS)),
+                include_idle=params.get('idle') == '1',
+            )
+            return reply({"status": "started", "cpu": profiler.summary()})
+        if action == 'cpu_stop':
+            profiler = f1_profiler.stop_cpu_profile()
+            if profiler is None:
+                return reply({"status": "error", "message": "No CPU profile was started"}, HTTPStatus.CONFLICT)
+            output = params.get('format', 'collapsed')
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+            if output == 'collapsed':
+                return {
+                    'statusCode': HTTPStatus.OK,
+                    'headers': {'Content-Type': 'text/plain; charset=utf-8',
+                                'Content-Disposition': f'attachment; filename="f1-cpu-{stamp}.folded"'},
+                    'body': profiler.collapsed()
+                }
+            if output == 'speedscope':
+                return {
+                    'statusCode': HTTPStatus.OK,
+                    'headers': {'Content-Type': 'application/json',
+                                'Content-Disposition': f'attachment; filename="f1-cpu-{stamp}.speedscope.json"'},
+                    'body': json.dumps(profiler.speedscope())
+                }
+            return reply({"cpu": profiler.summary(), "top_functions": profiler.top_functions()})
+        if action == 'mem_start':
+            f1_profiler.start_memory_tracing(int(params.get('frames', f1_profiler.TRACEMALLOC_FRAMES)))
+            return reply({"status": "started"})
+        if action == 'mem_snapshot':
+            return reply(f1_profiler.take_memory_snapshot(
+                limit=int(params.get('limit', f1_profiler.TOP_ALLOCATORS)),
+                group_by=params.get('group_by', 'lineno'),
+            ))
+        if action == 'mem_dump':
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+            return {
+                'statusCode': HTTPStatus.OK,
+                'headers': {'Content-Type': 'application/octet-stream',
+                            'Content-Disposition': f'attachment; filename="f1-{stamp}.tracemalloc"'},
+                'body': base64.b64encode(f1_profiler.dump_memory_snapshot()).decode(),
+                'isBase64Encoded': True
+            }
+        if action == 'mem_stop':
+            f1_profiler.stop_memory_tracing()
+            return reply({"status": "stopped"})
+        if action == 'status':
+            return reply(f1_profiler.get_profiler_status())
+    except RuntimeError as e:
+        return reply({"status": "error", "message": str(e)}, HTTPStatus.CONFLICT)
+    except ValueError as e:
+        return reply({"status": "error", "message": f"Bad parameter: {e}"}, HTTPStatus.BAD_REQUEST)
+    return reply({"status": "error", "message": f"Unknown action {action!r}"}, HTTPStatus.BAD_REQUEST)
+
 # Vercel expects the handler to be exported as 'default'
 def handler(event, context):
     """Vercel serverless function entry point"""
     import asyncio
     import json
     
+    # /metrics, /traces, /profile, /health and /ready are routed here so they
+    # report the instance that handles updates
+    path = event.get('path', '').rstrip('/')
+    if event.get('httpMethod') == 'GET' and (path.endswith('/health') or path.endswith('/ready')):
+        return health_handler(event, context)
+    if event.get('httpMethod') == 'GET' and path.endswith('/metrics'):
+        return {
+            'statusCode': 200,
+            'headers': {'Content-Type': CONTENT_TYPE},
+            'body': render_metrics()
+        }
+    if event.get('httpMethod') == 'GET' and path.endswith('/traces'):
+        return traces_response(event)
+    if event.get('httpMethod') in ('GET', 'POST') and path.endswith('/profile'):
+        return profile_response(event)
+    
     # Parse the incoming request
     if event.get('httpMethod') != 'POST':
         return {
@@ -325,13 +514,16 @@ def handler(event, context):
     
     # Process the webhook
     try:
-        result = asyncio.run(webhook_handler(event))
+        result = get_event_loop().run_until_complete(webhook_handler(event))
         return result
     except Exception as e:
         return {
             'statusCode': 500,
             'body': json.dumps({"status": "error", "message": str(e)})
         }
+    finally:
+        # The loop sits idle (or the instance frozen) until the next update
+        pause_loop_monitor()
 
 # Vercel compatibility
 app = handler
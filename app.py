@@ -10,6 +10,9 @@ telegram_token = os.environ.get("TELEGRAM_BOT_TOKEN")
 if not telegram_token:
     raise ValueError("TELEGRAM_BOT_TOKEN is not set in environment variables")
 
+# Overridable to point at a local Bot API emulator (benchmarks/emulator.py)
+telegram_api_url = os.environ.get("F1_TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/")
+
 # --------------------------
 # POST endpoint for Telegram
 # --------------------------
@@ -32,6 +35,21 @@ def home():
         "webhook_url": "https://f1bot2026update-rufethidoaz6750-xgug3pqz.leapcell.dev/"
     }
 
+# --------------------------
+# Health / readiness (leapcell.yaml health-checks /health)
+# --------------------------
+@app.route("/health", methods=["GET"])
+def health():
+    from f1_health import get_health
+    healthy, report = get_health()
+    return report, 200 if healthy else 503
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    from f1_health import get_health
+    healthy, report = get_health(readiness=True)
+    return report, 200 if healthy else 503
+
 # --------------------------
 # Process Telegram update
 # --------------------------
@@ -47,7 +65,7 @@ def process_update(update):
         answer = generate_response(text)
 
         requests.post(
-            f"https://api.telegram.org/bot{telegram_token}/sendMessage",
+            f"{telegram_api_url}/bot{telegram_token}/sendMessage",
             json={"chat_id": chat_id, "text": answer}
         )
     except Exception as e:
@@ -0,0 +1,158 @@
+"""
+Benchmark: notification broadcast fan-out
+Delivers one broadcast to a large subscriber list through a local Bot API
+stand-in (getMe/sendMessage), then checks that an interrupted broadcast
+resumes from its checkpoint without re-sending.
+
+Usage:
+    python benchmarks/bench_broadcast.py                       # 50k subscribers, engine ceiling
+    python benchmarks/bench_broadcast.py --rate 25 --subscribers 2000
+    python benchmarks/bench_broadcast.py --blocked 0.02 --flood 0.001
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import threading
+from collections import Counter
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Isolated database for the run; must be set before f1_broadcast is imported
+os.environ["F1_BROADCAST_PATH"] = os.path.join(tempfile.mkdtemp(prefix="f1-bench-"), "broadcast.sqlite3")
+
+import f1_broadcast
+from telegram import Bot
+from telegram.request import HTTPXRequest
+
+TOKEN = "123456:BENCH"
+
+
+class BotApiStandIn(BaseHTTPRequestHandler):
+    """Answers getMe and sendMessage like the Bot API, recording every delivery"""
+
+    deliveries = Counter()
+    lock = threading.Lock()
+    blocked_ratio = 0.0
+    flood_ratio = 0.0
+    latency = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length)
+        method = self.path.rsplit("/", 1)[-1]
+        if method == "getMe":
+            self._reply(200, {"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}})
+            return
+        if method != "sendMessage":
+            self._reply(200, {"ok": True, "result": True})
+            return
+
+        # PTB posts parameters form-encoded
+        data = {key: values[0] for key, values in parse_qs(raw.decode()).items()}
+        chat_id = int(data["chat_id"])
+        if self.latency:
+            time.sleep(self.latency)
+        rng = random.Random(chat_id)
+        if rng.random() < self.blocked_ratio:
+            self._reply(403, {"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user"})
+            return
+        if random.random() < self.flood_ratio:
+            self._reply(429, {"ok": False, "error_code": 429, "description": "Too Many Requests: retry after 1",
+                              "parameters": {"retry_after": 1}})
+            return
+        with self.lock:
+            self.deliveries[chat_id] += 1
+        self._reply(200, {"ok": True, "result": {
+            "message_id": self.deliveries[chat_id], "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"}, "text": data.get("text", ""),
+        }})
+
+
+def start_stand_in():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BotApiStandIn)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def seed_subscribers(count):
+    connection = f1_broadcast._connect()
+    now = time.time()
+    connection.executemany(
+        "INSERT OR IGNORE INTO subscriptions (chat_id, topic, created_at) VALUES (?, 'results', ?)",
+        ((100000 + i, now) for i in range(count)),
+    )
+    connection.commit()
+
+
+async def deliver(port, broadcast_id, rate, deadline=None):
+    request = HTTPXRequest(connection_pool_size=f1_broadcast.BROADCAST_CONCURRENCY)
+    async with Bot(TOKEN, base_url=f"http://127.0.0.1:{port}/bot", request=request) as bot:
+        return await f1_broadcast.run_broadcast(bot, broadcast_id, deadline=deadline, rate=rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=50000)
+    parser.add_argument("--rate", type=float, default=2000.0, help="broadcast messages/second (production: 25)")
+    parser.add_argument("--latency", type=float, default=0.0, help="stand-in response delay in seconds")
+    parser.add_argument("--blocked", type=float, default=0.0, help="share of chats that blocked the bot")
+    parser.add_argument("--flood", type=float, default=0.0, help="share of sends answered with 429")
+    args = parser.parse_args()
+
+    BotApiStandIn.latency = args.latency
+    BotApiStandIn.blocked_ratio = args.blocked
+    BotApiStandIn.flood_ratio = args.flood
+    server = start_stand_in()
+    port = server.server_address[1]
+
+    seed_subscribers(args.subscribers)
+    text = "🔔 *Yeni nəticələr*\n\n" + "\n".join(f"{i}. Driver {i} - Team" for i in range(1, 21))
+
+    # Full run
+    f1_broadcast.create_broadcast("bench-full", "results", text)
+    started = time.perf_counter()
+    record = asyncio.run(deliver(port, "bench-full", args.rate))
+    elapsed = time.perf_counter() - started
+    print(f"subscribers:     {args.subscribers}")
+    print(f"sent / failed:   {record['sent']} / {record['failed']}")
+    print(f"elapsed:         {elapsed:.2f} s  ({record['sent'] / elapsed:.0f} msg/s at --rate {args.rate:g})")
+    print(f"at 25 msg/s:     {args.subscribers / 25 / 60:.1f} min projected")
+    duplicates = sum(1 for count in BotApiStandIn.deliveries.values() if count > 1)
+    print(f"duplicates:      {duplicates}")
+
+    # Interrupted run: stop halfway, then resume from the checkpoint
+    BotApiStandIn.deliveries.clear()
+    f1_broadcast.create_broadcast("bench-resume", "results", text)
+    halfway = args.subscribers / 2 / args.rate
+    asyncio.run(deliver(port, "bench-resume", args.rate, deadline=time.monotonic() + halfway))
+    paused = f1_broadcast.get_broadcast("bench-resume")
+    record = asyncio.run(deliver(port, "bench-resume", args.rate))
+    duplicates = sum(1 for count in BotApiStandIn.deliveries.values() if count > 1)
+    print(f"resume:          paused at {paused['sent'] + paused['failed']} -> {record['status']} "
+          f"with {record['sent']} sent, {duplicates} duplicates")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
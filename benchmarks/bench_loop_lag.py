@@ -0,0 +1,126 @@
+"""
+Event-loop responsiveness under concurrent updates
+Runs many updates concurrently on one event loop (as a persistent webhook or
+polling process would) with f1_loop_monitor attached, and reports heartbeat
+lag plus the code that blocked the loop. Upstreams are served by the local
+emulator. Every run is also a check: it fails (exit 1) when the worst lag
+exceeds --max-lag, i.e. when sync I/O or parsing creeps back onto the loop.
+There is no CI in this repo, so run it by hand before merging changes to
+handlers or fetchers.
+
+Usage:
+    python benchmarks/bench_loop_lag.py                                   # mixed commands, 100 ms limit
+    python benchmarks/bench_loop_lag.py --mix /live --updates 200 --concurrency 50
+    python benchmarks/bench_loop_lag.py --upstream-latency 150 --max-lag 0    # report only
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import emulator
+from loadgen import UpdateFactory, STEADY_MIX, TOKEN
+
+
+async def drive(webhook, updates, concurrency, spacing):
+    """Feed updates through the webhook coroutine, `concurrency` at a time"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(update):
+        async with semaphore:
+            started = time.perf_counter()
+            await webhook.webhook_handler({"httpMethod": "POST", "body": json.dumps(update)})
+            latencies.append(time.perf_counter() - started)
+
+    tasks = []
+    for update in updates:
+        tasks.append(asyncio.create_task(one(update)))
+        if spacing:
+            await asyncio.sleep(spacing)
+    await asyncio.gather(*tasks)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20, help="updates in flight at once")
+    parser.add_argument("--spacing", type=float, default=0.005, help="seconds between update arrivals")
+    parser.add_argument("--mix", action="append", help="update kinds to send (default: the loadgen steady mix)")
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--upstream-latency", type=float, default=50.0, help="emulator latency in ms")
+    parser.add_argument("--interval", type=float, default=0.02, help="heartbeat interval in seconds")
+    parser.add_argument("--threshold", type=float, default=0.1, help="stall length attributed with a stack")
+    parser.add_argument("--max-lag", type=float, default=0.1,
+                        help="fail if the worst heartbeat lag exceeds this (seconds, 0 to only report)")
+    parser.add_argument("--seed", type=int, default=2026)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server, base_url = emulator.start_emulator(latency_ms=args.upstream_latency, seed=args.seed)
+    os.environ.update(emulator.environment(base_url))
+    state_dir = tempfile.mkdtemp(prefix="f1-lag-")
+    for name in ("ARCHIVE", "WEATHER", "PREFS", "BROADCAST"):
+        os.environ[f"F1_{name}_PATH"] = os.path.join(state_dir, f"{name.lower()}.sqlite3")
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", TOKEN)
+    os.environ["F1_CACHE_BACKEND"] = "memory"
+
+    from api import webhook
+    import f1_loop_monitor
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    rng = random.Random(args.seed)
+    factory = UpdateFactory(args.chats, args.seed)
+    kinds = args.mix or [kind for kind, weight in STEADY_MIX.items() for _ in range(weight)]
+    updates = [factory.make(rng.choice(kinds)) for _ in range(args.updates)]
+
+    loop = webhook.get_event_loop()
+    # Bot setup happens once, outside the measured window
+    loop.run_until_complete(webhook.initialize_bot())
+    monitor = f1_loop_monitor.start_loop_monitor(loop, interval=args.interval, threshold=args.threshold)
+    started = time.perf_counter()
+    latencies = loop.run_until_complete(drive(webhook, updates, args.concurrency, args.spacing))
+    elapsed = time.perf_counter() - started
+    monitor.stop()
+
+    summary = monitor.summary()
+    latencies.sort()
+    print(f"updates:        {len(latencies)} in {elapsed:.2f}s, concurrency {args.concurrency}")
+    print(f"update latency: p50 {latencies[len(latencies) // 2] * 1000:.0f} ms  "
+          f"max {latencies[-1] * 1000:.0f} ms")
+    print(f"loop lag:       avg {summary['avg_lag'] * 1000:.1f} ms  max {summary['max_lag'] * 1000:.1f} ms  "
+          f"({summary['samples']} heartbeats every {args.interval * 1000:.0f} ms)")
+    print(f"stalls > {args.threshold * 1000:.0f} ms: {summary['blocked']}")
+
+    events = f1_loop_monitor.get_blocking_events()
+    if events:
+        repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        print("\nStalls by coroutine, innermost bot frame and blocking frame:")
+        frames = Counter()
+        for event in events:
+            bot_frames = [line.strip().splitlines()[0] for line in event["stack"]
+                          if repo in line and os.sep + "benchmarks" + os.sep not in line]
+            frames[(event["coroutine"], bot_frames[-1] if bot_frames else "-", event["blocking_frame"])] += 1
+        for (coroutine, bot_frame, blocking_frame), count in frames.most_common(10):
+            print(f"{count:>5}  {coroutine}\n       {bot_frame}\n       {blocking_frame}")
+
+    if args.max_lag and summary["max_lag"] > args.max_lag:
+        print(f"\nFAIL: max loop lag {summary['max_lag'] * 1000:.0f} ms exceeds {args.max_lag * 1000:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
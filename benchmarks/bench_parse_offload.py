@@ -0,0 +1,124 @@
+"""
+Event-loop responsiveness under concurrent /live parsing load
+Each simulated /live request parses the recorded formula-timer.com page
+(OptimizedLiveTimingScraper.get_live_data on a stand-in page) and, with
+--positions, reduces an OpenF1 /position body the way get_live_positions does
+from its worker thread. The same load runs once per CPU stage executor while
+f1_loop_monitor's heartbeat measures how long the loop was kept from other
+updates. Pools are warmed up outside the measured window.
+
+Usage:
+    python benchmarks/bench_parse_offload.py
+    python benchmarks/bench_parse_offload.py --requests 400 --concurrency 40 --workers 4
+    python benchmarks/bench_parse_offload.py --executor process --positions 60000
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import replay
+import f1_executor
+from f1_loop_monitor import LoopMonitor
+from bench_suite import FakePage
+from bench_position_decode import synthetic_race
+from f1_playwright_scraper_fixed import (
+    OptimizedLiveTimingScraper, format_timing_data_for_telegram, parse_live_timing_html, HTML_PARSER,
+)
+from f1_bot_live import reduce_position_payload
+
+
+async def live_request(scraper, positions_body):
+    data = await scraper.get_live_data()
+    if not data or not data["timing"]:
+        raise RuntimeError("live timing page parsed to nothing")
+    format_timing_data_for_telegram(data)
+    if positions_body is not None:
+        # get_live_positions runs in a to_thread worker and reduces through call_cpu
+        await asyncio.to_thread(f1_executor.call_cpu, reduce_position_payload, positions_body)
+
+
+async def run_load(kind, args, html, positions_body):
+    f1_executor.configure_executor(kind, args.workers)
+    scraper = OptimizedLiveTimingScraper()
+    scraper.page = FakePage(html)
+    # Starting a process pool (forkserver, imports) is a one-off cost, not loop lag
+    await f1_executor.run_cpu(parse_live_timing_html, html)
+    if positions_body is not None:
+        await asyncio.to_thread(f1_executor.call_cpu, reduce_position_payload, positions_body)
+
+    loop = asyncio.get_running_loop()
+    monitor = LoopMonitor(loop, interval=args.interval, threshold=args.threshold).start()
+    # The watchdog can only attribute stalls once a heartbeat has told it the loop's thread
+    await asyncio.sleep(args.interval * 2)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await live_request(scraper, positions_body)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    # Let the last heartbeat land so a stall at the very end is counted
+    await asyncio.sleep(args.interval * 2)
+    monitor.stop()
+    latencies.sort()
+    return {
+        "executor": kind,
+        "elapsed": elapsed,
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[int(len(latencies) * 0.95)],
+        **monitor.summary(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--executor", action="append", choices=f1_executor.EXECUTOR_KINDS,
+                        help="executors to compare (default: all)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20, help="/live requests in flight at once")
+    parser.add_argument("--workers", type=int, default=f1_executor.PARSE_WORKERS)
+    parser.add_argument("--positions", type=int, default=0, metavar="ROWS",
+                        help="also reduce an OpenF1 /position body of this many rows per request")
+    parser.add_argument("--interval", type=float, default=0.005, help="heartbeat interval in seconds")
+    parser.add_argument("--threshold", type=float, default=0.05, help="stall length counted as blocked")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    html = replay.livetiming_html()
+    positions_body = json.dumps(synthetic_race(rows=args.positions)).encode() if args.positions else None
+
+    results = [asyncio.run(run_load(kind, args, html, positions_body))
+               for kind in args.executor or f1_executor.EXECUTOR_KINDS]
+    f1_executor.configure_executor("inline")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.requests} /live requests, concurrency {args.concurrency}, {args.workers} workers, "
+          f"parser {HTML_PARSER}, page {len(html)} chars"
+          + (f", {args.positions} position rows ({len(positions_body)} bytes)" if positions_body else ""))
+    print(f"{'executor':<10}{'req/s':>8}{'p50':>10}{'p95':>10}{'avg lag':>10}{'max lag':>10}"
+          f"{'stalls':>8}")
+    for result in results:
+        print(f"{result['executor']:<10}{args.requests / result['elapsed']:>8.1f}"
+              f"{result['p50'] * 1000:>8.1f}ms{result['p95'] * 1000:>8.1f}ms"
+              f"{(result['avg_lag'] or 0) * 1000:>8.2f}ms{result['max_lag'] * 1000:>8.1f}ms"
+              f"{result['blocked']:>8}")
+
+
+if __name__ == "__main__":
+    main()
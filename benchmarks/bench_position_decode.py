@@ -0,0 +1,122 @@
+"""
+Benchmark: full-race OpenF1 /v1/position decoding
+Compares response.json()-style full decoding with the streaming reduction
+used by get_live_positions and get_last_session_results.
+
+Usage:
+    python benchmarks/bench_position_decode.py
+    python benchmarks/bench_position_decode.py --record 9158   # record a real session first
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from f1_http import iter_json_array
+from f1_bot_live import reduce_latest_positions
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "openf1_position_race.json")
+CHUNK_SIZE = 65536
+
+
+def record_fixture(session_key):
+    """Download a real session's position feed into the fixture file"""
+    import requests
+
+    response = requests.get(f"https://api.openf1.org/v1/position?session_key={session_key}", timeout=60)
+    response.raise_for_status()
+    os.makedirs(os.path.dirname(FIXTURE), exist_ok=True)
+    with open(FIXTURE, "wb") as f:
+        f.write(response.content)
+    print(f"Recorded {len(response.content)} bytes for session {session_key}")
+
+
+def synthetic_race(rows=60000, drivers=20, seed=2024):
+    """Race-sized position feed shaped like OpenF1 rows (used when no recording exists)"""
+    rng = random.Random(seed)
+    order = list(range(1, drivers + 1))
+    data = []
+    start = 1700000000
+    for i in range(rows):
+        a = rng.randrange(drivers - 1)
+        order[a], order[a + 1] = order[a + 1], order[a]
+        for driver_number in (order[a], order[a + 1]):
+            data.append({
+                "date": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(start + i // 4)) + f".{i % 1000:03d}000+00:00",
+                "session_key": 9158,
+                "meeting_key": 1219,
+                "driver_number": driver_number,
+                "position": order.index(driver_number) + 1,
+            })
+            if len(data) >= rows:
+                return data
+    return data
+
+
+def load_fixture():
+    if os.path.exists(FIXTURE):
+        with open(FIXTURE, "rb") as f:
+            return f.read(), "recorded"
+    return json.dumps(synthetic_race()).encode(), "synthetic"
+
+
+def measure(name, func, raw, repeat):
+    timings = []
+    peak = 0
+    result = None
+    for _ in range(repeat):
+        tracemalloc.start()
+        started = time.perf_counter()
+        result = func(raw)
+        timings.append(time.perf_counter() - started)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    timings.sort()
+    print(f"{name:<22} median {timings[len(timings) // 2] * 1000:8.1f} ms   peak {peak / 1024 / 1024:7.2f} MiB")
+    return result
+
+
+def full_json(raw):
+    return reduce_latest_positions(json.loads(raw))
+
+
+def full_orjson(raw):
+    import orjson
+
+    return reduce_latest_positions(orjson.loads(raw))
+
+
+def streamed(raw):
+    chunks = (raw[i:i + CHUNK_SIZE] for i in range(0, len(raw), CHUNK_SIZE))
+    return reduce_latest_positions(iter_json_array(chunks))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--record", metavar="SESSION_KEY", help="record a real OpenF1 session as the fixture")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixture(args.record)
+
+    raw, source = load_fixture()
+    print(f"Fixture: {source}, {len(raw) / 1024 / 1024:.2f} MiB")
+    print("(peak memory excludes the raw payload itself)\n")
+
+    expected = measure("json.loads + reduce", full_json, raw, args.repeat)
+    try:
+        assert measure("orjson.loads + reduce", full_orjson, raw, args.repeat) == expected
+    except ImportError:
+        print("orjson not installed, skipping")
+    assert measure("streamed reduce", streamed, raw, args.repeat) == expected
+
+
+if __name__ == "__main__":
+    main()
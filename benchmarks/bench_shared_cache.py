@@ -0,0 +1,190 @@
+"""
+Benchmark: shared cache / dedup backends across processes
+Runs several worker processes against one backend and checks that every
+update id is claimed exactly once and that a single-flight fill reaches the
+upstream exactly once per expiry, then measures per-operation latency.
+The Redis backend is exercised against an in-process RESP stand-in.
+
+Usage:
+    python benchmarks/bench_shared_cache.py                    # sqlite + redis stand-in
+    python benchmarks/bench_shared_cache.py --backend sqlite --workers 8
+    python benchmarks/bench_shared_cache.py --redis-url redis://127.0.0.1:6379/0   # real server
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import socketserver
+import multiprocessing
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import f1_store
+
+# Compare-and-delete script sent by RedisBackend.release_lock
+RELEASE_SCRIPT = f1_store.RedisBackend._RELEASE_SCRIPT
+
+
+class RespStandIn(socketserver.StreamRequestHandler):
+    """Subset of the Redis protocol used by f1_store.RedisBackend"""
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        count = int(line[1:-2])
+        args = []
+        for _ in range(count):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _write(self, reply):
+        if reply is None:
+            self.wfile.write(b"$-1\r\n")
+        elif isinstance(reply, int):
+            self.wfile.write(b":%d\r\n" % reply)
+        elif isinstance(reply, bytes):
+            self.wfile.write(b"$%d\r\n%s\r\n" % (len(reply), reply))
+        elif reply.startswith("ERR"):
+            self.wfile.write(f"-{reply}\r\n".encode())
+        else:
+            self.wfile.write(f"+{reply}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            name = args[0].upper()
+            with server.lock:
+                now = time.time()
+                for key in [k for k, (_, exp) in server.data.items() if exp is not None and exp <= now]:
+                    del server.data[key]
+                if name in (b"PING", b"AUTH", b"SELECT"):
+                    reply = "PONG" if name == b"PING" else "OK"
+                elif name == b"GET":
+                    entry = server.data.get(args[1])
+                    reply = entry[0] if entry else None
+                elif name == b"SET":
+                    options = [arg.upper() for arg in args[3:]]
+                    expires = None
+                    if b"PX" in options:
+                        expires = now + int(args[3 + options.index(b"PX") + 1]) / 1000
+                    if b"NX" in options and args[1] in server.data:
+                        reply = None
+                    else:
+                        server.data[args[1]] = (args[2], expires)
+                        reply = "OK"
+                elif name == b"DEL":
+                    reply = sum(1 for key in args[1:] if server.data.pop(key, None) is not None)
+                elif name == b"EVAL" and args[1].decode() == RELEASE_SCRIPT:
+                    entry = server.data.get(args[3])
+                    if entry and entry[0] == args[4]:
+                        del server.data[args[3]]
+                        reply = 1
+                    else:
+                        reply = 0
+                else:
+                    reply = f"ERR unknown command {name.decode()}"
+            self._write(reply)
+            self.wfile.flush()
+
+
+class RespServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, RespStandIn)
+        self.data = {}
+        self.lock = threading.Lock()
+
+
+def _worker(kind, url, update_ids, fill_rounds, results):
+    f1_store.set_backend(f1_store.create_backend(kind, url))
+    backend = f1_store.get_backend()
+
+    claimed = [update_id for update_id in update_ids if f1_store.claim(f"update:{update_id}", 60)]
+
+    upstream_calls = 0
+
+    def fill(round_no):
+        nonlocal upstream_calls
+        key = f"bench:{round_no}"
+        if backend.get(key) is not None:
+            return
+        upstream_calls += 1
+        time.sleep(0.05)  # upstream latency
+        backend.set(key, "payload", 60)
+
+    for round_no in range(fill_rounds):
+        f1_store.single_flight(
+            f"fill:bench:{round_no}", ready=lambda: backend.get(f"bench:{round_no}") is not None
+        )(fill)(round_no)
+
+    started = time.perf_counter()
+    operations = 2000
+    for i in range(operations):
+        backend.set(f"lat:{os.getpid()}:{i % 50}", i, 60)
+        backend.get(f"lat:{os.getpid()}:{i % 50}")
+    latency_us = (time.perf_counter() - started) / (operations * 2) * 1e6
+
+    results.put((claimed, upstream_calls, latency_us))
+
+
+def run(kind, url, workers, updates, fill_rounds):
+    results = multiprocessing.Queue()
+    # Every worker sees every update, like duplicate deliveries across instances
+    update_ids = list(range(updates))
+    processes = [
+        multiprocessing.Process(target=_worker, args=(kind, url, update_ids, fill_rounds, results))
+        for _ in range(workers)
+    ]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    collected = [results.get(timeout=120) for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    claims = [update_id for claimed, _, _ in collected for update_id in claimed]
+    upstream_calls = sum(calls for _, calls, _ in collected)
+    latency = sum(lat for _, _, lat in collected) / len(collected)
+    duplicates = len(claims) - len(set(claims))
+    print(f"{kind:>7}: {workers} workers, {updates} updates -> {len(set(claims))} claimed, "
+          f"{duplicates} duplicate claims; {fill_rounds} fills -> {upstream_calls} upstream calls; "
+          f"{latency:.0f} us/op; {elapsed:.2f}s")
+    return duplicates == 0 and len(set(claims)) == updates and upstream_calls == fill_rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["sqlite", "redis", "all"], default="all")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--fills", type=int, default=5)
+    parser.add_argument("--redis-url", help="Use a real Redis-protocol server instead of the stand-in")
+    args = parser.parse_args()
+
+    ok = True
+    if args.backend in ("sqlite", "all"):
+        path = os.path.join(tempfile.mkdtemp(prefix="f1-bench-"), "cache.sqlite3")
+        ok &= run("sqlite", path, args.workers, args.updates, args.fills)
+    if args.backend in ("redis", "all"):
+        url = args.redis_url
+        if url is None:
+            server = RespServer(("127.0.0.1", 0))
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            url = f"redis://127.0.0.1:{server.server_address[1]}/0"
+        ok &= run("redis", url, args.workers, args.updates, args.fills)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Benchmark suite: fetchers and formatters replayed from recorded upstream fixtures
+Every upstream call is served by benchmarks/replay.py (recorded responses, or
+synthetic ones of the same shape), so runs are offline and repeatable. Cold
+cases clear the bot's caches before each call; warm cases measure cache hits.
+
+Usage:
+    python benchmarks/bench_suite.py                            # print results
+    python benchmarks/bench_suite.py --save benchmarks/baseline.json
+    python benchmarks/bench_suite.py --compare benchmarks/baseline.json --threshold 0.25
+    python benchmarks/bench_suite.py -k next_race --min-time 3
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Isolated state for the run; must be set before the bot modules are imported.
+# Removed again when the interpreter exits
+_STATE_DIR = tempfile.TemporaryDirectory(prefix="f1-bench-")
+for _name in ("ARCHIVE", "WEATHER", "PREFS", "BROADCAST"):
+    os.environ[f"F1_{_name}_PATH"] = os.path.join(_STATE_DIR.name, f"{_name.lower()}.sqlite3")
+os.environ["F1_CACHE_BACKEND"] = "memory"
+os.environ["F1_HTTP_HEDGE"] = "0"
+
+import replay
+import f1_http
+import f1_weather
+import f1_bot_live
+from f1_playwright_scraper_fixed import OptimizedLiveTimingScraper, format_timing_data_for_telegram
+
+logging.disable(logging.INFO)
+
+
+def reset_caches():
+    """Forget everything a cold request would not have"""
+    for entry in f1_bot_live.CACHE.values():
+        entry["data"] = None
+        entry["timestamp"] = None
+    f1_bot_live.DRIVER_DATA_CACHE.clear()
+    f1_bot_live.CONSTRUCTOR_DATA_CACHE.clear()
+    f1_http._VALIDATORS.clear()
+    f1_weather.FORECASTS.clear()
+    f1_weather._FAILED_FETCHES.clear()
+
+
+class FakePage:
+    """Stands in for the Playwright page: returns the recorded DOM"""
+
+    def __init__(self, html):
+        self.html = html
+
+    async def content(self):
+        return self.html
+
+
+def _live_inputs():
+    sessions = replay.synthetic_sessions({}, "")
+    session = sessions[-1]
+    session_info = {
+        "session": session,
+        "session_key": session["session_key"],
+        "session_name": session["session_name"],
+        "meeting_name": session["meeting_name"],
+        "country_name": session["country_name"],
+        "location": session["location"],
+        "date_start": session["date_start"],
+        "date_end": session["date_end"],
+        "gmt_offset": session["gmt_offset"],
+    }
+    return session_info
+
+
+def build_cases():
+    """name -> (setup, call); setup runs before every call and is not timed"""
+    session_info = _live_inputs()
+    positions = f1_bot_live.get_live_positions(session_info["session_key"])
+    scraper = OptimizedLiveTimingScraper()
+    scraper.page = FakePage(replay.livetiming_html())
+    timing_data = asyncio.run(scraper.get_live_data())
+
+    return {
+        "standings_cold": (reset_caches, f1_bot_live.get_current_standings),
+        "standings_warm": (None, f1_bot_live.get_current_standings),
+        "constructor_standings_cold": (reset_caches, f1_bot_live.get_constructor_standings),
+        "last_session_cold": (reset_caches, f1_bot_live.get_last_session_results),
+        "next_race_cold": (reset_caches, f1_bot_live.get_next_race),
+        "next_race_warm": (None, f1_bot_live.get_next_race),
+        "next_race_warm_other_tz": (None, lambda: f1_bot_live.get_next_race("Europe/London")),
+        "season_calendar": (reset_caches, f1_bot_live.get_f1_season_calendar),
+        "live_positions": (reset_caches, lambda: f1_bot_live.get_live_positions(session_info["session_key"])),
+        "format_live_timing_message": (None, lambda: f1_bot_live.format_live_timing_message(session_info, positions)),
+        "formula_timer_parse": (None, lambda: asyncio.run(scraper.get_live_data())),
+        "format_timing_data_for_telegram": (None, lambda: format_timing_data_for_telegram(timing_data)),
+    }
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(setup, call, transport, min_time, min_iterations, warmup):
+    for _ in range(warmup):
+        if setup:
+            setup()
+        call()
+
+    calls_before = sum(transport.calls.values())
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < min_iterations or time.perf_counter() < deadline:
+        if setup:
+            setup()
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+
+    samples.sort()
+    total = sum(samples)
+    return {
+        "iterations": len(samples),
+        "ops_per_sec": round(len(samples) / total, 1) if total else None,
+        "mean_ms": round(statistics.fmean(samples) * 1000, 4),
+        "p50_ms": round(_percentile(samples, 0.50) * 1000, 4),
+        "p95_ms": round(_percentile(samples, 0.95) * 1000, 4),
+        "p99_ms": round(_percentile(samples, 0.99) * 1000, 4),
+        "min_ms": round(samples[0] * 1000, 4),
+        "max_ms": round(samples[-1] * 1000, 4),
+        "upstream_calls_per_op": round((sum(transport.calls.values()) - calls_before) / len(samples), 2),
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "commit": commit,
+        "orjson": f1_http.ORJSON_AVAILABLE,
+        "fixtures": {name: "recorded" if replay.load_recorded(name) is not None else "synthetic"
+                     for _, _, name, _ in replay.ROUTES},
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def compare(results, baseline_path, threshold):
+    """Print p50 deltas against a saved baseline; returns the names that regressed"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    print(f"\n{'case':<34}{'baseline p50':>14}{'now p50':>12}{'delta':>9}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<34}{'-':>14}{result['p50_ms']:>11.3f}ms{'new':>9}")
+            continue
+        delta = (result["p50_ms"] - before["p50_ms"]) / before["p50_ms"] if before["p50_ms"] else 0.0
+        marker = "  REGRESSION" if delta > threshold else ""
+        print(f"{name:<34}{before['p50_ms']:>12.3f}ms{result['p50_ms']:>10.3f}ms{delta:>+8.0%}{marker}")
+        if delta > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="select", help="Only run cases whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds to sample each case")
+    parser.add_argument("--min-iterations", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--save", metavar="PATH", help="Write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="p50 slowdown counted as a regression")
+    args = parser.parse_args()
+
+    transport = replay.ReplayTransport().install()
+    try:
+        cases = build_cases()
+        results = {}
+        print(f"{'case':<34}{'ops/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'calls/op':>10}")
+        for name, (setup, call) in cases.items():
+            if args.select and args.select not in name:
+                continue
+            result = measure(setup, call, transport, args.min_time, args.min_iterations, args.warmup)
+            results[name] = result
+            print(f"{name:<34}{result['ops_per_sec']:>10}{result['p50_ms']:>8.3f}ms"
+                  f"{result['p95_ms']:>8.3f}ms{result['p99_ms']:>8.3f}ms{result['upstream_calls_per_op']:>10}")
+    finally:
+        transport.uninstall()
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+Local emulator for the bot's upstreams: Jolpica, OpenF1, Open-Meteo and the Telegram Bot API
+Serves replay fixtures (benchmarks/replay.py) under one port and records every
+message the bot sends or edits, with knobs for latency, errors, 429s and
+payload size. Point the bot at it with the F1_*_URL variables it prints.
+
+Usage:
+    python benchmarks/emulator.py --port 8765
+    python benchmarks/emulator.py --latency 80 --jitter 40 --error-rate 0.02 --rate-limit-rate 0.01
+    python benchmarks/emulator.py --payload-scale 5 --faults openf1,telegram --record-file /tmp/sent.jsonl
+
+Control endpoints:
+    GET  /_emulator/messages    recorded sendMessage / editMessageText calls
+    GET  /_emulator/stats       request counts per upstream and status
+    GET  /_emulator/config      current knobs; POST a JSON object to change them
+    POST /_emulator/reset       clear recorded messages and stats
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import replay
+
+# Path prefix -> upstream host the replay fixtures are keyed by
+UPSTREAMS = {
+    "jolpica": "api.jolpi.ca",
+    "openf1": "api.openf1.org",
+    "open-meteo": "api.open-meteo.com",
+    "geocoding": "geocoding-api.open-meteo.com",
+}
+
+# Environment variable -> path prefix
+ENV_PREFIXES = {
+    "F1_JOLPICA_URL": "jolpica",
+    "F1_OPENF1_URL": "openf1",
+    "F1_OPEN_METEO_URL": "open-meteo",
+    "F1_GEOCODING_URL": "geocoding",
+    "F1_TELEGRAM_API_URL": "telegram",
+}
+
+# Telegram methods recorded as sent/edited messages
+RECORDED_METHODS = ("sendMessage", "editMessageText")
+
+
+class EmulatorState:
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, rate_limit_rate=0.0,
+                 retry_after=1, payload_scale=1, faults=None, record_file=None, seed=None):
+        self.config = {
+            "latency_ms": latency_ms,
+            "jitter_ms": jitter_ms,
+            "error_rate": error_rate,
+            "rate_limit_rate": rate_limit_rate,
+            "retry_after": retry_after,
+            "payload_scale": payload_scale,
+            # Upstreams the latency/error knobs apply to (None = all)
+            "faults": sorted(faults) if faults else None,
+        }
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.messages = []
+        self.stats = Counter()
+        self.next_message_id = Counter()
+        # (chat_id, message_id) -> current text, to answer "message is not modified"
+        self.texts = {}
+        self.scaled = {}
+        self.record_file = open(record_file, "a", encoding="utf-8") if record_file else None
+
+    def reset(self):
+        with self.lock:
+            self.messages.clear()
+            self.stats.clear()
+            self.texts.clear()
+            self.next_message_id.clear()
+
+    def applies(self, upstream):
+        faults = self.config["faults"]
+        return faults is None or upstream in faults
+
+    def roll(self):
+        with self.lock:
+            return self.rng.random()
+
+    def delay(self):
+        config = self.config
+        if config["latency_ms"] or config["jitter_ms"]:
+            with self.lock:
+                jitter = self.rng.uniform(-config["jitter_ms"], config["jitter_ms"])
+            time.sleep(max(0.0, config["latency_ms"] + jitter) / 1000)
+
+    def scale(self, url, body):
+        """Repeat the elements of array payloads payload_scale times"""
+        factor = int(self.config["payload_scale"])
+        if factor <= 1 or not body.startswith(b"["):
+            return body
+        key = (url, factor)
+        scaled = self.scaled.get(key)
+        if scaled is None:
+            rows = json.loads(body)
+            scaled = self.scaled[key] = json.dumps(rows * factor, separators=(",", ":")).encode()
+        return scaled
+
+    def record(self, entry):
+        with self.lock:
+            self.messages.append(entry)
+            if self.record_file:
+                self.record_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                self.record_file.flush()
+
+
+class EmulatorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, payload, headers=None):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.state.stats[f"status_{status}"] += 1
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+        if not raw:
+            return {}
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            return json.loads(raw)
+        # python-telegram-bot posts parameters form-encoded
+        return {key: values[0] for key, values in parse_qs(raw.decode()).items()}
+
+    def _inject_fault(self, upstream):
+        """Apply latency and maybe answer with an error; True if a response was sent"""
+        state = self.state
+        if not state.applies(upstream):
+            return False
+        state.delay()
+        config = state.config
+        roll = state.roll()
+        if roll < config["rate_limit_rate"]:
+            retry_after = int(config["retry_after"])
+            state.stats[f"{upstream}_429"] += 1
+            if upstream == "telegram":
+                self._reply(429, {"ok": False, "error_code": 429,
+                                  "description": f"Too Many Requests: retry after {retry_after}",
+                                  "parameters": {"retry_after": retry_after}})
+            else:
+                self._reply(429, {"error": "rate limited"}, {"Retry-After": str(retry_after)})
+            return True
+        if roll < config["rate_limit_rate"] + config["error_rate"]:
+            state.stats[f"{upstream}_5xx"] += 1
+            if upstream == "telegram":
+                self._reply(502, {"ok": False, "error_code": 502, "description": "Bad Gateway"})
+            else:
+                self._reply(503, {"error": "service unavailable"})
+            return True
+        return False
+
+    def do_GET(self):
+        self._route()
+
+    def do_POST(self):
+        self._route()
+
+    def _route(self):
+        parts = urlsplit(self.path)
+        prefix, _, rest = parts.path.lstrip("/").partition("/")
+        if prefix == "_emulator":
+            self._control(rest)
+        elif prefix == "telegram":
+            self._telegram(rest)
+        elif prefix in UPSTREAMS:
+            self._upstream(prefix, rest, parts.query)
+        else:
+            self._reply(404, {"error": f"unknown upstream {prefix!r}"})
+
+    def _upstream(self, prefix, rest, query):
+        state = self.state
+        state.stats[f"{prefix}_requests"] += 1
+        if self._inject_fault(prefix):
+            return
+        url = f"https://{UPSTREAMS[prefix]}/{rest}" + (f"?{query}" if query else "")
+        name, body = replay.resolve(url)
+        if name is None:
+            self._reply(404, {"error": "no fixture"})
+            return
+        self._reply(200, state.scale(url, body))
+
+    def _telegram(self, rest):
+        state = self.state
+        token, _, method = rest.partition("/")
+        state.stats["telegram_requests"] += 1
+        state.stats[f"telegram_{method}"] += 1
+        params = self._body()
+        if self._inject_fault("telegram"):
+            return
+
+        if method == "getMe":
+            self._reply(200, {"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "Emulator",
+                                                     "username": "emulator_bot", "can_join_groups": True,
+                                                     "can_read_all_group_messages": False,
+                                                     "supports_inline_queries": False}})
+            return
+        if method not in RECORDED_METHODS:
+            self._reply(200, {"ok": True, "result": True})
+            return
+
+        chat_id = int(params.get("chat_id", 0))
+        text = params.get("text", "")
+        if method == "sendMessage":
+            with state.lock:
+                state.next_message_id[chat_id] += 1
+                message_id = state.next_message_id[chat_id]
+        else:
+            message_id = int(params.get("message_id", 0))
+            with state.lock:
+                unchanged = state.texts.get((chat_id, message_id)) == text
+            if unchanged:
+                self._reply(400, {"ok": False, "error_code": 400, "description":
+                                  "Bad Request: message is not modified: specified new message content and "
+                                  "reply markup are exactly the same as a current content and reply markup of the message"})
+                return
+        with state.lock:
+            state.texts[(chat_id, message_id)] = text
+        state.record({"method": method, "chat_id": chat_id, "message_id": message_id,
+                      "text": text, "at": time.time()})
+        self._reply(200, {"ok": True, "result": {
+            "message_id": message_id, "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "group"},
+            "from": {"id": 1, "is_bot": True, "first_name": "Emulator"},
+            "text": text,
+        }})
+
+    def _control(self, action):
+        state = self.state
+        if action == "messages":
+            with state.lock:
+                self._reply(200, list(state.messages))
+        elif action == "stats":
+            with state.lock:
+                self._reply(200, dict(state.stats))
+        elif action == "reset":
+            state.reset()
+            self._reply(200, {"ok": True})
+        elif action == "config":
+            if self.command == "POST":
+                changes = self._body()
+                unknown = set(changes) - set(state.config)
+                if unknown:
+                    self._reply(400, {"error": f"unknown knobs: {sorted(unknown)}"})
+                    return
+                state.config.update(changes)
+            self._reply(200, state.config)
+        else:
+            self._reply(404, {"error": f"unknown control {action!r}"})
+
+
+def start_emulator(host="127.0.0.1", port=0, **knobs):
+    """Run the emulator in a background thread; returns (server, base_url)"""
+    handler = type("Handler", (EmulatorHandler,), {"state": EmulatorState(**knobs)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def environment(base_url):
+    """Variables pointing the bot's upstreams at the emulator"""
+    return {name: f"{base_url}/{prefix}" for name, prefix in ENV_PREFIXES.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="mean response delay in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- uniform jitter in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 5xx")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds on 429")
+    parser.add_argument("--payload-scale", type=int, default=1, help="repeat array payloads (OpenF1) N times")
+    parser.add_argument("--faults", help="comma-separated upstreams the knobs apply to (default: all)")
+    parser.add_argument("--record-file", help="append recorded messages as JSON lines")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    server, base_url = start_emulator(
+        args.host, args.port,
+        latency_ms=args.latency, jitter_ms=args.jitter, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after,
+        payload_scale=args.payload_scale, faults=args.faults.split(",") if args.faults else None,
+        record_file=args.record_file, seed=args.seed,
+    )
+    print(f"Emulator listening on {base_url}")
+    for name, value in environment(base_url).items():
+        print(f"export {name}={value}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Load generator: synthetic Telegram update traffic against the webhook
+Builds a realistic update mix (/start, /standings, /nextrace, /live and
+callback queries) with redelivered duplicates and bursts at session start,
+and drives it open-loop at a target rate. Upstreams and the Bot API are
+served by the local emulator, so runs are offline and repeatable.
+
+Latency is measured from each update's scheduled send time (queueing
+included, no coordinated omission); service time is reported separately.
+
+Usage:
+    python benchmarks/loadgen.py --rate 20 --duration 30                  # api/webhook.py in-process
+    python benchmarks/loadgen.py --rate 50 --burst-at 10 --burst-factor 8 --duplicate-rate 0.05
+    python benchmarks/loadgen.py --target http --url http://127.0.0.1:8080/ --concurrency 16 --pid 12345
+    python benchmarks/loadgen.py --upstream-latency 120 --upstream-error-rate 0.02 --output /tmp/load.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import resource
+import tempfile
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import emulator
+
+TOKEN = "123456:LOADGEN"
+
+# Relative weights of the steady-state mix
+STEADY_MIX = {
+    "/start": 8,
+    "/standings": 18,
+    "/nextrace": 18,
+    "/live": 6,
+    "callback:standings": 12,
+    "callback:constructors": 8,
+    "callback:nextrace": 10,
+    "callback:lastrace": 8,
+    "callback:calendar": 5,
+    "callback:back_to_menu": 5,
+    "callback:archive:0": 2,
+}
+
+# Session start: everyone asks for live timing at once
+BURST_MIX = {
+    "/live": 45,
+    "callback:live": 25,
+    "callback:live_subscribe": 15,
+    "/nextrace": 10,
+    "/standings": 5,
+}
+
+
+class UpdateFactory:
+    """Telegram updates for a pool of private chats"""
+
+    def __init__(self, chats, seed):
+        self.rng = random.Random(seed)
+        self.chats = [700000000 + i for i in range(chats)]
+        self.next_update_id = 100000
+        self.next_message_id = {}
+
+    def _user(self, chat_id):
+        return {"id": chat_id, "is_bot": False, "first_name": f"User{chat_id % 1000}", "language_code": "az"}
+
+    def make(self, kind):
+        chat_id = self.rng.choice(self.chats)
+        self.next_update_id += 1
+        message_id = self.next_message_id.get(chat_id, 0) + 1
+        self.next_message_id[chat_id] = message_id
+        now = int(time.time())
+        chat = {"id": chat_id, "type": "private", "first_name": f"User{chat_id % 1000}"}
+        if kind.startswith("/"):
+            return {"update_id": self.next_update_id, "message": {
+                "message_id": message_id, "date": now, "chat": chat, "from": self._user(chat_id),
+                "text": kind, "entities": [{"type": "bot_command", "offset": 0, "length": len(kind)}],
+            }}
+        data = kind.split(":", 1)[1]
+        return {"update_id": self.next_update_id, "callback_query": {
+            "id": str(self.rng.getrandbits(63)), "chat_instance": str(chat_id), "data": data,
+            "from": self._user(chat_id),
+            "message": {"message_id": max(1, message_id - 1), "date": now, "chat": chat,
+                        "from": {"id": 1, "is_bot": True, "first_name": "Emulator"}, "text": "menu"},
+        }}
+
+
+def build_schedule(args):
+    """[(send offset in seconds, kind, update)] for the whole run"""
+    rng = random.Random(args.seed)
+    factory = UpdateFactory(args.chats, args.seed)
+    steady_kinds, steady_weights = zip(*STEADY_MIX.items())
+    burst_kinds, burst_weights = zip(*BURST_MIX.items())
+    schedule = []
+    sent = []
+    t = 0.0
+    while True:
+        in_burst = any(start <= t < start + args.burst_duration for start in args.burst_at)
+        rate = args.rate * (args.burst_factor if in_burst else 1.0)
+        # Poisson arrivals
+        t += rng.expovariate(rate)
+        if t >= args.duration:
+            break
+        if sent and rng.random() < args.duplicate_rate:
+            # Telegram redelivers an update it thinks was not acknowledged
+            kind, update = rng.choice(sent[-200:])
+            schedule.append((t, "duplicate", update))
+            continue
+        kinds, weights = (burst_kinds, burst_weights) if in_burst else (steady_kinds, steady_weights)
+        kind = rng.choices(kinds, weights)[0]
+        update = factory.make(kind)
+        sent.append((kind, update))
+        schedule.append((t, kind, update))
+    return schedule
+
+
+class InProcessTarget:
+    """api/webhook.py's Vercel handler, one update at a time like a serverless instance"""
+
+    concurrency = 1
+
+    def __init__(self):
+        from api import webhook
+
+        self.webhook = webhook
+
+    def send(self, update):
+        result = self.webhook.handler({"httpMethod": "POST", "body": json.dumps(update)}, None)
+        status = int(result.get("statusCode", 500))
+        return status, result.get("body", "")
+
+    def peak_rss_kb(self):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class HttpTarget:
+    """A running server (gunicorn app:app, vercel dev, ...) reached over HTTP"""
+
+    def __init__(self, url, concurrency, pid=None):
+        import requests
+
+        self.url = url
+        self.concurrency = concurrency
+        self.pid = pid
+        self.local = threading.local()
+        self.requests = requests
+
+    def send(self, update):
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = self.requests.Session()
+        response = session.post(self.url, json=update, timeout=60)
+        return response.status_code, response.text
+
+    def peak_rss_kb(self):
+        """High-water RSS of the server process (VmHWM), if its pid was given"""
+        if self.pid is None:
+            return None
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1])
+        except OSError:
+            return None
+        return None
+
+
+def _percentiles(values):
+    if not values:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    values = sorted(values)
+
+    def pick(fraction):
+        return round(values[min(len(values) - 1, int(fraction * (len(values) - 1) + 0.5))] * 1000, 2)
+
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": round(values[-1] * 1000, 2)}
+
+
+def run(target, schedule):
+    results = []
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def fire(offset, kind, update):
+        begin = time.perf_counter()
+        try:
+            status, body = target.send(update)
+            error = status >= 400
+        except Exception as e:
+            status, body, error = None, str(e), True
+        end = time.perf_counter()
+        with lock:
+            results.append({
+                "kind": kind,
+                "status": status,
+                "error": error,
+                "duplicate": '"duplicate"' in (body or ""),
+                "latency": end - (started + offset),
+                "service": end - begin,
+            })
+
+    with ThreadPoolExecutor(max_workers=target.concurrency) as pool:
+        for offset, kind, update in schedule:
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if target.concurrency == 1:
+                fire(offset, kind, update)
+            else:
+                pool.submit(fire, offset, kind, update)
+    elapsed = time.perf_counter() - started
+    return results, elapsed
+
+
+def summarize(results, elapsed, target, emulator_state):
+    by_kind = {}
+    for result in results:
+        by_kind.setdefault(result["kind"], []).append(result)
+    errors = sum(1 for r in results if r["error"])
+    summary = {
+        "updates": len(results),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_per_s": round(len(results) / elapsed, 1) if elapsed else None,
+        "error_rate": round(errors / len(results), 4) if results else None,
+        "duplicates_dropped": sum(1 for r in results if r["duplicate"]),
+        "latency": _percentiles([r["latency"] for r in results]),
+        "service": _percentiles([r["service"] for r in results]),
+        "mean_service_ms": round(statistics.fmean(r["service"] for r in results) * 1000, 2) if results else None,
+        "peak_rss_mb": round(target.peak_rss_kb() / 1024, 1) if target.peak_rss_kb() else None,
+        "by_kind": {
+            kind: {"count": len(rs), "errors": sum(1 for r in rs if r["error"]), **_percentiles([r["latency"] for r in rs])}
+            for kind, rs in sorted(by_kind.items())
+        },
+    }
+    if emulator_state is not None:
+        with emulator_state.lock:
+            summary["bot_api"] = {
+                "messages_sent": sum(1 for m in emulator_state.messages if m["method"] == "sendMessage"),
+                "messages_edited": sum(1 for m in emulator_state.messages if m["method"] == "editMessageText"),
+                "requests": {k: v for k, v in emulator_state.stats.items() if k.startswith("telegram_")},
+            }
+            summary["upstream_requests"] = {k: v for k, v in emulator_state.stats.items()
+                                            if k.endswith("_requests") and not k.startswith("telegram")}
+    return summary
+
+
+def print_summary(summary):
+    print(f"updates:          {summary['updates']} in {summary['elapsed_s']} s")
+    print(f"throughput:       {summary['throughput_per_s']} updates/s")
+    print(f"error rate:       {summary['error_rate']:.2%}")
+    print(f"duplicates:       {summary['duplicates_dropped']} dropped")
+    latency, service = summary["latency"], summary["service"]
+    print(f"latency:          p50 {latency['p50_ms']} ms  p95 {latency['p95_ms']} ms  p99 {latency['p99_ms']} ms  max {latency['max_ms']} ms")
+    print(f"service time:     p50 {service['p50_ms']} ms  p95 {service['p95_ms']} ms  p99 {service['p99_ms']} ms")
+    print(f"peak RSS:         {summary['peak_rss_mb']} MB")
+    if "bot_api" in summary:
+        print(f"bot API:          {summary['bot_api']['messages_sent']} sent, {summary['bot_api']['messages_edited']} edited")
+    print(f"\n{'kind':<26}{'count':>7}{'errors':>8}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for kind, stats in summary["by_kind"].items():
+        print(f"{kind:<26}{stats['count']:>7}{stats['errors']:>8}{stats['p50_ms']:>8}ms{stats['p95_ms']:>8}ms{stats['p99_ms']:>8}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["webhook", "http"], default="webhook")
+    parser.add_argument("--url", help="webhook URL for --target http")
+    parser.add_argument("--pid", type=int, help="server pid for peak RSS with --target http")
+    parser.add_argument("--concurrency", type=int, default=16, help="in-flight requests for --target http")
+    parser.add_argument("--rate", type=float, default=10.0, help="steady updates per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of traffic")
+    parser.add_argument("--chats", type=int, default=500)
+    parser.add_argument("--duplicate-rate", type=float, default=0.02, help="share of redelivered updates")
+    parser.add_argument("--burst-at", type=float, action="append", default=[], help="session start burst offset (s)")
+    parser.add_argument("--burst-factor", type=float, default=5.0)
+    parser.add_argument("--burst-duration", type=float, default=5.0)
+    parser.add_argument("--upstream-latency", type=float, default=0.0, help="emulator latency in ms")
+    parser.add_argument("--upstream-jitter", type=float, default=0.0)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--upstream-429-rate", type=float, default=0.0)
+    parser.add_argument("--no-emulator", action="store_true", help="use upstreams already configured in the environment")
+    parser.add_argument("--seed", type=int, default=2026)
+    parser.add_argument("--output", help="write the summary as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep the bot's INFO logging")
+    args = parser.parse_args()
+
+    emulator_state = None
+    if not args.no_emulator:
+        server, base_url = emulator.start_emulator(
+            latency_ms=args.upstream_latency, jitter_ms=args.upstream_jitter,
+            error_rate=args.upstream_error_rate, rate_limit_rate=args.upstream_429_rate, seed=args.seed,
+        )
+        emulator_state = server.RequestHandlerClass.state
+        os.environ.update(emulator.environment(base_url))
+        print(f"Emulator on {base_url}")
+
+    if args.target == "webhook":
+        # Isolated state for the run; set before the bot modules are imported
+        state_dir = tempfile.mkdtemp(prefix="f1-load-")
+        for name in ("ARCHIVE", "WEATHER", "PREFS", "BROADCAST"):
+            os.environ[f"F1_{name}_PATH"] = os.path.join(state_dir, f"{name.lower()}.sqlite3")
+        os.environ.setdefault("TELEGRAM_BOT_TOKEN", TOKEN)
+        target = InProcessTarget()
+        if not args.verbose:
+            logging.disable(logging.INFO)
+    else:
+        if not args.url:
+            parser.error("--target http needs --url")
+        target = HttpTarget(args.url, args.concurrency, args.pid)
+
+    schedule = build_schedule(args)
+    print(f"Driving {len(schedule)} updates at {args.rate:g}/s for {args.duration:g}s "
+          f"({'bursts at ' + ', '.join(f'{b:g}s' for b in args.burst_at) if args.burst_at else 'no bursts'})\n")
+    results, elapsed = run(target, schedule)
+    summary = summarize(results, elapsed, target, emulator_state)
+    print_summary(summary)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "summary": summary}, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Admin gate for diagnostic endpoints
+Requests must present F1_ADMIN_TOKEN as an X-Admin-Token header or a
+?token= query parameter. With no token configured the endpoints stay closed.
+Scheduled jobs may instead present CRON_SECRET as "Authorization: Bearer",
+which is what Vercel Cron sends.
+"""
+
+import os
+import hmac
+
+ADMIN_TOKEN = os.getenv("F1_ADMIN_TOKEN", "")
+CRON_SECRET = os.getenv("CRON_SECRET", "")
+
+
+def _headers(event):
+    return {name.lower(): value for name, value in ((event or {}).get("headers") or {}).items()}
+
+
+def is_admin_request(event):
+    if not ADMIN_TOKEN:
+        return False
+    headers = _headers(event)
+    params = (event or {}).get("queryStringParameters") or {}
+    supplied = headers.get("x-admin-token") or params.get("token") or ""
+    return hmac.compare_digest(supplied.encode(), ADMIN_TOKEN.encode())
+
+
+def is_cron_request(event):
+    """Admin requests, or a cron job presenting CRON_SECRET as a bearer token"""
+    if is_admin_request(event):
+        return True
+    if not CRON_SECRET:
+        return False
+    supplied = _headers(event).get("authorization") or ""
+    return hmac.compare_digest(supplied.encode(), f"Bearer {CRON_SECRET}".encode())
@@ -0,0 +1,141 @@
+"""
+Append-only archive of completed F1 session results
+Final classification and driver metadata keyed by OpenF1 session_key (SQLite)
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_PATH = os.getenv("F1_ARCHIVE_PATH", "/tmp/f1_session_archive.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_key INTEGER PRIMARY KEY,
+    session_type TEXT,
+    session_name TEXT,
+    meeting_name TEXT,
+    country_name TEXT,
+    date_start TEXT,
+    date_end TEXT,
+    classification TEXT NOT NULL,
+    drivers TEXT NOT NULL,
+    archived_at REAL NOT NULL
+)
+"""
+
+_COLUMNS = (
+    "session_key", "session_type", "session_name", "meeting_name",
+    "country_name", "date_start", "date_end", "classification", "drivers",
+)
+
+_LOCK = threading.Lock()
+_CONNECTION = None
+# session_key -> record; archived sessions never change, so reads are memoized forever
+_MEMO = {}
+
+
+def _connect():
+    global _CONNECTION
+    if _CONNECTION is None:
+        directory = os.path.dirname(ARCHIVE_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _CONNECTION = sqlite3.connect(ARCHIVE_PATH, check_same_thread=False)
+        _CONNECTION.execute(_SCHEMA)
+        _CONNECTION.commit()
+    return _CONNECTION
+
+
+def _row_to_record(row):
+    record = dict(zip(_COLUMNS, row))
+    record["classification"] = json.loads(record["classification"])
+    record["drivers"] = json.loads(record["drivers"])
+    return record
+
+
+def get_archived_session(session_key):
+    """Return the archived record for a session, or None if not archived yet"""
+    if session_key is None:
+        return None
+    record = _MEMO.get(session_key)
+    if record is not None:
+        return record
+    try:
+        with _LOCK:
+            row = _connect().execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM sessions WHERE session_key = ?",
+                (session_key,),
+            ).fetchone()
+    except sqlite3.Error as e:
+        logger.error(f"Error reading session archive: {e}")
+        return None
+    if row is None:
+        return None
+    record = _row_to_record(row)
+    _MEMO[session_key] = record
+    return record
+
+
+def archive_session(session, classification, drivers):
+    """Store a completed session's final classification (first write wins)
+
+    classification: list of {"driver_number", "position"} sorted by position
+    drivers: list of {"driver_number", "name", "country", "team"}
+    """
+    session_key = session.get("session_key")
+    if session_key is None or not classification:
+        return None
+    record = {
+        "session_key": session_key,
+        "session_type": session.get("session_type"),
+        "session_name": session.get("session_name"),
+        "meeting_name": session.get("meeting_name"),
+        "country_name": session.get("country_name"),
+        "date_start": session.get("date_start"),
+        "date_end": session.get("date_end"),
+        "classification": classification,
+        "drivers": drivers,
+    }
+    values = [record[column] for column in _COLUMNS]
+    values[-2] = json.dumps(classification, separators=(",", ":"))
+    values[-1] = json.dumps(drivers, separators=(",", ":"))
+    try:
+        with _LOCK:
+            connection = _connect()
+            connection.execute(
+                f"INSERT OR IGNORE INTO sessions ({', '.join(_COLUMNS)}, archived_at) "
+                f"VALUES ({', '.join('?' * len(_COLUMNS))}, ?)",
+                values + [datetime.now(ZoneInfo("UTC")).timestamp()],
+            )
+            connection.commit()
+    except sqlite3.Error as e:
+        logger.error(f"Error writing session archive: {e}")
+        return record
+    logger.info(f"Archived session {session_key} ({record['meeting_name']} {record['session_type']})")
+    # Re-read so a concurrent first writer's record wins consistently
+    return get_archived_session(session_key) or record
+
+
+def list_archived_sessions(limit=50, offset=0):
+    """Most recent archived sessions (without classification) for historical lookups"""
+    try:
+        with _LOCK:
+            rows = _connect().execute(
+                "SELECT session_key, session_type, meeting_name, country_name, date_start "
+                "FROM sessions ORDER BY date_start DESC LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+    except sqlite3.Error as e:
+        logger.error(f"Error listing session archive: {e}")
+        return []
+    return [
+        dict(zip(("session_key", "session_type", "meeting_name", "country_name", "date_start"), row))
+        for row in rows
+    ]
@@ -6,7 +6,6 @@ Enhanced version with live timing functionality
 import os
 import sys
 import asyncio
-import requests
 import json
 import logging
 import random
@@ -55,6 +54,58 @@ logger = logging.getLogger(__name__)
 # Configure HTTP client with increased connection pool size
 import httpx
 
+# Upstream GET with retries/backoff, optional hedging (OpenF1 calls) and
+# conditional revalidation of cached bodies (Jolpica refreshes)
+from f1_http import http_get, conditional_get_json, stream_json_array, iter_json_array, parse_json, JOLPICA_URL, OPENF1_URL
+
+# Permanent local archive of completed session classifications
+from f1_archive import get_archived_session, archive_session, list_archived_sessions
+
+# Session results are archived once this long has passed since the session ended
+ARCHIVE_SETTLE_DELAY = timedelta(hours=1)
+
+# Cache expiries derived from the race calendar
+from f1_ttl import get_ttl, update_ttl_calendar
+
+# Per-circuit, per-weekend forecasts refreshed by the prefetch scheduler
+from f1_weather import resolve_coordinates, get_weekend_forecast
+
+# Per-chat timezone preference; schedules are parsed once and rendered per timezone
+from f1_calendar import race_sessions
+from f1_timezones import (
+    DEFAULT_TIMEZONE,
+    SessionSchedule,
+    get_zone,
+    display_name,
+    resolve_timezone,
+    get_chat_timezone,
+    set_chat_timezone,
+)
+
+# Opt-in session reminder / results notifications
+from f1_broadcast import subscribe, unsubscribe, get_chat_topics, TOPICS
+
+# Callback buttons edit to a placeholder at once and render in the background
+from f1_render import deferred_edit
+
+# Callback data -> handler registry for button_handler
+from f1_router import CallbackRouter
+
+# Cache entries shared between workers/instances; one process refills at a time
+from f1_store import shared_get, shared_set, single_flight
+
+# Cache hit/miss accounting for /metrics
+from f1_metrics import CACHE_LOOKUPS
+
+# Per-update spans (cache lookups, fetch-and-render stages)
+from f1_trace import span, traced
+
+# Parsing and large payload reductions run here instead of on the loop
+from f1_executor import executor_kind, call_cpu
+
+# Shared copies outlive their TTL so expired data stays available for revalidation
+SHARED_CACHE_RETENTION = 7 * 86400
+
 # Azerbaijani translations (simplified)
 TRANSLATIONS = {
     "welcome_title": "🏎️ F1 Canlı Botuna Xoş Gəlmisiniz!",
@@ -89,12 +140,19 @@ TRANSLATIONS = {
     "qualifying": "Təsnifat",
     "race": "Yarış",
     "all_times_baku": "_Bütün vaxtlar Bakı vaxtı ilə_",
+    "all_times_tz": "_Bütün vaxtlar {} vaxtı ilə_",
+    "timezone_current": "🕐 Saat qurşağınız: *{}*\n\nDəyişmək üçün: /timezone Europe/London və ya /timezone Istanbul",
+    "timezone_set": "✅ Saat qurşağı təyin edildi: *{}*",
+    "timezone_invalid": "❌ Naməlum saat qurşağı: {}\n\nNümunə: /timezone Europe/London və ya /timezone Istanbul",
+    "timezone_save_failed": "❌ Saat qurşağı yadda saxlanıla bilmədi. Zəhmət olmasa, bir az sonra yenidən cəhd edin.",
     "season_completed": "🏁 Mövsüm tamamlandı! Bu il üçün daha yarış yoxdur.",
     "weather_forecast": "🌤️ Hava Proqnozu üçün {}",
+    "thursday": "Cümə axşamı",
     "friday": "Cümə",
     "saturday": "Şənbə",
     "sunday": "Bazar",
     "race_day": "Bazar (Yarış)",
+    "session_weather": "🕐 *Sessiyalar zamanı:*",
     "weather_unavailable": "🌦️ Bu yer üçün hava məlumatları mövcud deyil.",
     "no_live_data": "❌ Canlı vaxt məlumatları mövcud deyil\n\nSon nəticələr üçün /lastrace istifadə edin",
     "live_not_available": "❌ Canlı vaxt mövcud deyil\n\nSon nəticələr üçün /lastrace istifadə edin",
@@ -125,6 +183,25 @@ TRANSLATIONS = {
     "live_positions_loading": "⏳ Mövqe məlumatları yüklənir...",
     "live_data_source": "ℹ️ *Mənbə:* OpenF1 API",
     "live_refresh_button": "🔄 Yenilə",
+    "live_subscribe_button": "🔔 Avtomatik yenilə",
+    "live_unsubscribe_button": "🔕 Avtomatik yeniləməni dayandır",
+    "live_subscribed": "🔔 Canlı vaxt bu mesajda avtomatik yenilənəcək...",
+    "live_subscription_stopped": "🔕 Avtomatik yeniləmə dayandırıldı.",
+    "live_subscription_ended": "🏁 Sessiya bitdi - avtomatik yeniləmə dayandırıldı.",
+    "live_subscription_idle": "⏸️ Aktivlik olmadığı üçün avtomatik yeniləmə dayandırıldı. Yenidən başlamaq üçün: /live subscribe",
+    "live_not_subscribed": "ℹ️ Avtomatik yeniləmə aktiv deyil.",
+    "notify_session_reminder": "⏰ *{}* - {} tezliklə başlayır!\n🕐 {} (Bakı vaxtı)\n\n🔴 Canlı vaxt: /live",
+    "notify_results": "🔔 *Yeni nəticələr*\n\n{}",
+    "topic_reminders": "sessiya xatırlatmaları",
+    "topic_results": "nəticələr",
+    "subscribe_done": "🔔 Bildirişlər aktivdir: {}\n\nDayandırmaq üçün: /unsubscribe",
+    "unsubscribe_done": "🔕 Bildirişlər dayandırıldı: {}",
+    "not_subscribed": "ℹ️ Heç bir bildirişə abunə deyilsiniz. Abunə olmaq üçün: /subscribe",
+    "subscribe_usage": "ℹ️ İstifadə: /subscribe [reminders|results] və ya /unsubscribe [reminders|results]",
+    "back_to_menu_button": "🏠 Ana Menyuya Qayıt",
+    "archive_button": "📚 Əvvəlki sessiyalar",
+    "archive_title": "📚 *Arxivlənmiş sessiyalar* (səhifə {})",
+    "archive_empty": "❌ Arxivdə hələ sessiya yoxdur.",
     "live_positions_header": "📊 *Cari Mövqelər:*",
     "live_session_location": "📍 *Məkan:*",
     "live_session_time": "🕐 *Başlama vaxtı:*",
@@ -252,6 +329,10 @@ def get_driver_data(season=None):
                 logger.warning(f"WARNING: Early {now.year} - using {season} data. Verify if {now.year} season data is available in API")
 
     cache_key = f"drivers_{season}"
+    if cache_key not in DRIVER_DATA_CACHE:
+        shared = shared_get(f"data:{cache_key}")
+        if shared:
+            DRIVER_DATA_CACHE[cache_key] = shared
     if cache_key in DRIVER_DATA_CACHE:
         cached = DRIVER_DATA_CACHE[cache_key]
         if cached.get('timestamp') and (datetime.now(ZoneInfo("UTC")).timestamp() - cached['timestamp']) < 86400:  # 24 hours
@@ -259,11 +340,15 @@ def get_driver_data(season=None):
 
     try:
         logger.info(f"Fetching driver data for season {season}")
-        url = f"https://api.jolpi.ca/ergast/f1/{season}/drivers.json"
-        response = requests.get(url, timeout=30)
+        url = f"{JOLPICA_URL}/ergast/f1/{season}/drivers.json"
+        data, changed = conditional_get_json(url, timeout=30)
 
-        if response.status_code == 200:
-            data = response.json()
+        if not changed and cache_key in DRIVER_DATA_CACHE:
+            # 304 - driver list unchanged, just extend the cache lifetime
+            DRIVER_DATA_CACHE[cache_key]['timestamp'] = datetime.now(ZoneInfo("UTC")).timestamp()
+            return DRIVER_DATA_CACHE[cache_key]['data']
+
+        if data is not None:
             drivers = {}
 
             driver_list = data.get("MRData", {}).get("DriverTable", {}).get("Drivers", [])
@@ -287,10 +372,11 @@ def get_driver_data(season=None):
                 'data': drivers,
                 'timestamp': datetime.now(ZoneInfo("UTC")).timestamp()
             }
+            shared_set(f"data:{cache_key}", DRIVER_DATA_CACHE[cache_key], SHARED_CACHE_RETENTION)
 
             return drivers
         else:
-            logger.error(f"Failed to fetch driver data: {response.status_code}")
+            logger.error(f"Failed to fetch driver data from {url}")
             return {}
 
     except Exception as e:
@@ -307,6 +393,10 @@ def get_constructor_data(season=None):
         logger.info(f"get_constructor_data: Calculated season = {season} (month={now.month}, year={now.year})")
 
     cache_key = f"constructors_{season}"
+    if cache_key not in CONSTRUCTOR_DATA_CACHE:
+        shared = shared_get(f"data:{cache_key}")
+        if shared:
+            CONSTRUCTOR_DATA_CACHE[cache_key] = shared
     if cache_key in CONSTRUCTOR_DATA_CACHE:
         cached = CONSTRUCTOR_DATA_CACHE[cache_key]
         if cached.get('timestamp') and (datetime.now(ZoneInfo("UTC")).timestamp() - cached['timestamp']) < 86400:  # 24 hours
@@ -314,11 +404,15 @@ def get_constructor_data(season=None):
 
     try:
         logger.info(f"Fetching constructor data for season {season}")
-        url = f"https://api.jolpi.ca/ergast/f1/{season}/constructors.json"
-        response = requests.get(url, timeout=30)
+        url = f"{JOLPICA_URL}/ergast/f1/{season}/constructors.json"
+        data, changed = conditional_get_json(url, timeout=30)
+
+        if not changed and cache_key in CONSTRUCTOR_DATA_CACHE:
+            # 304 - constructor list unchanged, just extend the cache lifetime
+            CONSTRUCTOR_DATA_CACHE[cache_key]['timestamp'] = datetime.now(ZoneInfo("UTC")).timestamp()
+            return CONSTRUCTOR_DATA_CACHE[cache_key]['data']
 
-        if response.status_code == 200:
-            data = response.json()
+        if data is not None:
             constructors = {}
 
             constructor_list = data.get("MRData", {}).get("ConstructorTable", {}).get("Constructors", [])
@@ -337,10 +431,11 @@ def get_constructor_data(season=None):
                 'data': constructors,
                 'timestamp': datetime.now(ZoneInfo("UTC")).timestamp()
             }
+            shared_set(f"data:{cache_key}", CONSTRUCTOR_DATA_CACHE[cache_key], SHARED_CACHE_RETENTION)
 
             return constructors
         else:
-            logger.error(f"Failed to fetch constructor data: {response.status_code}")
+            logger.error(f"Failed to fetch constructor data from {url}")
             return {}
 
     except Exception as e:
@@ -369,61 +464,6 @@ def get_constructor_name_by_id(constructor_id, season=None):
     constructor = constructors.get(constructor_id, {})
     return constructor.get('name', constructor_id)
 
-# Comprehensive F1 circuit coordinates for weather API
-CIRCUIT_COORDS = {
-    # Current F1 Circuits (2024-2025) - Official names
-    "Bahrain International Circuit": (26.0325, 50.5106),
-    "Jeddah Corniche Circuit": (21.6319, 39.1044),
-    "Albert Park Circuit": (-37.8497, 144.9680),
-    "Suzuka Circuit": (34.8431, 136.5410),
-    "Shanghai International Circuit": (31.3389, 121.2197),
-    "Miami International Autodrome": (25.9581, -80.2389),
-    "Autodromo Enzo e Dino Ferrari": (44.3439, 11.7167),
-    "Circuit de Monaco": (43.7347, 7.4206),
-    "Circuit de Barcelona-Catalunya": (41.5699, 2.2570),
-    "Circuit Gilles Villeneuve": (45.5000, -73.5228),
-    "Red Bull Ring": (47.2197, 14.7647),
-    "Silverstone Circuit": (52.0720, -1.0170),
-    "Hungaroring": (47.5789, 19.2486),
-    "Circuit de Spa-Francorchamps": (50.4372, 5.9714),
-    "Circuit Zandvoort": (52.3888, 4.5409),
-    "Autodromo Nazionale di Monza": (45.6190, 9.2816),
-    "Marina Bay Street Circuit": (1.2914, 103.8632),
-    "Baku City Circuit": (40.4093, 49.8671),
-    "Circuit of the Americas": (30.1328, -97.6411),
-    "Autodromo Hermanos Rodriguez": (19.4042, -99.0907),
-    "Autodromo Jose Carlos Pace": (-23.7036, -46.6997),
-    "Las Vegas Street Circuit": (36.1147, -115.1739),
-    "Lusail International Circuit": (25.4888, 51.4543),
-    "Yas Marina Circuit": (24.4672, 54.6031),
-    # Alternative/common names for matching
-    "Sakhir": (26.0325, 50.5106),
-    "Jeddah": (21.6319, 39.1044),
-    "Melbourne": (-37.8497, 144.9680),
-    "Suzuka": (34.8431, 136.5410),
-    "Shanghai": (31.3389, 121.2197),
-    "Miami": (25.9581, -80.2389),
-    "Imola": (44.3439, 11.7167),
-    "Monaco": (43.7347, 7.4206),
-    "Barcelona": (41.5699, 2.2570),
-    "Montreal": (45.5000, -73.5228),
-    "Spielberg": (47.2197, 14.7647),
-    "Silverstone": (52.0720, -1.0170),
-    "Budapest": (47.5789, 19.2486),
-    "Spa": (50.4372, 5.9714),
-    "Zandvoort": (52.3888, 4.5409),
-    "Monza": (45.6190, 9.2816),
-    "Singapore": (1.2914, 103.8632),
-    "Baku": (40.4093, 49.8671),
-    "Austin": (30.1328, -97.6411),
-    "Mexico City": (19.4042, -99.0907),
-    "Sao Paulo": (-23.7036, -46.6997),
-    "Interlagos": (-23.7036, -46.6997),
-    "Las Vegas": (36.1147, -115.1739),
-    "Lusail": (25.4888, 51.4543),
-    "Abu Dhabi": (24.4672, 54.6031),
-}
-
 
 def get_country_flag(nationality):
     """Get flag emoji for a nationality"""
@@ -457,13 +497,12 @@ def get_country_flag(nationality):
     return "🏳️"
 
 
-def to_baku(d, t):
-    """Convert UTC time to Baku time"""
+def to_timezone(d, t, timezone=DEFAULT_TIMEZONE):
+    """Convert UTC date + time strings to local time in `timezone`"""
     if not t or t == "TBA":
         return f"{d} (TBA)"
     try:
         # strip trailing Z if present
-        tzinfo = ZoneInfo("UTC")
         if t.endswith("Z"):
             t2 = t[:-1]
         else:
@@ -471,43 +510,65 @@ def to_baku(d, t):
         dt = datetime.fromisoformat(d + "T" + t2)
         # assume dt is UTC if naive
         if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=tzinfo)
-        baku = dt.astimezone(ZoneInfo("Asia/Baku"))
-        date_str = baku.strftime("%d %b")
-        time_str = baku.strftime("%H:%M")
+            dt = dt.replace(tzinfo=get_zone("UTC"))
+        local = dt.astimezone(get_zone(timezone))
+        date_str = local.strftime("%d %b")
+        time_str = local.strftime("%H:%M")
         return f"{date_str} {time_str}"
     except Exception:
         return f"{d} {t}"
 
 
+def to_baku(d, t):
+    """Convert UTC time to Baku time"""
+    return to_timezone(d, t, DEFAULT_TIMEZONE)
+
+
 def get_circuit_coordinates(location_name):
-    """Get coordinates for a circuit with fuzzy matching"""
-    # Direct match first
-    if location_name in CIRCUIT_COORDS:
-        return CIRCUIT_COORDS[location_name]
-
-    # Fuzzy matching for partial names
-    location_lower = location_name.lower()
-    for circuit_name, coords in CIRCUIT_COORDS.items():
-        if (
-            location_lower in circuit_name.lower()
-            or circuit_name.lower() in location_lower
-        ):
-            return coords
-
-    # Geocoding fallback
+    """Get coordinates for a circuit (table lookup, then memoized geocoding)"""
+    return resolve_coordinates(location_name)
+
+
+def _weekday_label(date):
+    """Translated weekday name for an ISO date (falls back to the date)"""
+    labels = {3: "thursday", 4: "friday", 5: "saturday", 6: "sunday"}
     try:
-        geo_url = f"https://geocoding-api.open-meteo.com/v1/search?name={location_name}&count=1"
-        response = requests.get(geo_url, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get("results"):
-                result = data["results"][0]
-                return (result["latitude"], result["longitude"])
-    except Exception:
-        pass
+        return TRANSLATIONS[labels[datetime.fromisoformat(date).weekday()]]
+    except (KeyError, ValueError):
+        return date
 
-    return None
+
+def _rain_icon(rain):
+    return "🌧️" if rain >= 60 else "⛅" if rain >= 30 else "☀️"
+
+
+@traced("render:weekend_weather")
+def format_weekend_weather(forecast, timezone=DEFAULT_TIMEZONE):
+    """Daily and per-session weather lines for the next-race message"""
+    if not forecast:
+        return ""
+    weather_message = "\n🌤️ *Hava proqnozu:*\n"
+    for day in forecast["days"]:
+        if day["temp_max"] is None:
+            continue
+        rain = day["rain"] or 0
+        wind = day["wind"] or 0
+        weather_message += f"{_weekday_label(day['date'])}: {day['temp_max']:.1f}°C {_rain_icon(rain)} {int(rain)}% 💨{wind:.1f}km/h\n"
+
+    session_lines = ""
+    for session in forecast["sessions"]:
+        if session["temp"] is None:
+            continue
+        rain = session["rain"] or 0
+        local_time = session["start"].astimezone(get_zone(timezone)).strftime("%H:%M")
+        session_lines += f"{TRANSLATIONS.get(session['name'], session['key'])} ({local_time}): {session['temp']:.0f}°C {_rain_icon(rain)} {int(rain)}%\n"
+    if session_lines:
+        weather_message += f"\n{TRANSLATIONS['session_weather']}\n{session_lines}"
+    return weather_message
+
+
+# How long a cached "session is active" may stand in for OpenF1 while it is failing (seconds)
+ACTIVE_SESSION_GRACE = 600
 
 
 def check_active_f1_session():
@@ -528,17 +589,31 @@ def check_active_f1_session():
             years_to_check.append(current_year + 1)
 
         sessions = []
+        fetch_failed = False
         for year in years_to_check:
             try:
-                sessions_url = f"https://api.openf1.org/v1/sessions?year={year}"
-                sessions_response = requests.get(sessions_url, timeout=10)
+                sessions_url = f"{OPENF1_URL}/v1/sessions?year={year}"
+                sessions_response = http_get(sessions_url, timeout=10, hedge=True)
                 if sessions_response.status_code == 200:
-                    sessions.extend(sessions_response.json())
+                    sessions.extend(parse_json(sessions_response))
+                else:
+                    fetch_failed = True
             except Exception as e:
                 logger.error(f"Error fetching sessions for year {year}: {e}")
+                fetch_failed = True
                 continue
 
         if not sessions:
+            if fetch_failed:
+                # OpenF1 is failing even after retries - keep a recent "active" answer
+                # instead of telling users there is no session, but not one from a past session
+                entry = CACHE["active_session"]
+                age = now.timestamp() - (entry["timestamp"] or 0)
+                if entry["data"] and age < ACTIVE_SESSION_GRACE:
+                    logger.warning(f"OpenF1 unavailable, reusing active session state from {age:.0f}s ago")
+                    return True
+                logger.warning("OpenF1 unavailable and no recent active session state")
+                return False
             logger.warning("No sessions found")
             set_cached_data("active_session", False)
             return False
@@ -602,6 +677,8 @@ def check_active_f1_session():
         return False
 
 
+@traced("standings")
+@single_flight("fill:standings", ready=lambda: _lookup_cached_data("standings") is not None)
 def get_current_standings():
     """Get current F1 driver standings with caching"""
     try:
@@ -616,15 +693,15 @@ def get_current_standings():
 
         # Try multiple APIs with better error handling
         apis = [
-            f"https://api.jolpi.ca/ergast/f1/{season}/driverStandings.json",
+            f"{JOLPICA_URL}/ergast/f1/{season}/driverStandings.json",
         ]
 
         data = None
+        changed = True
         for api_url in apis:
             try:
-                response = requests.get(api_url, timeout=30)
-                if response.status_code == 200:
-                    data = response.json()
+                data, changed = conditional_get_json(api_url, timeout=30)
+                if data is not None:
                     break
             except Exception as e:
                 logger.error(f"Error fetching standings from {api_url}: {e}")
@@ -633,6 +710,12 @@ def get_current_standings():
         if not data:
             return TRANSLATIONS["api_unavailable"]
 
+        # 304 - standings unchanged since the cached message was rendered
+        stale = get_stale_cached_data("standings")
+        if not changed and stale:
+            touch_cached_data("standings")
+            return stale
+
         try:
             standings_list = (
                 data.get("MRData", {})
@@ -679,6 +762,8 @@ def get_current_standings():
         return TRANSLATIONS["service_unavailable"]
 
 
+@traced("constructor_standings")
+@single_flight("fill:constructor_standings", ready=lambda: _lookup_cached_data("constructor_standings") is not None)
 def get_constructor_standings():
     """Get constructor standings with caching"""
     try:
@@ -693,15 +778,15 @@ def get_constructor_standings():
 
         # Try multiple APIs
         apis = [
-            f"https://api.jolpi.ca/ergast/f1/{season}/constructorStandings.json",
+            f"{JOLPICA_URL}/ergast/f1/{season}/constructorStandings.json",
         ]
 
         data = None
+        changed = True
         for api_url in apis:
             try:
-                response = requests.get(api_url, timeout=30)
-                if response.status_code == 200:
-                    data = response.json()
+                data, changed = conditional_get_json(api_url, timeout=30)
+                if data is not None:
                     break
             except Exception as e:
                 logger.error(
@@ -712,6 +797,12 @@ def get_constructor_standings():
         if not data:
             return TRANSLATIONS["api_unavailable"]
 
+        # 304 - standings unchanged since the cached message was rendered
+        stale = get_stale_cached_data("constructor_standings")
+        if not changed and stale:
+            touch_cached_data("constructor_standings")
+            return stale
+
         try:
             standings_list = (
                 data.get("MRData", {})
@@ -786,6 +877,192 @@ def get_constructor_standings():
         return TRANSLATIONS["service_unavailable"]
 
 
+def reduce_latest_positions(rows):
+    """Reduce OpenF1 /position rows to the newest position per driver
+
+    Works on any iterable, so a streamed payload never needs more memory than
+    one entry per driver.
+    """
+    latest = {}
+    for pos_entry in rows:
+        driver_number = pos_entry.get("driver_number")
+        position = pos_entry.get("position")
+        date = pos_entry.get("date")
+
+        if driver_number and position and date:
+            current = latest.get(driver_number)
+            if current is None or date > current["date"]:
+                latest[driver_number] = {
+                    "position": position,
+                    "date": date,
+                }
+    return latest
+
+
+def reduce_position_payload(body):
+    """reduce_latest_positions over a raw /position response body (runs in the CPU stage)"""
+    return reduce_latest_positions(iter_json_array([body]))
+
+
+def fetch_latest_positions(url, hedge=False):
+    """Newest position per driver from an OpenF1 /position feed; None if the fetch failed
+
+    Call off the loop. With a process pool CPU stage the body is reduced there
+    (bytes in, one entry per driver out) instead of being decoded under this
+    process's GIL; otherwise it is streamed and reduced in place.
+    """
+    if executor_kind() == "process":
+        response = http_get(url, timeout=10, hedge=hedge)
+        if response.status_code != 200:
+            return None
+        return call_cpu(reduce_position_payload, response.content)
+    rows = stream_json_array(url, timeout=10, hedge=hedge)
+    if rows is None:
+        return None
+    return reduce_latest_positions(rows)
+
+
+def fetch_session_classification(session):
+    """Fetch final positions and drivers for a session from OpenF1
+
+    Returns (record, error_message). The record is archived permanently once
+    the session has finished and its classification has settled.
+    """
+    session_key = session.get("session_key")
+    session_type = session.get("session_type", "")
+
+    # Get positions (only the newest row per driver is kept)
+    results_url = f"{OPENF1_URL}/v1/position?session_key={session_key}"
+    final_positions = fetch_latest_positions(results_url)
+    if final_positions is None:
+        return None, TRANSLATIONS["no_results"].format(session_type)
+
+    if not final_positions:
+        return None, TRANSLATIONS["no_position_data"].format(session_type)
+
+    # Get driver info from OpenF1 API first, then fallback to Ergast
+    drivers_url = f"{OPENF1_URL}/v1/drivers?session_key={session_key}"
+    drivers_response = http_get(drivers_url, timeout=10)
+    drivers = []
+    if drivers_response.status_code == 200:
+        for driver in parse_json(drivers_response):
+            driver_number = driver.get("driver_number")
+            if driver_number:
+                driver_name = f"{driver.get('first_name', '')} {driver.get('last_name', '')}".strip()
+                country_code = driver.get("country_code") or get_driver_nationality_by_number(driver_number)
+
+                drivers.append({
+                    "driver_number": driver_number,
+                    "name": driver_name or get_driver_name_by_number(driver_number),
+                    "country": country_code,
+                    "team": driver.get("team_name", ""),
+                })
+
+    sorted_positions = sorted(
+        final_positions.items(), key=lambda x: x[1]["position"]
+    )
+    classification = [
+        {"driver_number": driver_number, "position": pos_data["position"]}
+        for driver_number, pos_data in sorted_positions
+    ]
+    record = {
+        "session_key": session_key,
+        "session_type": session_type,
+        "session_name": session.get("session_name"),
+        "meeting_name": session.get("meeting_name"),
+        "country_name": session.get("country_name"),
+        "date_start": session.get("date_start"),
+        "date_end": session.get("date_end"),
+        "classification": classification,
+        "drivers": drivers,
+    }
+
+    if is_session_settled(session) and drivers_response.status_code == 200:
+        record = archive_session(session, classification, drivers) or record
+
+    return record, None
+
+
+def is_session_settled(session):
+    """A session's classification is final some time after it has ended"""
+    session_end = session.get("date_end")
+    if not session_end:
+        return False
+    try:
+        end_dt = datetime.fromisoformat(session_end.replace("Z", "+00:00"))
+        if end_dt.tzinfo is None:
+            end_dt = end_dt.replace(tzinfo=ZoneInfo("UTC"))
+    except (ValueError, TypeError):
+        return False
+    return datetime.now(ZoneInfo("UTC")) - end_dt >= ARCHIVE_SETTLE_DELAY
+
+
+@traced("render:session_results")
+def format_session_results(record):
+    """Render a session classification record into a Telegram message"""
+    session_type = record.get("session_type") or ""
+    meeting_name = record.get("meeting_name") or "Grand Prix"
+    flag = get_country_flag(record.get("country_name") or "")
+
+    classification = record.get("classification") or []
+    if not classification:
+        return TRANSLATIONS["no_final_positions"].format(session_type)
+
+    drivers_info = {
+        driver["driver_number"]: driver for driver in record.get("drivers") or []
+    }
+
+    emoji = (
+        "🏁"
+        if session_type == "Sprint"
+        else "⏱️" if session_type == "Qualifying" else "🏆"
+    )
+    session_type_az = TRANSLATIONS.get(session_type.lower(), session_type)
+    message = f"{emoji} {flag} *{meeting_name} {session_type_az}*\n\n"
+
+    for entry in classification[:20]:
+        driver_number = entry["driver_number"]
+        position = entry["position"]
+        driver_info = drivers_info.get(driver_number, {})
+        driver_name = driver_info.get("name", f"Driver {driver_number}")
+        driver_country = driver_info.get("country", "")
+        driver_flag = get_country_flag(driver_country)
+        team_name = driver_info.get("team", "")
+
+        line = f"{position}. {driver_flag} {driver_name}"
+
+        if session_type in ["Race", "Sprint"] and team_name:
+            line += f" ({team_name})"
+
+        if position == 1:
+            line += f" - {TRANSLATIONS['winner']}"
+
+        message += line + "\n"
+
+    return message
+
+
+def get_session_results(session_key):
+    """Historical lookup of any session's results by OpenF1 session_key"""
+    try:
+        record = get_archived_session(session_key)
+        if record is None:
+            sessions_url = f"{OPENF1_URL}/v1/sessions?session_key={session_key}"
+            sessions_response = http_get(sessions_url, timeout=10)
+            sessions = parse_json(sessions_response) if sessions_response.status_code == 200 else None
+            if not sessions:
+                return TRANSLATIONS["no_sessions"]
+            record, error = fetch_session_classification(sessions[0])
+            if record is None:
+                return error
+        return format_session_results(record)
+    except Exception as e:
+        logger.error(f"Error in get_session_results: {e}")
+        return TRANSLATIONS["error_fetching_session"].format(str(e))
+
+
+@traced("last_session")
+@single_flight("fill:last_session", ready=lambda: _lookup_cached_data("last_session") is not None)
 def get_last_session_results():
     """Get last session results using OpenF1 API with enhanced data and caching"""
     try:
@@ -802,13 +1079,14 @@ def get_last_session_results():
         if now.month <= 3:
             years_to_check.insert(0, current_year - 1)
 
+        # Sessions index is revalidated, so an unchanged season costs a 304
         sessions = []
         for year in years_to_check:
             try:
-                sessions_url = f"https://api.openf1.org/v1/sessions?year={year}"
-                sessions_response = requests.get(sessions_url, timeout=10)
-                if sessions_response.status_code == 200:
-                    sessions.extend(sessions_response.json())
+                sessions_url = f"{OPENF1_URL}/v1/sessions?year={year}"
+                year_sessions, _ = conditional_get_json(sessions_url, timeout=10)
+                if year_sessions is not None:
+                    sessions.extend(year_sessions)
             except Exception as e:
                 logger.error(f"Error fetching sessions for year {year}: {e}")
                 continue
@@ -839,86 +1117,14 @@ def get_last_session_results():
         if not latest_session:
             return TRANSLATIONS["no_recent_sessions"]
 
-        session_key = latest_session.get("session_key")
-        session_type = latest_session.get("session_type")
-        meeting_name = latest_session.get("meeting_name", "Grand Prix")
-        country_name = latest_session.get("country_name", "")
-        flag = get_country_flag(country_name)
-
-        # Get positions
-        results_url = f"https://api.openf1.org/v1/position?session_key={session_key}"
-        results_response = requests.get(results_url, timeout=10)
-        if results_response.status_code != 200:
-            return TRANSLATIONS["no_results"].format(session_type)
-
-        positions_data = results_response.json()
-        if not positions_data:
-            return TRANSLATIONS["no_position_data"].format(session_type)
-
-        final_positions = {}
-        for pos_entry in positions_data:
-            driver_number = pos_entry.get("driver_number")
-            position = pos_entry.get("position")
-            date = pos_entry.get("date")
-
-            if driver_number and position and date:
-                if (
-                    driver_number not in final_positions
-                    or date > final_positions[driver_number]["date"]
-                ):
-                    final_positions[driver_number] = {
-                        "position": position,
-                        "date": date,
-                    }
-
-        # Get driver info from OpenF1 API first, then fallback to Ergast
-        drivers_url = f"https://api.openf1.org/v1/drivers?session_key={session_key}"
-        drivers_response = requests.get(drivers_url, timeout=10)
-        drivers_info = {}
-        if drivers_response.status_code == 200:
-            for driver in drivers_response.json():
-                driver_number = driver.get("driver_number")
-                if driver_number:
-                    driver_name = f"{driver.get('first_name', '')} {driver.get('last_name', '')}".strip()
-                    country_code = driver.get("country_code") or get_driver_nationality_by_number(driver_number)
-
-                    drivers_info[driver_number] = {
-                        "name": driver_name or get_driver_name_by_number(driver_number),
-                        "country": country_code,
-                        "team": driver.get("team_name", ""),
-                    }
-
-        sorted_positions = sorted(
-            final_positions.items(), key=lambda x: x[1]["position"]
-        )
-        if not sorted_positions:
-            return TRANSLATIONS["no_final_positions"].format(session_type)
-
-        emoji = (
-            "🏁"
-            if session_type == "Sprint"
-            else "⏱️" if session_type == "Qualifying" else "🏆"
-        )
-        session_type_az = TRANSLATIONS.get(session_type.lower(), session_type)
-        message = f"{emoji} {flag} *{meeting_name} {session_type_az}*\n\n"
-
-        for driver_number, pos_data in sorted_positions[:20]:
-            position = pos_data["position"]
-            driver_info = drivers_info.get(driver_number, {})
-            driver_name = driver_info.get("name", f"Driver {driver_number}")
-            driver_country = driver_info.get("country", "")
-            driver_flag = get_country_flag(driver_country)
-            team_name = driver_info.get("team", "")
-
-            line = f"{position}. {driver_flag} {driver_name}"
-
-            if session_type in ["Race", "Sprint"] and team_name:
-                line += f" ({team_name})"
-
-            if position == 1:
-                line += f" - {TRANSLATIONS['winner']}"
+        # Completed sessions are served from the local archive once written
+        record = get_archived_session(latest_session.get("session_key"))
+        if record is None:
+            record, error = fetch_session_classification(latest_session)
+            if record is None:
+                return error
 
-            message += line + "\n"
+        message = format_session_results(record)
 
         # Cache the result
         set_cached_data("last_session", message)
@@ -929,6 +1135,7 @@ def get_last_session_results():
         return TRANSLATIONS["error_fetching_session"].format(str(e))
 
 
+@traced("season_calendar")
 def get_f1_season_calendar():
     """Fetch and display the current F1 season's race schedule"""
     try:
@@ -938,15 +1145,14 @@ def get_f1_season_calendar():
 
         # Try multiple APIs
         apis = [
-            f"https://api.jolpi.ca/ergast/f1/{season}.json",
+            f"{JOLPICA_URL}/ergast/f1/{season}.json",
         ]
 
         data = None
         for api_url in apis:
             try:
-                response = requests.get(api_url, timeout=30)
-                if response.status_code == 200:
-                    data = response.json()
+                data, _ = conditional_get_json(api_url, timeout=30)
+                if data is not None:
                     break
             except Exception as e:
                 logger.error(f"Error fetching calendar from {api_url}: {e}")
@@ -959,6 +1165,7 @@ def get_f1_season_calendar():
             races = data.get("MRData", {}).get("RaceTable", {}).get("Races", [])
             if not races:
                 return TRANSLATIONS["no_race_schedule"]
+            update_ttl_calendar(races)
         except Exception as e:
             logger.error(f"Error parsing calendar data: {e}")
             return TRANSLATIONS["invalid_data"]
@@ -966,10 +1173,9 @@ def get_f1_season_calendar():
         # Check for sprint weekends using OpenF1 API
         sprint_weekends = {}
         try:
-            sessions_url = f"https://api.openf1.org/v1/sessions?year={season}"
-            sessions_response = requests.get(sessions_url, timeout=10)
-            if sessions_response.status_code == 200:
-                sessions = sessions_response.json()
+            sessions_url = f"{OPENF1_URL}/v1/sessions?year={season}"
+            sessions, _ = conditional_get_json(sessions_url, timeout=10)
+            if sessions is not None:
                 for session in sessions:
                     if session.get("session_name") == "Sprint":
                         country_name = session.get("country_name", "")
@@ -1033,13 +1239,35 @@ def get_f1_season_calendar():
         return TRANSLATIONS["error_fetching_race"].format(str(e))
 
 
-def get_next_race():
+def _render_next_race(header, schedule, next_race, timezone):
+    """Header + session times in `timezone` + weather (renderings cached per timezone)"""
+    if timezone == DEFAULT_TIMEZONE:
+        footer = TRANSLATIONS["all_times_baku"]
+    else:
+        footer = TRANSLATIONS["all_times_tz"].format(display_name(timezone))
+    return (
+        header
+        + schedule.render(timezone)
+        + f"\n_{footer}_\n"
+        + format_weekend_weather(get_weekend_forecast(next_race), timezone)
+    )
+
+
+@traced("next_race")
+@single_flight("fill:next_race", ready=lambda: _lookup_cached_data("next_race") is not None)
+def get_next_race(timezone=DEFAULT_TIMEZONE):
     """Get next race schedule using Jolpica API with caching"""
     try:
-        # Check cache first
+        # Check cache first; the parsed schedule is cached and rendered per
+        # timezone, weather comes from the forecast store
         cached = get_cached_data("next_race")
         if cached:
-            return cached
+            header, schedule, next_race = cached
+            if not isinstance(schedule, SessionSchedule):
+                # Adopted from another worker through the shared backend as plain JSON
+                schedule = SessionSchedule.from_json(schedule)
+                CACHE["next_race"]["data"] = (header, schedule, next_race)
+            return _render_next_race(header, schedule, next_race, timezone)
 
         logger.info("Fetching next race schedule from API")
         now = datetime.now(ZoneInfo("UTC"))
@@ -1047,15 +1275,16 @@ def get_next_race():
 
         # Try multiple APIs
         apis = [
-            f"https://api.jolpi.ca/ergast/f1/{season}.json",
+            f"{JOLPICA_URL}/ergast/f1/{season}.json",
         ]
 
+        # Season JSON is revalidated; on 304 the parsed body is reused but the
+        # message is still re-rendered since the next race depends on the clock
         data = None
         for api_url in apis:
             try:
-                response = requests.get(api_url, timeout=30)
-                if response.status_code == 200:
-                    data = response.json()
+                data, _ = conditional_get_json(api_url, timeout=30)
+                if data is not None:
                     break
             except Exception as e:
                 logger.error(f"Error fetching race schedule from {api_url}: {e}")
@@ -1068,6 +1297,7 @@ def get_next_race():
             races = data.get("MRData", {}).get("RaceTable", {}).get("Races", [])
             if not races:
                 return TRANSLATIONS["no_race_schedule"]
+            update_ttl_calendar(races)
         except Exception as e:
             logger.error(f"Error parsing race data: {e}")
             return TRANSLATIONS["invalid_data"]
@@ -1099,7 +1329,6 @@ def get_next_race():
         race_name = next_race.get("raceName", "Grand Prix")
         circuit = next_race.get("Circuit", {})
         location = circuit.get("Location", {})
-        locality = location.get("locality", "")
         country = location.get("country", "")
 
         flag = get_country_flag(country)
@@ -1107,115 +1336,13 @@ def get_next_race():
         message = f"{TRANSLATIONS['next_race']}\n"
         message += f"{flag} *{race_name}*\n\n"
 
-        # Collect all sessions with times
-        sessions = []
-
-        # FP1
-        fp1 = next_race.get("FirstPractice", {})
-        fp1_date = fp1.get("date")
-        fp1_time = fp1.get("time", "TBA")
-        if fp1_date and fp1_time != "TBA":
-            sessions.append((fp1_date, fp1_time, TRANSLATIONS["fp1"]))
-
-        # FP2
-        fp2 = next_race.get("SecondPractice", {})
-        fp2_date = fp2.get("date")
-        fp2_time = fp2.get("time", "TBA")
-        if fp2_date and fp2_time != "TBA":
-            sessions.append((fp2_date, fp2_time, TRANSLATIONS["fp2"]))
-
-        # FP3
-        fp3 = next_race.get("ThirdPractice", {})
-        fp3_date = fp3.get("date")
-        fp3_time = fp3.get("time", "TBA")
-        if fp3_date and fp3_time != "TBA":
-            sessions.append((fp3_date, fp3_time, TRANSLATIONS["fp3"]))
-
-        # Sprint Qualifying
-        sprint_quali = next_race.get("SprintQualifying", {})
-        sq_date = sprint_quali.get("date")
-        sq_time = sprint_quali.get("time", "TBA")
-        if sq_date and sq_time != "TBA":
-            sessions.append((sq_date, sq_time, TRANSLATIONS["sprint_qualifying"]))
-
-        # Sprint
-        sprint = next_race.get("Sprint", {})
-        sprint_date = sprint.get("date")
-        sprint_time = sprint.get("time", "TBA")
-        if sprint_date and sprint_time != "TBA":
-            sessions.append((sprint_date, sprint_time, TRANSLATIONS["sprint"]))
-
-        # Qualifying
-        quali = next_race.get("Qualifying", {})
-        quali_date = quali.get("date")
-        quali_time = quali.get("time", "TBA")
-        if quali_date and quali_time != "TBA":
-            sessions.append((quali_date, quali_time, TRANSLATIONS["qualifying"]))
-
-        # Race
-        race_date = next_race.get("date")
-        race_time = next_race.get("time", "TBA")
-        if race_date and race_time != "TBA":
-            sessions.append((race_date, race_time, TRANSLATIONS["race"]))
-
-        # Sort sessions by date and time
-        sessions.sort(key=lambda x: (x[0], x[1]))
-
-        # Display sessions in chronological order
-        for session_date, session_time, session_name in sessions:
-            baku_time = to_baku(session_date, session_time)
-            message += f"*{session_name}:* {baku_time}\n"
-
-        message += f"\n_{TRANSLATIONS['all_times_baku']}_\n"
-
-        # Add weather forecast with separate caching
-        weather_cached = get_cached_data("weather")
-        if weather_cached:
-            message += weather_cached
-        else:
-            try:
-                coords = get_circuit_coordinates(locality)
-                if coords and race_date:
-                    race_date_obj = datetime.fromisoformat(race_date)
-                    friday = race_date_obj - timedelta(days=2)
-                    saturday = race_date_obj - timedelta(days=1)
-                    sunday = race_date_obj
-
-                    meteo_url = f"https://api.open-meteo.com/v1/forecast?latitude={coords[0]}&longitude={coords[1]}&daily=temperature_2m_max,precipitation_probability_max,wind_speed_10m_max&start_date={friday.date()}&end_date={sunday.date()}"
-                    weather_response = requests.get(meteo_url, timeout=15)
-
-                    if weather_response.status_code == 200:
-                        weather_data = weather_response.json()
-                        daily = weather_data.get("daily", {})
-                        temps = daily.get("temperature_2m_max", [])
-                        rain_probs = daily.get("precipitation_probability_max", [])
-                        wind_speeds = daily.get("wind_speed_10m_max", [])
-
-                        if temps and len(temps) >= 3:
-                            weather_message = "\n🌤️ *Hava proqnozu:*\n"
-                            days = [
-                                TRANSLATIONS["friday"],
-                                TRANSLATIONS["saturday"],
-                                TRANSLATIONS["sunday"],
-                            ]
-                            for i, day in enumerate(days):
-                                if i < len(temps):
-                                    temp = temps[i]
-                                    rain = rain_probs[i] if i < len(rain_probs) else 0
-                                    wind = wind_speeds[i] if i < len(wind_speeds) else 0
-                                    rain_icon = (
-                                        "🌧️" if rain >= 60 else "⛅" if rain >= 30 else "☀️"
-                                    )
-                                    weather_message += f"{day}: {temp:.1f}°C {rain_icon} {int(rain)}% 💨{wind:.1f}km/h\n"
-                            message += weather_message
-                            set_cached_data("weather", weather_message)
-            except Exception as e:
-                logger.error(f"Error fetching weather data: {e}")
-                pass
+        # Session times are parsed once per calendar load; renderings per timezone are cached
+        schedule = SessionSchedule(
+            (session["start"], TRANSLATIONS[session["name"]]) for session in race_sessions(next_race)
+        )
 
-        # Cache the complete result
-        set_cached_data("next_race", message)
-        return message
+        set_cached_data("next_race", (message, schedule, next_race))
+        return _render_next_race(message, schedule, next_race, timezone)
     except Exception as e:
         logger.error(f"Error in get_next_race: {e}")
         return TRANSLATIONS["error_fetching_race"].format(str(e))
@@ -1224,34 +1351,99 @@ def get_next_race():
 
 
 # Global cache for API data to optimize Leapcell limits
-# APIs update weekend-by-weekend, so long cache times are appropriate
+# APIs update weekend-by-weekend, so long cache times are appropriate.
+# "expiry" is the fallback; the TTL policy derives the actual expiry ("ttl")
+# from the race calendar whenever an entry is written.
 CACHE = {
     "standings": {"data": None, "timestamp": None, "expiry": 86400},  # 24 hours (updates weekly)
     "constructor_standings": {"data": None, "timestamp": None, "expiry": 86400},  # 24 hours
     "last_session": {"data": None, "timestamp": None, "expiry": 604800},  # 1 week (results don't change)
     "next_race": {"data": None, "timestamp": None, "expiry": 86400},  # 24 hours
     "calendar": {"data": None, "timestamp": None, "expiry": 604800},  # 1 week (season schedule)
-    "weather": {"data": None, "timestamp": None, "expiry": 21600},  # 6 hours
     "active_session": {"data": None, "timestamp": None, "expiry": 300},  # 5 minutes (for live checks)
     "live_session": {"data": None, "timestamp": None, "expiry": 30},  # 30 seconds (live session info)
+    "live_positions": {"data": None, "timestamp": None, "expiry": 15},  # 15 seconds (one session's positions)
 }
 
 
+def _is_fresh(cache_entry, now):
+    return (
+        cache_entry["data"] is not None
+        and cache_entry["timestamp"]
+        and now - cache_entry["timestamp"] < cache_entry.get("ttl", cache_entry["expiry"])
+    )
+
+
+def _publish_cached_data(cache_key):
+    """Write a local CACHE entry through to the shared backend"""
+    entry = CACHE[cache_key]
+    shared_set(
+        f"cache:{cache_key}",
+        {"data": entry["data"], "timestamp": entry["timestamp"], "ttl": entry.get("ttl", entry["expiry"])},
+        SHARED_CACHE_RETENTION,
+    )
+
+
 def get_cached_data(cache_key):
-    """Retrieve cached data if available and not expired"""
+    """Retrieve cached data if available and not expired
+
+    The process-local entry is checked first; on a local miss a fresher entry
+    written by another worker is adopted from the shared backend.
+    """
+    with span("cache_lookup", key=cache_key) as current:
+        data = _lookup_cached_data(cache_key)
+        current.set(hit=data is not None)
+    CACHE_LOOKUPS.inc(cache_key, "miss" if data is None else "hit")
+    return data
+
+
+def _lookup_cached_data(cache_key):
+    """get_cached_data without hit/miss accounting (for single_flight readiness probes)"""
     cache_entry = CACHE.get(cache_key)
-    if cache_entry and cache_entry["data"] and cache_entry["timestamp"]:
-        now = datetime.now(ZoneInfo("UTC")).timestamp()
-        if now - cache_entry["timestamp"] < cache_entry["expiry"]:
+    if not cache_entry:
+        return None
+    now = datetime.now(ZoneInfo("UTC")).timestamp()
+    if _is_fresh(cache_entry, now):
+        return cache_entry["data"]
+    shared = shared_get(f"cache:{cache_key}")
+    if shared and (shared["timestamp"] or 0) > (cache_entry["timestamp"] or 0):
+        cache_entry.update(shared)
+        if _is_fresh(cache_entry, now):
             return cache_entry["data"]
     return None
 
 
 def set_cached_data(cache_key, data):
-    """Cache data with current timestamp"""
+    """Cache data with current timestamp and a calendar-derived TTL"""
     if cache_key in CACHE:
         CACHE[cache_key]["data"] = data
         CACHE[cache_key]["timestamp"] = datetime.now(ZoneInfo("UTC")).timestamp()
+        CACHE[cache_key]["ttl"] = get_ttl(cache_key, CACHE[cache_key]["expiry"], value=CACHE[cache_key]["data"])
+        _publish_cached_data(cache_key)
+
+
+def get_stale_cached_data(cache_key):
+    """Retrieve cached data even if expired (for conditional revalidation)"""
+    cache_entry = CACHE.get(cache_key)
+    if cache_entry:
+        return cache_entry["data"]
+    return None
+
+
+def touch_cached_data(cache_key):
+    """Restart the TTL of a cache entry whose upstream answered 304 Not Modified"""
+    if cache_key in CACHE and CACHE[cache_key]["data"]:
+        CACHE[cache_key]["timestamp"] = datetime.now(ZoneInfo("UTC")).timestamp()
+        CACHE[cache_key]["ttl"] = get_ttl(cache_key, CACHE[cache_key]["expiry"], value=CACHE[cache_key]["data"])
+        _publish_cached_data(cache_key)
+
+
+def invalidate_cached_data(cache_key):
+    """Expire a cache entry so the next read refetches (keeps data for revalidation)"""
+    if cache_key in CACHE:
+        CACHE[cache_key]["timestamp"] = None
+        if CACHE[cache_key]["data"] is not None:
+            _publish_cached_data(cache_key)
 
 
 # Backward compatibility
@@ -1289,10 +1481,10 @@ def get_live_session_info():
         sessions = []
         for year in years_to_check:
             try:
-                sessions_url = f"https://api.openf1.org/v1/sessions?year={year}"
-                sessions_response = requests.get(sessions_url, timeout=10)
+                sessions_url = f"{OPENF1_URL}/v1/sessions?year={year}"
+                sessions_response = http_get(sessions_url, timeout=10, hedge=True)
                 if sessions_response.status_code == 200:
-                    sessions.extend(sessions_response.json())
+                    sessions.extend(parse_json(sessions_response))
             except Exception as e:
                 logger.error(f"Error fetching sessions for year {year}: {e}")
                 continue
@@ -1367,40 +1559,33 @@ def get_live_session_info():
         return None
 
 
+@traced("live_positions")
 def get_live_positions(session_key):
     """Get current live positions for active session"""
     try:
         if not session_key:
             return []
 
-        # Check cache first (15 seconds for live positions)
-        cache_key = f"live_positions_{session_key}"
-        cached = get_cached_data(cache_key)
-        if cached and cached.get('timestamp'):
-            now = datetime.now(ZoneInfo("UTC")).timestamp()
-            if now - cached['timestamp'] < 15:
-                return cached.get('positions', [])
+        # Check cache first (15 seconds for live positions; one key, so metric labels stay bounded)
+        cached = get_cached_data("live_positions")
+        if cached and cached.get('session_key') == session_key:
+            return cached.get('positions', [])
 
         logger.info(f"Fetching live positions for session {session_key}")
         
-        # Get current positions
-        positions_url = f"https://api.openf1.org/v1/position?session_key={session_key}"
-        positions_response = requests.get(positions_url, timeout=10)
-        
-        if positions_response.status_code != 200:
-            return []
-
-        positions_data = positions_response.json()
-        if not positions_data:
+        # Get current positions (only the newest row per driver is kept)
+        positions_url = f"{OPENF1_URL}/v1/position?session_key={session_key}"
+        latest_positions = fetch_latest_positions(positions_url, hedge=True)
+        if not latest_positions:
             return []
 
         # Get driver info
-        drivers_url = f"https://api.openf1.org/v1/drivers?session_key={session_key}"
-        drivers_response = requests.get(drivers_url, timeout=10)
+        drivers_url = f"{OPENF1_URL}/v1/drivers?session_key={session_key}"
+        drivers_response = http_get(drivers_url, timeout=10, hedge=True)
         drivers_info = {}
         
         if drivers_response.status_code == 200:
-            for driver in drivers_response.json():
+            for driver in parse_json(drivers_response):
                 driver_number = driver.get("driver_number")
                 if driver_number:
                     drivers_info[driver_number] = {
@@ -1412,27 +1597,18 @@ def get_live_positions(session_key):
 
         # Process positions
         current_positions = {}
-        for pos_entry in positions_data:
-            driver_number = pos_entry.get("driver_number")
-            position = pos_entry.get("position")
-            date = pos_entry.get("date")
-
-            if driver_number and position and date:
-                if (
-                    driver_number not in current_positions
-                    or date > current_positions[driver_number]["date"]
-                ):
-                    driver_info = drivers_info.get(driver_number, {})
-                    full_name = f"{driver_info.get('first_name', '')} {driver_info.get('last_name', '')}".strip()
-                    
-                    current_positions[driver_number] = {
-                        "position": position,
-                        "date": date,
-                        "driver_number": driver_number,
-                        "driver_name": full_name or f"Driver {driver_number}",
-                        "country_code": driver_info.get('country_code', ''),
-                        "team_name": driver_info.get('team_name', '')
-                    }
+        for driver_number, pos_data in latest_positions.items():
+            driver_info = drivers_info.get(driver_number, {})
+            full_name = f"{driver_info.get('first_name', '')} {driver_info.get('last_name', '')}".strip()
+
+            current_positions[driver_number] = {
+                "position": pos_data["position"],
+                "date": pos_data["date"],
+                "driver_number": driver_number,
+                "driver_name": full_name or f"Driver {driver_number}",
+                "country_code": driver_info.get('country_code', ''),
+                "team_name": driver_info.get('team_name', '')
+            }
 
         # Sort by position
         sorted_positions = sorted(
@@ -1442,10 +1618,10 @@ def get_live_positions(session_key):
 
         # Cache the result
         cache_data = {
+            'session_key': session_key,
             'positions': sorted_positions,
-            'timestamp': datetime.now(ZoneInfo("UTC")).timestamp()
         }
-        set_cached_data(cache_key, cache_data)
+        set_cached_data("live_positions", cache_data)
         
         return sorted_positions
 
@@ -1454,6 +1630,7 @@ def get_live_positions(session_key):
         return []
 
 
+@traced("render:live_timing")
 def format_live_timing_message(session_info, positions):
     """Format live timing data into a nice message"""
     if not session_info:
@@ -1757,6 +1934,74 @@ class F1TimingScraper:
 
 # ==================== TELEGRAM BOT HANDLERS ====================
 
+# Sessions per page in the archive:<page> view
+ARCHIVE_PAGE_SIZE = 8
+
+# Keyboards are immutable and shared by every handler - built once at import
+MAIN_MENU_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton(TRANSLATIONS["driver_standings"], callback_data="standings"),
+        InlineKeyboardButton(TRANSLATIONS["constructor_standings"], callback_data="constructors"),
+    ],
+    [
+        InlineKeyboardButton(TRANSLATIONS["last_session"], callback_data="lastrace"),
+        InlineKeyboardButton(TRANSLATIONS["schedule_weather"], callback_data="nextrace"),
+    ],
+    [
+        InlineKeyboardButton(TRANSLATIONS["live_timing"], callback_data="live"),
+    ],
+    [
+        InlineKeyboardButton(TRANSLATIONS["help_commands_btn"], callback_data="help"),
+    ],
+])
+
+BACK_TO_MENU_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton(TRANSLATIONS["back_to_menu_button"], callback_data="back_to_menu")]
+])
+
+LAST_SESSION_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton(TRANSLATIONS["archive_button"], callback_data="archive:0")],
+    [InlineKeyboardButton(TRANSLATIONS["back_to_menu_button"], callback_data="back_to_menu")],
+])
+
+NEXT_RACE_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📅 Tam Mövsüm Cədvəlini Gör", callback_data="calendar")],
+    [InlineKeyboardButton(TRANSLATIONS["back_to_menu_button"], callback_data="back_to_menu")],
+])
+
+LIVE_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton(TRANSLATIONS["live_refresh_button"], callback_data="live_refresh")],
+    [InlineKeyboardButton(TRANSLATIONS["live_subscribe_button"], callback_data="live_subscribe")],
+    [InlineKeyboardButton(TRANSLATIONS["back_to_menu_button"], callback_data="back_to_menu")],
+])
+
+NO_ACTIVE_SESSION_MESSAGE = "❌ *Hal-hazırda aktiv F1 sessiyası yoxdur*\n\n🔴 Canlı vaxt yalnız F1 yarış həftəsonlarında mövcuddur.\n\n📊 Canlı vaxt göstərir:\n• Sürücülərin mövqeləri\n• Interval vaxtları\n• Ən yaxşı dövrə vaxtları\n• Təkər məlumatları\n• Hər çağırışda yenilənən məlumatlar\n\nAlternativlər:\n• /nextrace - Gələn yarış və hava proqnozu\n• /lastrace - Son sessiya nəticələri"
+
+HELP_MESSAGE = """ℹ️ *F1 Bot Köməyi*
+
+Bu bot Formula 1 yarışları haqqında məlumat verir.
+
+*Əmrlər:*
+/start - Botu başlat
+/menu - Əsas menyunu göstər
+/standings - Sürücü sıralamaları
+/constructors - Konstruktor sıralamaları
+/lastrace - Son sessiya nəticələri
+/nextrace - Gələn yarış cədvəli
+/live - Canlı vaxt (aktiv sessiya zamanı)
+/live subscribe - Canlı vaxtı avtomatik yenilə
+/live stop - Avtomatik yeniləməni dayandır
+/subscribe - Sessiya xatırlatmaları və nəticə bildirişləri
+/unsubscribe - Bildirişləri dayandır
+/timezone - Saat qurşağını seç
+
+*Qeyd:* Vaxtlar standart olaraq Bakı vaxtı ilə göstərilir."""
+
+MENU_MESSAGE = f"{TRANSLATIONS['menu_title']}\n\n{TRANSLATIONS['menu_text']}"
+
+# Callback queries are dispatched by name ("results:<session_key>" -> "results")
+CALLBACK_ROUTER = CallbackRouter()
+
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Send welcome message with comprehensive inline keyboard"""
@@ -1765,28 +2010,6 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
             logger.info(f"User {update.effective_user.id} started the bot")
         else:
             logger.info("User started the bot (unknown user)")
-        keyboard = [
-            [
-                InlineKeyboardButton(
-                    TRANSLATIONS["driver_standings"], callback_data="standings"
-                ),
-                InlineKeyboardButton(
-                    TRANSLATIONS["constructor_standings"], callback_data="constructors"
-                ),
-            ],
-            [
-                InlineKeyboardButton(
-                    TRANSLATIONS["last_session"], callback_data="lastrace"
-                ),
-                InlineKeyboardButton(
-                    TRANSLATIONS["schedule_weather"], callback_data="nextrace"
-                ),
-            ],
-            [
-                InlineKeyboardButton(TRANSLATIONS["live_timing"], callback_data="live"),
-            ],
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
 
         welcome_text = f"""{TRANSLATIONS["welcome_title"]}
          
@@ -1794,7 +2017,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         if isinstance(update.message, Message):
             await update.message.reply_text(
-                welcome_text, reply_markup=reply_markup, parse_mode="Markdown"
+                welcome_text, reply_markup=MAIN_MENU_KEYBOARD, parse_mode="Markdown"
             )
     except Exception as e:
         logger.error(f"Error in start handler: {e}")
@@ -1810,41 +2033,171 @@ async def show_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.info(f"User {update.effective_user.id} requested menu")
     else:
         logger.info("User requested menu (unknown user)")
-    keyboard = [
-        [
-            InlineKeyboardButton(
-                TRANSLATIONS["driver_standings"], callback_data="standings"
-            ),
-            InlineKeyboardButton(
-                TRANSLATIONS["constructor_standings"], callback_data="constructors"
-            ),
-        ],
-        [
-            InlineKeyboardButton(
-                TRANSLATIONS["last_session"], callback_data="lastrace"
-            ),
-            InlineKeyboardButton(
-                TRANSLATIONS["schedule_weather"], callback_data="nextrace"
-            ),
-        ],
-        [
-            InlineKeyboardButton(TRANSLATIONS["live_timing"], callback_data="live"),
-        ],
-        [
-            InlineKeyboardButton(
-                TRANSLATIONS["help_commands_btn"], callback_data="help"
-            ),
-        ],
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
     if isinstance(update.message, Message):
         await update.message.reply_text(
-            f"{TRANSLATIONS['menu_title']}\n\n{TRANSLATIONS['menu_text']}",
-            reply_markup=reply_markup,
+            MENU_MESSAGE,
+            reply_markup=MAIN_MENU_KEYBOARD,
             parse_mode="Markdown",
         )
 
 
+async def _deferred_edit(query, render, reply_markup, placeholder=None):
+    """Show the loading placeholder now; the render replaces it from a background task"""
+    await deferred_edit(
+        query.message,
+        render,
+        placeholder or TRANSLATIONS["loading"],
+        reply_markup,
+        timeout_text=TRANSLATIONS["service_unavailable"],
+        error_text=TRANSLATIONS["error_occurred"],
+    )
+
+
+@CALLBACK_ROUTER.route("standings")
+async def standings_button(query, context):
+    await _deferred_edit(query, get_current_standings, BACK_TO_MENU_KEYBOARD)
+
+
+@CALLBACK_ROUTER.route("constructors")
+async def constructors_button(query, context):
+    await _deferred_edit(query, get_constructor_standings, BACK_TO_MENU_KEYBOARD)
+
+
+@CALLBACK_ROUTER.route("lastrace")
+async def lastrace_button(query, context):
+    await _deferred_edit(query, get_last_session_results, LAST_SESSION_KEYBOARD)
+
+
+@CALLBACK_ROUTER.route("nextrace")
+async def nextrace_button(query, context):
+    timezone = get_chat_timezone(query.message.chat_id)
+    await _deferred_edit(query, lambda: get_next_race(timezone), NEXT_RACE_KEYBOARD)
+
+
+@CALLBACK_ROUTER.route("calendar")
+async def calendar_button(query, context):
+    def render_calendar():
+        cached_data = get_cached_calendar()
+        if cached_data:
+            return cached_data
+        message = get_f1_season_calendar()
+        set_cached_calendar(message)
+        return message
+
+    await _deferred_edit(query, render_calendar, BACK_TO_MENU_KEYBOARD)
+
+
+@CALLBACK_ROUTER.route("results")
+async def results_button(query, context, session_key=None):
+    """Archived or historical results of one session: results:<session_key>"""
+    try:
+        session_key = int(session_key)
+    except (TypeError, ValueError):
+        await query.message.reply_text(TRANSLATIONS["unknown_command"], reply_markup=BACK_TO_MENU_KEYBOARD)
+        return
+    await _deferred_edit(query, lambda: get_session_results(session_key), LAST_SESSION_KEYBOARD)
+
+
+def archive_page_keyboard(sessions, page, has_next):
+    """One button per archived session plus prev/next navigation"""
+    rows = [
+        [InlineKeyboardButton(
+            f"{session['meeting_name'] or session['country_name']} - {session['session_type']}",
+            callback_data=f"results:{session['session_key']}",
+        )]
+        for session in sessions
+    ]
+    navigation = []
+    if page > 0:
+        navigation.append(InlineKeyboardButton("⬅️", callback_data=f"archive:{page - 1}"))
+    if has_next:
+        navigation.append(InlineKeyboardButton("➡️", callback_data=f"archive:{page + 1}"))
+    if navigation:
+        rows.append(navigation)
+    rows.append([InlineKeyboardButton(TRANSLATIONS["back_to_menu_button"], callback_data="back_to_menu")])
+    return InlineKeyboardMarkup(rows)
+
+
+@CALLBACK_ROUTER.route("archive", timeout=10)
+async def archive_button(query, context, page="0"):
+    """Paginated list of archived sessions: archive:<page>"""
+    page = max(0, int(page)) if page.isdigit() else 0
+    # One extra row tells whether a next page exists
+    sessions = await asyncio.to_thread(
+        list_archived_sessions, ARCHIVE_PAGE_SIZE + 1, page * ARCHIVE_PAGE_SIZE
+    )
+    if not sessions and page == 0:
+        await query.message.edit_text(TRANSLATIONS["archive_empty"], reply_markup=BACK_TO_MENU_KEYBOARD)
+        return
+    has_next = len(sessions) > ARCHIVE_PAGE_SIZE
+    await query.message.edit_text(
+        TRANSLATIONS["archive_title"].format(page + 1),
+        parse_mode="Markdown",
+        reply_markup=archive_page_keyboard(sessions[:ARCHIVE_PAGE_SIZE], page, has_next),
+    )
+
+
+@CALLBACK_ROUTER.route("live_refresh")
+async def live_refresh_button(query, context):
+    from f1_live import touch_subscription
+    if touch_subscription(query.message.chat_id):
+        # Subscribed chats are kept current by the shared poller - no scrape needed
+        return
+
+    async def render_live():
+        from f1_live_sources import get_live_timing
+        from f1_playwright_scraper_fixed import format_timing_data_for_telegram
+
+        live_data = await get_live_timing()
+        if live_data:
+            return format_timing_data_for_telegram(live_data), LIVE_KEYBOARD
+        return "❌ Canlı vaxt məlumatları mövcud deyil\n\nℹ️ Playwright quraşdırmaq üçün: pip install playwright && playwright install chromium"
+
+    await _deferred_edit(query, render_live, BACK_TO_MENU_KEYBOARD, placeholder=TRANSLATIONS["live_positions_loading"])
+
+
+@CALLBACK_ROUTER.route("live_subscribe", timeout=60)
+async def live_subscribe_button(query, context):
+    from f1_live import subscribe_chat
+    if not await asyncio.to_thread(check_active_f1_session):
+        await query.message.reply_text(TRANSLATIONS["live_session_inactive"], parse_mode="Markdown")
+        return
+    await subscribe_chat(context.bot, query.message.chat_id, query.message.message_id)
+
+
+@CALLBACK_ROUTER.route("live_unsubscribe")
+async def live_unsubscribe_button(query, context):
+    from f1_live import unsubscribe_chat
+    if not await unsubscribe_chat(context.bot, query.message.chat_id):
+        await query.message.edit_reply_markup(reply_markup=None)
+
+
+@CALLBACK_ROUTER.route("live")
+async def live_button(query, context):
+    if not await asyncio.to_thread(check_active_f1_session):
+        await query.message.reply_text(NO_ACTIVE_SESSION_MESSAGE, parse_mode="Markdown", reply_markup=BACK_TO_MENU_KEYBOARD)
+        return
+    # Start live timing - send loading and then handle in live_cmd style
+    await context.bot.send_chat_action(chat_id=query.message.chat_id, action="typing")
+    # For live, we need to handle differently since it sends new message
+    # For simplicity, just send the loading message and let user know
+
+
+@CALLBACK_ROUTER.route("help")
+async def help_button(query, context):
+    await query.message.reply_text(HELP_MESSAGE, parse_mode="Markdown", reply_markup=BACK_TO_MENU_KEYBOARD)
+
+
+@CALLBACK_ROUTER.route("back_to_menu")
+async def back_to_menu_button(query, context):
+    await query.message.reply_text(MENU_MESSAGE, reply_markup=MAIN_MENU_KEYBOARD, parse_mode="Markdown")
+
+
+@CALLBACK_ROUTER.set_fallback
+async def unknown_button(query, context):
+    await query.message.reply_text(TRANSLATIONS["unknown_command"], parse_mode="Markdown", reply_markup=BACK_TO_MENU_KEYBOARD)
+
+
 async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle button clicks"""
     query = update.callback_query
@@ -1862,146 +2215,23 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # Process the button click
     try:
-        if query.data == "standings":
-            await context.bot.send_chat_action(chat_id=query.message.chat_id, action="typing")
-            message = get_current_standings()
-            reply_markup = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🏠 Ana Menyuya Qayıt", callback_data="back_to_menu")]
-            ])
-            await query.message.edit_text(message, parse_mode="Markdown", reply_markup=reply_markup)
-            return
-        elif query.data == "constructors":
-            await context.bot.send_chat_action(chat_id=query.message.chat_id, action="typing")
-            message = get_constructor_standings()
-            reply_markup = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🏠 Ana Menyuya Qayıt", callback_data="back_to_menu")]
-            ])
-            await query.message.edit_text(message, parse_mode="Markdown", reply_markup=reply_markup)
-            return
-        elif query.data == "lastrace":
-            await context.bot.send_chat_action(chat_id=query.message.chat_id, action="typing")
-            message = get_last_session_results()
-            reply_markup = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🏠 Ana Menyuya Qayıt", callback_data="back_to_menu")]
-            ])
-            await query.message.edit_text(message, parse_mode="Markdown", reply_markup=reply_markup)
-            return
-        elif query.data == "nextrace":
-            await context.bot.send_chat_action(chat_id=query.message.chat_id, action="typing")
-            message = get_next_race()
-            reply_markup = InlineKeyboardMarkup([
-                [InlineKeyboardButton("📅 Tam Mövsüm Cədvəlini Gör", callback_data="calendar")],
-                [InlineKeyboardButton("🏠 Ana Menyuya Qayıt", callback_data="back_to_menu")]
-            ])
-            await query.message.edit_text(message, parse_mode="Markdown", reply_markup=reply_markup)
-            return
-        elif query.data == "calendar":
-            await context.bot.send_chat_action(chat_id=query.message.chat_id, action="typing")
-            cached_data = get_cached_calendar()
-            if cached_data:
-                message = cached_data
-            else:
-                message = get_f1_season_calendar()
-                set_cached_calendar(message)
-            reply_markup = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🏠 Ana Menyuya Qayıt", callback_data="back_to_menu")]
-            ])
-            await query.message.edit_text(message, parse_mode="Markdown", reply_markup=reply_markup)
-            return
-        elif query.data == "live_refresh":
-            await context.bot.send_chat_action(chat_id=query.message.chat_id, action="typing")
-            try:
-                from f1_playwright_scraper import get_optimized_live_timing, format_timing_data_for_telegram
-                PLAYWRIGHT_AVAILABLE = True
-            except ImportError:
-                PLAYWRIGHT_AVAILABLE = False
-
-            if PLAYWRIGHT_AVAILABLE:
-                live_data = await get_optimized_live_timing()
-                if live_data:
-                    message = format_timing_data_for_telegram(live_data)
-                    reply_markup = InlineKeyboardMarkup([
-                        [InlineKeyboardButton(TRANSLATIONS["live_refresh_button"], callback_data="live_refresh")],
-                        [InlineKeyboardButton("🏠 Ana Menyuya Qayıt", callback_data="back_to_menu")]
-                    ])
-                    await query.message.edit_text(message, parse_mode="Markdown", reply_markup=reply_markup)
-                    return
-            message = "❌ Canlı vaxt məlumatları mövcud deyil\n\nℹ️ Playwright quraşdırmaq üçün: pip install playwright && playwright install chromium"
-            reply_markup = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🏠 Ana Menyuya Qayıt", callback_data="back_to_menu")]
-            ])
-            await query.message.edit_text(message, parse_mode="Markdown", reply_markup=reply_markup)
-            return
-        elif query.data == "live":
-            if not check_active_f1_session():
-                message = "❌ *Hal-hazırda aktiv F1 sessiyası yoxdur*\n\n🔴 Canlı vaxt yalnız F1 yarış həftəsonlarında mövcuddur.\n\n📊 Canlı vaxt göstərir:\n• Sürücülərin mövqeləri\n• Interval vaxtları\n• Ən yaxşı dövrə vaxtları\n• Təkər məlumatları\n• Hər çağırışda yenilənən məlumatlar\n\nAlternativlər:\n• /nextrace - Gələn yarış və hava proqnozu\n• /lastrace - Son sessiya nəticələri"
-                reply_markup = InlineKeyboardMarkup([
-                    [InlineKeyboardButton("🏠 Ana Menyuya Qayıt", callback_data="back_to_menu")]
-                ])
-                await query.message.reply_text(message, parse_mode="Markdown", reply_markup=reply_markup)
-                return
-            else:
-                # Start live timing - send loading and then handle in live_cmd style
-                await context.bot.send_chat_action(chat_id=query.message.chat_id, action="typing")
-                # For live, we need to handle differently since it sends new message
-                # Call live_cmd logic here or redirect
-                # For simplicity, just send the loading message and let user know
-                return
-        elif query.data == "help":
-            message = """ℹ️ *F1 Bot Köməyi*
-
-Bu bot Formula 1 yarışları haqqında məlumat verir.
-
-*Əmrlər:*
-/start - Botu başlat
-/menu - Əsas menyunu göstər
-/standings - Sürücü sıralamaları
-/constructors - Konstruktor sıralamaları
-/lastrace - Son sessiya nəticələri
-/nextrace - Gələn yarış cədvəli
-/live - Canlı vaxt (aktiv sessiya zamanı)
-
-*Qeyd:* Bütün vaxtlar Bakı vaxtı ilə göstərilir."""
-            reply_markup = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🏠 Ana Menyuya Qayıt", callback_data="back_to_menu")]
-            ])
-            await query.message.reply_text(message, parse_mode="Markdown", reply_markup=reply_markup)
-            return
-        elif query.data == "back_to_menu":
-            keyboard = [
-                [
-                    InlineKeyboardButton(TRANSLATIONS["driver_standings"], callback_data="standings"),
-                    InlineKeyboardButton(TRANSLATIONS["constructor_standings"], callback_data="constructors"),
-                ],
-                [
-                    InlineKeyboardButton(TRANSLATIONS["last_session"], callback_data="lastrace"),
-                    InlineKeyboardButton(TRANSLATIONS["schedule_weather"], callback_data="nextrace"),
-                ],
-                [
-                    InlineKeyboardButton(TRANSLATIONS["live_timing"], callback_data="live"),
-                ],
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            message = f"{TRANSLATIONS['menu_title']}\n\n{TRANSLATIONS['menu_text']}"
-            await query.message.reply_text(message, reply_markup=reply_markup, parse_mode="Markdown")
-            return
-        else:
-            message = TRANSLATIONS["unknown_command"]
-            reply_markup = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🏠 Ana Menyuya Qayıt", callback_data="back_to_menu")]
-            ])
-            await query.message.reply_text(message, parse_mode="Markdown", reply_markup=reply_markup)
-            return
+        await CALLBACK_ROUTER.dispatch(query, context)
+    except asyncio.TimeoutError:
+        await query.message.reply_text(TRANSLATIONS["service_unavailable"], reply_markup=BACK_TO_MENU_KEYBOARD)
     except Exception as e:
         logger.error(f"Error in button_handler: {e}")
         message = TRANSLATIONS["error_occurred"].format(str(e))
-        reply_markup = InlineKeyboardMarkup([
-            [InlineKeyboardButton("🏠 Ana Menyuya Qayıt", callback_data="back_to_menu")]
-        ])
-        await query.message.reply_text(message, parse_mode="Markdown", reply_markup=reply_markup)
+        await query.message.reply_text(message, parse_mode="Markdown", reply_markup=BACK_TO_MENU_KEYBOARD)
+
+
+def get_router_status():
+    """Per-route call counts and latencies for diagnostics"""
+    return CALLBACK_ROUTER.get_status()
 
 
 # Command handlers
+# The fetchers block (HTTP, shared cache I/O, single-flight waits), so they run
+# in worker threads instead of holding up every other update on the loop
 async def standings_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_user:
         logger.info(f"User {update.effective_user.id} requested standings")
@@ -2009,7 +2239,7 @@ async def standings_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.info("User requested standings (unknown user)")
     if isinstance(update.message, Message):
         await update.message.reply_text(TRANSLATIONS["loading"])
-        message = get_current_standings()
+        message = await asyncio.to_thread(get_current_standings)
         await update.message.reply_text(message, parse_mode="Markdown")
 
 
@@ -2020,7 +2250,7 @@ async def constructors_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.info("User requested constructor standings (unknown user)")
     if isinstance(update.message, Message):
         await update.message.reply_text(TRANSLATIONS["loading"])
-        message = get_constructor_standings()
+        message = await asyncio.to_thread(get_constructor_standings)
         await update.message.reply_text(message, parse_mode="Markdown")
 
 
@@ -2031,7 +2261,7 @@ async def lastrace_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.info("User requested last race results (unknown user)")
     if isinstance(update.message, Message):
         await update.message.reply_text(TRANSLATIONS["loading"])
-        message = get_last_session_results()
+        message = await asyncio.to_thread(get_last_session_results)
         await update.message.reply_text(message, parse_mode="Markdown")
 
 
@@ -2042,35 +2272,111 @@ async def nextrace_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.info("User requested next race (unknown user)")
     if isinstance(update.message, Message):
         await update.message.reply_text(TRANSLATIONS["loading"])
-        message = get_next_race()
+        timezone = await asyncio.to_thread(get_chat_timezone, update.message.chat_id)
+        message = await asyncio.to_thread(get_next_race, timezone)
         await update.message.reply_text(message, parse_mode="Markdown")
 
 
+async def timezone_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show or set the chat's timezone: /timezone Europe/London"""
+    if isinstance(update.message, Message):
+        chat_id = update.message.chat_id
+        if not context.args:
+            current = await asyncio.to_thread(get_chat_timezone, chat_id)
+            await update.message.reply_text(
+                TRANSLATIONS["timezone_current"].format(display_name(current)), parse_mode="Markdown"
+            )
+            return
+        timezone = resolve_timezone(" ".join(context.args))
+        if timezone is None:
+            await update.message.reply_text(TRANSLATIONS["timezone_invalid"].format(" ".join(context.args)))
+            return
+        if not await asyncio.to_thread(set_chat_timezone, chat_id, timezone):
+            await update.message.reply_text(TRANSLATIONS["timezone_save_failed"])
+            return
+        await update.message.reply_text(
+            TRANSLATIONS["timezone_set"].format(display_name(timezone)), parse_mode="Markdown"
+        )
+
+
+def _parse_topics(args):
+    """Topics named in command args (all topics when none given), or None if invalid"""
+    if not args:
+        return TOPICS
+    topics = tuple(arg.lower() for arg in args)
+    if any(topic not in TOPICS for topic in topics):
+        return None
+    return topics
+
+
+def _topic_labels(topics):
+    return ", ".join(TRANSLATIONS[f"topic_{topic}"] for topic in topics)
+
+
+async def subscribe_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_user:
+        logger.info(f"User {update.effective_user.id} subscribed to notifications")
+    if isinstance(update.message, Message):
+        topics = _parse_topics(context.args)
+        if topics is None:
+            await update.message.reply_text(TRANSLATIONS["subscribe_usage"])
+            return
+        await asyncio.to_thread(subscribe, update.message.chat_id, topics)
+        current = await asyncio.to_thread(get_chat_topics, update.message.chat_id)
+        await update.message.reply_text(TRANSLATIONS["subscribe_done"].format(_topic_labels(current)))
+
+
+async def unsubscribe_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_user:
+        logger.info(f"User {update.effective_user.id} unsubscribed from notifications")
+    if isinstance(update.message, Message):
+        topics = _parse_topics(context.args)
+        if topics is None:
+            await update.message.reply_text(TRANSLATIONS["subscribe_usage"])
+            return
+        removed = await asyncio.to_thread(unsubscribe, update.message.chat_id, topics)
+        if not removed:
+            await update.message.reply_text(TRANSLATIONS["not_subscribed"])
+            return
+        await update.message.reply_text(TRANSLATIONS["unsubscribe_done"].format(_topic_labels(removed)))
+
+
 async def live_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Live timing using Playwright scraper from formula-timer.com"""
+    """Live timing from the best available live source (formula-timer.com, OpenF1, ...)"""
     if update.effective_user:
         logger.info(f"User {update.effective_user.id} requested live timing")
     else:
         logger.info("User requested live timing (unknown user)")
     if isinstance(update.message, Message):
-        # First check if there's an active F1 session
-        if not check_active_f1_session():
-            await update.message.reply_text(
-                "❌ *Hal-hazırda aktiv F1 sessiyası yoxdur*\n\n🔴 Canlı vaxt yalnız F1 yarış həftəsonlarında mövcuddur.\n\n📊 Canlı vaxt göstərir:\n• Sürücülərin mövqeləri\n• Interval vaxtları\n• Ən yaxşı dövrə vaxtları\n• Təkər məlumatları\n• Hər çağırışda yenilənən məlumatlar\n\nAlternativlər:\n• /nextrace - Gələn yarış və hava proqnozu\n• /lastrace - Son sessiya nəticələri",
-                parse_mode="Markdown"
-            )
+        mode = context.args[0].lower() if context.args else ""
+        if mode in ("stop", "unsubscribe"):
+            from f1_live import unsubscribe_chat
+            if not await unsubscribe_chat(context.bot, update.message.chat_id):
+                await update.message.reply_text(TRANSLATIONS["live_not_subscribed"])
+            return
+
+        # First check if there's an active F1 session; the OpenF1 call may retry with backoff
+        if not await asyncio.to_thread(check_active_f1_session):
+            await update.message.reply_text(NO_ACTIVE_SESSION_MESSAGE, parse_mode="Markdown")
+            return
+
+        if mode == "subscribe":
+            # One message per chat, edited in place by the shared live poller
+            from f1_live import subscribe_chat
+            live_msg = await update.message.reply_text(TRANSLATIONS["live_subscribed"])
+            await subscribe_chat(context.bot, update.message.chat_id, live_msg.message_id)
             return
 
         loading_msg = await update.message.reply_text(
-            "🔴 Canlı vaxt məlumatları yüklənir...\n\n⏳ Formula-timer.com saytından məlumatlar alınır..."
+            "🔴 Canlı vaxt məlumatları yüklənir...\n\n⏳ Məlumatlar alınır..."
         )
 
         try:
-            # Import the Playwright scraper
-            from f1_playwright_scraper import get_optimized_live_timing, format_timing_data_for_telegram
+            from f1_live_sources import get_live_timing
+            from f1_playwright_scraper_fixed import format_timing_data_for_telegram
 
-            # Get live timing data using Playwright
-            live_data = await get_optimized_live_timing()
+            # Ranked sources with failover (formula-timer.com, then OpenF1)
+            live_data = await get_live_timing()
 
             if not live_data:
                 # Send new message instead of editing
@@ -2083,18 +2389,11 @@ async def live_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
             # Format the data for Telegram
             live_message = format_timing_data_for_telegram(live_data)
 
-            # Add a refresh button for users
-            keyboard = [
-                [InlineKeyboardButton(TRANSLATIONS["live_refresh_button"], callback_data="live_refresh")],
-                [InlineKeyboardButton("🏠 Ana Menyuya Qayıt", callback_data="back_to_menu")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-
             # Send new message instead of editing
             await update.message.reply_text(
                 live_message,
                 parse_mode="Markdown",
-                reply_markup=reply_markup
+                reply_markup=LIVE_KEYBOARD
             )
 
         except Exception as e:
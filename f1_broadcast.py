@@ -0,0 +1,387 @@
+"""
+Opt-in notification broadcasts
+Subscriptions (session reminders, published results) live in a local SQLite
+database. Each notification is rendered once, stored with its broadcast, and
+delivered to subscribers in chat_id order by a rate-limited job whose cursor
+is checkpointed, so a restart resumes where delivery stopped.
+"""
+
+import os
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from collections import deque
+
+from telegram.error import BadRequest, Forbidden, RetryAfter, NetworkError
+
+from f1_outbound import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_PATH = os.getenv("F1_BROADCAST_PATH", "/tmp/f1_broadcast.sqlite3")
+
+TOPICS = ("reminders", "results")
+
+# Messages per second for broadcasts - below Telegram's ~30/s so interactive replies keep headroom
+BROADCAST_RATE = float(os.getenv("F1_BROADCAST_RATE", "25"))
+# Sends in flight at once per broadcast
+BROADCAST_CONCURRENCY = int(os.getenv("F1_BROADCAST_CONCURRENCY", "10"))
+# Subscribers read from the database per query
+PAGE_SIZE = 1000
+# Progress is written at most this often (seconds)
+CHECKPOINT_INTERVAL = 1.0
+# A running broadcast is owned by one process for this long unless renewed (seconds)
+LEASE_DURATION = 60
+MAX_SEND_ATTEMPTS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscriptions (
+    chat_id INTEGER NOT NULL,
+    topic TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (topic, chat_id)
+);
+CREATE TABLE IF NOT EXISTS broadcasts (
+    broadcast_id TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    text TEXT NOT NULL,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    cursor INTEGER,
+    sent INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    lease_owner TEXT,
+    lease_until REAL
+);
+"""
+
+_BROADCAST_COLUMNS = (
+    "broadcast_id", "topic", "text", "status", "total", "cursor", "sent",
+    "failed", "created_at", "started_at", "finished_at",
+)
+
+_LOCK = threading.Lock()
+_CONNECTION = None
+_OWNER = f"{os.getpid()}-{id(_LOCK)}"
+
+BROADCAST_STATE = {
+    "task": None,
+}
+
+BROADCAST_STATS = {
+    "delivered": 0,
+    "failed": 0,
+    "retry_after": 0,
+    "unsubscribed_blocked": 0,
+}
+
+
+def _connect():
+    global _CONNECTION
+    if _CONNECTION is None:
+        directory = os.path.dirname(BROADCAST_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _CONNECTION = sqlite3.connect(BROADCAST_PATH, check_same_thread=False)
+        _CONNECTION.execute("PRAGMA journal_mode=WAL")
+        _CONNECTION.executescript(_SCHEMA)
+        _CONNECTION.commit()
+    return _CONNECTION
+
+
+def _execute(sql, params=(), fetch=None):
+    with _LOCK:
+        connection = _connect()
+        cursor = connection.execute(sql, params)
+        if fetch == "one":
+            result = cursor.fetchone()
+        elif fetch == "all":
+            result = cursor.fetchall()
+        else:
+            result = cursor.rowcount
+        connection.commit()
+    return result
+
+
+# Subscriptions
+
+def subscribe(chat_id, topics=TOPICS):
+    """Opt a chat in to the given topics; returns the topics newly added"""
+    added = []
+    for topic in topics:
+        if topic not in TOPICS:
+            continue
+        if _execute(
+            "INSERT OR IGNORE INTO subscriptions (chat_id, topic, created_at) VALUES (?, ?, ?)",
+            (chat_id, topic, time.time()),
+        ):
+            added.append(topic)
+    return added
+
+
+def unsubscribe(chat_id, topics=TOPICS):
+    """Opt a chat out of the given topics; returns the topics removed"""
+    removed = []
+    for topic in topics:
+        if _execute("DELETE FROM subscriptions WHERE chat_id = ? AND topic = ?", (chat_id, topic)):
+            removed.append(topic)
+    return removed
+
+
+def get_chat_topics(chat_id):
+    rows = _execute("SELECT topic FROM subscriptions WHERE chat_id = ?", (chat_id,), fetch="all")
+    return sorted(row[0] for row in rows)
+
+
+def count_subscribers(topic):
+    return _execute("SELECT COUNT(*) FROM subscriptions WHERE topic = ?", (topic,), fetch="one")[0]
+
+
+def _subscriber_page(topic, after, limit=PAGE_SIZE):
+    if after is None:
+        rows = _execute(
+            "SELECT chat_id FROM subscriptions WHERE topic = ? ORDER BY chat_id LIMIT ?",
+            (topic, limit), fetch="all",
+        )
+    else:
+        rows = _execute(
+            "SELECT chat_id FROM subscriptions WHERE topic = ? AND chat_id > ? ORDER BY chat_id LIMIT ?",
+            (topic, after, limit), fetch="all",
+        )
+    return [row[0] for row in rows]
+
+
+# Broadcasts
+
+def create_broadcast(broadcast_id, topic, text):
+    """Queue a rendered notification for every subscriber of `topic`
+
+    broadcast_id is deterministic per event (e.g. "results-2025-5-Race"), so
+    re-triggering the same event never sends it twice. Returns True if queued now.
+    """
+    if topic not in TOPICS or not text:
+        return False
+    created = _execute(
+        "INSERT OR IGNORE INTO broadcasts (broadcast_id, topic, text, status, total, created_at) "
+        "VALUES (?, ?, ?, 'pending', ?, ?)",
+        (broadcast_id, topic, text, count_subscribers(topic), time.time()),
+    )
+    if created:
+        logger.info(f"Broadcast {broadcast_id} queued for topic {topic}")
+    return bool(created)
+
+
+def get_broadcast(broadcast_id):
+    row = _execute(
+        f"SELECT {', '.join(_BROADCAST_COLUMNS)} FROM broadcasts WHERE broadcast_id = ?",
+        (broadcast_id,), fetch="one",
+    )
+    return dict(zip(_BROADCAST_COLUMNS, row)) if row else None
+
+
+def _claim(broadcast_id):
+    """Take (or renew) the lease on a broadcast so only one process delivers it"""
+    now = time.time()
+    return _execute(
+        "UPDATE broadcasts SET lease_owner = ?, lease_until = ?, status = 'running', "
+        "started_at = COALESCE(started_at, ?) "
+        "WHERE broadcast_id = ? AND status IN ('pending', 'running') "
+        "AND (lease_owner = ? OR lease_until IS NULL OR lease_until < ?)",
+        (_OWNER, now + LEASE_DURATION, now, broadcast_id, _OWNER, now),
+    ) == 1
+
+
+def _checkpoint(broadcast_id, cursor, sent, failed, finished=False):
+    now = time.time()
+    if finished:
+        _execute(
+            "UPDATE broadcasts SET cursor = ?, sent = ?, failed = ?, status = 'done', "
+            "finished_at = ?, lease_owner = NULL, lease_until = NULL "
+            "WHERE broadcast_id = ? AND lease_owner = ?",
+            (cursor, sent, failed, now, broadcast_id, _OWNER),
+        )
+    else:
+        _execute(
+            "UPDATE broadcasts SET cursor = ?, sent = ?, failed = ?, lease_until = ? "
+            "WHERE broadcast_id = ? AND lease_owner = ?",
+            (cursor, sent, failed, now + LEASE_DURATION, broadcast_id, _OWNER),
+        )
+
+
+def _release(broadcast_id):
+    _execute(
+        "UPDATE broadcasts SET lease_owner = NULL, lease_until = NULL "
+        "WHERE broadcast_id = ? AND lease_owner = ?",
+        (broadcast_id, _OWNER),
+    )
+
+
+async def _deliver(bot, chat_id, text, bucket):
+    """Send one notification; returns True when delivered"""
+    extra = {"rate_limit_args": {"priority": "broadcast"}} if getattr(bot, "rate_limiter", None) else {}
+    for attempt in range(MAX_SEND_ATTEMPTS):
+        try:
+            await bot.send_message(chat_id, text, parse_mode="Markdown", **extra)
+            return True
+        except RetryAfter as e:
+            BROADCAST_STATS["retry_after"] += 1
+            retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else float(e.retry_after)
+            # Flood control applies to the whole bot - pause every sender
+            bucket.block(time.monotonic() + retry_after)
+            await asyncio.sleep(retry_after)
+        except Forbidden:
+            # Bot was blocked or removed from the chat - stop sending to it
+            await asyncio.to_thread(unsubscribe, chat_id)
+            BROADCAST_STATS["unsubscribed_blocked"] += 1
+            return False
+        except BadRequest as e:
+            if "chat not found" in str(e).lower():
+                await asyncio.to_thread(unsubscribe, chat_id)
+                BROADCAST_STATS["unsubscribed_blocked"] += 1
+            else:
+                logger.warning(f"Broadcast to {chat_id} rejected: {e}")
+            return False
+        except NetworkError as e:
+            logger.warning(f"Broadcast to {chat_id} failed (attempt {attempt + 1}): {e}")
+            await asyncio.sleep(2 ** attempt)
+    return False
+
+
+async def run_broadcast(bot, broadcast_id, deadline=None, rate=None):
+    """Deliver a broadcast from its checkpoint
+
+    Stops early (leaving it resumable) once the monotonic `deadline` passes.
+    Returns the broadcast record, or None if another process owns it.
+    """
+    # SQLite calls run in a worker thread so a busy database never stalls the loop
+    if not await asyncio.to_thread(_claim, broadcast_id):
+        return None
+    record = await asyncio.to_thread(get_broadcast, broadcast_id)
+    topic, text = record["topic"], record["text"]
+    sent, failed = record["sent"], record["failed"]
+    cursor = record["cursor"]
+
+    bucket = TokenBucket(rate or BROADCAST_RATE, rate or BROADCAST_RATE)
+    semaphore = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+    # Dispatched chats in order as [chat_id, done, delivered]; the checkpoint
+    # cursor only advances over a fully finished prefix
+    window = deque()
+    tasks = set()
+    last_checkpoint = time.monotonic()
+
+    def advance():
+        nonlocal cursor, sent, failed
+        while window and window[0][1]:
+            chat_id, _, delivered = window.popleft()
+            cursor = chat_id
+            if delivered:
+                sent += 1
+            else:
+                failed += 1
+
+    async def send(entry):
+        try:
+            entry[2] = await _deliver(bot, entry[0], text, bucket)
+        except Exception as e:
+            logger.error(f"Broadcast {broadcast_id} to {entry[0]} failed: {e}")
+            entry[2] = False
+        finally:
+            entry[1] = True
+            BROADCAST_STATS["delivered" if entry[2] else "failed"] += 1
+            semaphore.release()
+
+    read_after = cursor
+    stopped = False
+    try:
+        while not stopped:
+            page = await asyncio.to_thread(_subscriber_page, topic, read_after)
+            if not page:
+                break
+            for chat_id in page:
+                if deadline is not None and time.monotonic() >= deadline:
+                    stopped = True
+                    break
+                await semaphore.acquire()
+                wait = bucket.wait_time(time.monotonic())
+                while wait > 0:
+                    await asyncio.sleep(wait)
+                    wait = bucket.wait_time(time.monotonic())
+                bucket.take(time.monotonic())
+
+                entry = [chat_id, False, False]
+                window.append(entry)
+                task = asyncio.get_running_loop().create_task(send(entry))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                read_after = chat_id
+
+                advance()
+                if time.monotonic() - last_checkpoint >= CHECKPOINT_INTERVAL:
+                    await asyncio.to_thread(_checkpoint, broadcast_id, cursor, sent, failed)
+                    last_checkpoint = time.monotonic()
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        advance()
+        await asyncio.to_thread(_checkpoint, broadcast_id, cursor, sent, failed, not stopped)
+    except BaseException:
+        # Cancelled or crashed: persist the finished prefix so a restart resumes after it.
+        # Inline, since a second cancellation must not skip the checkpoint or the release
+        advance()
+        _checkpoint(broadcast_id, cursor, sent, failed)
+        _release(broadcast_id)
+        raise
+    if stopped:
+        await asyncio.to_thread(_release, broadcast_id)
+    logger.info(f"Broadcast {broadcast_id}: {sent} sent, {failed} failed{' (paused)' if stopped else ''}")
+    return await asyncio.to_thread(get_broadcast, broadcast_id)
+
+
+def pending_broadcasts():
+    rows = _execute(
+        "SELECT broadcast_id FROM broadcasts WHERE status IN ('pending', 'running') ORDER BY created_at",
+        fetch="all",
+    )
+    return [row[0] for row in rows]
+
+
+async def resume_broadcasts(bot, budget=None):
+    """Deliver every unfinished broadcast, optionally within `budget` seconds"""
+    deadline = time.monotonic() + budget if budget else None
+    for broadcast_id in await asyncio.to_thread(pending_broadcasts):
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        await run_broadcast(bot, broadcast_id, deadline)
+
+
+def start_broadcast_worker(bot):
+    """Run pending broadcasts in the background on the current loop (idempotent)"""
+    task = BROADCAST_STATE["task"]
+    if (task is None or task.done()) and pending_broadcasts():
+        BROADCAST_STATE["task"] = asyncio.get_running_loop().create_task(resume_broadcasts(bot))
+    return BROADCAST_STATE["task"]
+
+
+def get_broadcast_status(limit=10):
+    """Subscriber counts and recent broadcast progress for diagnostics"""
+    rows = _execute(
+        f"SELECT {', '.join(_BROADCAST_COLUMNS)} FROM broadcasts ORDER BY created_at DESC LIMIT ?",
+        (limit,), fetch="all",
+    )
+    broadcasts = []
+    for row in rows:
+        record = dict(zip(_BROADCAST_COLUMNS, row))
+        record.pop("text")
+        broadcasts.append(record)
+    task = BROADCAST_STATE["task"]
+    return {
+        "subscribers": {topic: count_subscribers(topic) for topic in TOPICS},
+        "worker_running": task is not None and not task.done(),
+        "broadcasts": broadcasts,
+        "stats": dict(BROADCAST_STATS),
+    }
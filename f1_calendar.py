@@ -0,0 +1,83 @@
+"""
+F1 season calendar helpers
+Loads the Jolpica season JSON and exposes each weekend's sessions as UTC datetimes
+"""
+
+import logging
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from f1_http import conditional_get_json, JOLPICA_URL
+
+logger = logging.getLogger(__name__)
+
+# Jolpica weekend session fields in chronological order (race itself is top-level)
+WEEKEND_SESSIONS = [
+    ("FirstPractice", "fp1"),
+    ("SecondPractice", "fp2"),
+    ("ThirdPractice", "fp3"),
+    ("SprintQualifying", "sprint_qualifying"),
+    ("SprintShootout", "sprint_qualifying"),
+    ("Sprint", "sprint"),
+    ("Qualifying", "qualifying"),
+]
+
+# Expected session length plus the time OpenF1 and Jolpica need to publish
+# final results - after this, standings and last-session data are settled
+RESULTS_DELAY = {
+    "Race": timedelta(hours=2, minutes=30),
+    "Sprint": timedelta(hours=1, minutes=30),
+    "Qualifying": timedelta(hours=1, minutes=30),
+}
+
+
+def current_season(now=None):
+    """Season whose calendar is relevant right now"""
+    now = now or datetime.now(ZoneInfo("UTC"))
+    return now.year
+
+
+def parse_session_datetime(date, time):
+    """Parse Jolpica date + time into an aware UTC datetime (None if TBA/invalid)"""
+    if not date or not time or time == "TBA":
+        return None
+    try:
+        dt = datetime.fromisoformat(f"{date}T{time.replace('Z', '')}")
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=ZoneInfo("UTC"))
+    return dt
+
+
+def race_sessions(race):
+    """All timed sessions of a race weekend as dicts sorted by start time
+
+    Each entry: {"key": "Qualifying", "name": "qualifying", "start": datetime}
+    where name is the TRANSLATIONS key for the session label.
+    """
+    sessions = []
+    for key, name in WEEKEND_SESSIONS:
+        info = race.get(key) or {}
+        start = parse_session_datetime(info.get("date"), info.get("time"))
+        if start:
+            sessions.append({"key": key, "name": name, "start": start})
+    start = parse_session_datetime(race.get("date"), race.get("time"))
+    if start:
+        sessions.append({"key": "Race", "name": "race", "start": start})
+    sessions.sort(key=lambda s: s["start"])
+    return sessions
+
+
+def get_season_races(season=None):
+    """Fetch the season's races from Jolpica (revalidated with ETag when cached)"""
+    season = season or current_season()
+    url = f"{JOLPICA_URL}/ergast/f1/{season}.json"
+    try:
+        data, _ = conditional_get_json(url, timeout=30)
+    except Exception as e:
+        logger.error(f"Error fetching season calendar {season}: {e}")
+        return []
+    if not data:
+        return []
+    return data.get("MRData", {}).get("RaceTable", {}).get("Races", [])
@@ -0,0 +1,178 @@
+"""
+CPU stage for parsing and heavy transformations
+HTML parsing and large payload reductions are submitted here instead of
+running on an event loop thread, where they would stall every other update.
+F1_PARSE_EXECUTOR picks the pool:
+
+    thread   - a small thread pool (default); the loop keeps running between
+               GIL switches, and parsers that release the GIL (lxml) run in
+               parallel with it
+    process  - a process pool; pure-Python work (BeautifulSoup's html.parser,
+               the OpenF1 position reduction) stops competing with the loop
+               for the GIL, at the cost of pickling arguments and results
+    inline   - run in the caller (debugging, single-core hosts)
+
+Submitted functions must be module-level and take and return plain data (an
+HTML string or response bytes in, dicts and lists out) so the same call works
+with either pool and crosses a process boundary cheaply.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from f1_metrics import histogram
+from f1_trace import span, bind_context
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ("thread", "process", "inline")
+PARSE_EXECUTOR = os.getenv("F1_PARSE_EXECUTOR", "thread")
+PARSE_WORKERS = int(os.getenv("F1_PARSE_WORKERS", "2"))
+
+CPU_STAGE_LATENCY = histogram("f1_cpu_stage_duration_seconds",
+                              "Time from submitting CPU work to having its result",
+                              ("function", "executor"))
+
+EXECUTOR_STATE = {
+    "kind": PARSE_EXECUTOR if PARSE_EXECUTOR in EXECUTOR_KINDS else "thread",
+    "workers": PARSE_WORKERS,
+    "executor": None,
+}
+
+EXECUTOR_STATS = {
+    "submitted": 0,
+    "completed": 0,
+    "failed": 0,
+    "inflight": 0,
+    "pool_restarts": 0,
+}
+
+_LOCK = threading.Lock()
+
+if PARSE_EXECUTOR not in EXECUTOR_KINDS:
+    logger.warning(f"Unknown F1_PARSE_EXECUTOR {PARSE_EXECUTOR!r}, using a thread pool")
+
+
+def _process_context():
+    # Forking a process that already runs the loop, the live producer thread and
+    # Playwright's driver would copy their locks mid-use; forkserver starts clean
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def _get_executor():
+    """(kind, pool); the pool is created on first use"""
+    with _LOCK:
+        kind = EXECUTOR_STATE["kind"]
+        executor = EXECUTOR_STATE["executor"]
+        if executor is None and kind != "inline":
+            workers = EXECUTOR_STATE["workers"]
+            if kind == "process":
+                executor = ProcessPoolExecutor(max_workers=workers, mp_context=_process_context())
+            else:
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="f1-cpu")
+            EXECUTOR_STATE["executor"] = executor
+            logger.info(f"CPU stage started: {kind} pool with {workers} workers")
+        return kind, executor
+
+
+def _discard_broken(executor):
+    # A worker process died (OOM, segfault in a C parser); every later submit would fail too
+    with _LOCK:
+        if EXECUTOR_STATE["executor"] is executor:
+            EXECUTOR_STATE["executor"] = None
+            EXECUTOR_STATS["pool_restarts"] += 1
+    executor.shutdown(wait=False)
+    logger.error("CPU stage process pool broke; a new one starts on the next submit")
+
+
+def configure_executor(kind=PARSE_EXECUTOR, workers=PARSE_WORKERS):
+    """Switch pools (benchmarks, tests); work already submitted to the old pool still finishes"""
+    if kind not in EXECUTOR_KINDS:
+        raise ValueError(f"executor must be one of {', '.join(EXECUTOR_KINDS)}")
+    with _LOCK:
+        old = EXECUTOR_STATE["executor"]
+        EXECUTOR_STATE.update(kind=kind, workers=workers, executor=None)
+    if old is not None:
+        old.shutdown(wait=False)
+
+
+def executor_kind():
+    return EXECUTOR_STATE["kind"]
+
+
+def _submit(kind, executor, func, args):
+    if kind == "process":
+        # Context variables don't cross processes; the caller's span times the round trip
+        return executor.submit(func, *args)
+    return executor.submit(bind_context(func), *args)
+
+
+def _finished(func, kind, started, failed):
+    EXECUTOR_STATS["inflight"] -= 1
+    EXECUTOR_STATS["failed" if failed else "completed"] += 1
+    CPU_STAGE_LATENCY.observe(time.perf_counter() - started, func.__name__, kind)
+
+
+async def run_cpu(func, *args):
+    """Run func(*args) on the CPU stage without blocking the calling loop"""
+    kind, executor = _get_executor()
+    started = time.perf_counter()
+    EXECUTOR_STATS["submitted"] += 1
+    EXECUTOR_STATS["inflight"] += 1
+    failed = True
+    with span(f"cpu:{func.__name__}", executor=kind):
+        try:
+            if executor is None:
+                result = func(*args)
+            else:
+                result = await asyncio.wrap_future(_submit(kind, executor, func, args))
+            failed = False
+            return result
+        except BrokenProcessPool:
+            _discard_broken(executor)
+            raise
+        finally:
+            _finished(func, kind, started, failed)
+
+
+def call_cpu(func, *args):
+    """Blocking variant for sync code that already runs off the loop (asyncio.to_thread)
+
+    Only a process pool is worth the hop here; with a thread pool this would
+    just trade one worker thread for another, so the call runs in place.
+    """
+    kind, executor = _get_executor()
+    if kind != "process":
+        with span(f"cpu:{func.__name__}", executor="inline"):
+            return func(*args)
+    started = time.perf_counter()
+    EXECUTOR_STATS["submitted"] += 1
+    EXECUTOR_STATS["inflight"] += 1
+    failed = True
+    with span(f"cpu:{func.__name__}", executor=kind):
+        try:
+            result = executor.submit(func, *args).result()
+            failed = False
+            return result
+        except BrokenProcessPool:
+            _discard_broken(executor)
+            raise
+        finally:
+            _finished(func, kind, started, failed)
+
+
+def get_executor_status():
+    return {
+        "kind": EXECUTOR_STATE["kind"],
+        "workers": EXECUTOR_STATE["workers"],
+        "started": EXECUTOR_STATE["executor"] is not None,
+        "stats": dict(EXECUTOR_STATS),
+    }
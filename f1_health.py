@@ -0,0 +1,205 @@
+"""
+Health and readiness checks
+Each check reads state the bot already keeps in memory (cache timestamps,
+per-host upstream outcomes, the shared live snapshot's mtime, loop heartbeat,
+queue lengths), so a full report costs well under a millisecond and can be
+polled every few seconds. Modules that aren't loaded in this process report
+"unknown" instead of being imported just to be checked.
+
+Liveness fails only when this process is wedged (stalled loop, runaway send
+queue); readiness also fails on blown cache freshness budgets and on missing
+configuration. A stale live snapshot is reported as degraded only: it follows
+from formula-timer.com or Playwright being unavailable, which a restart
+doesn't fix.
+"""
+
+import os
+import sys
+import time
+
+OK = "ok"
+DEGRADED = "degraded"
+CRITICAL = "critical"
+UNKNOWN = "unknown"
+_SEVERITY = {UNKNOWN: 0, OK: 0, DEGRADED: 1, CRITICAL: 2}
+
+# Freshness budgets (seconds) beyond which a check turns critical (the live snapshot: degraded)
+LIVE_SNAPSHOT_BUDGET = float(os.getenv("F1_HEALTH_LIVE_BUDGET", "60"))
+LOOP_STALL_BUDGET = float(os.getenv("F1_HEALTH_LOOP_BUDGET", "5"))
+QUEUE_DEPTH_BUDGET = int(os.getenv("F1_HEALTH_QUEUE_BUDGET", "500"))
+# A cache entry older than this many TTLs is stale beyond what revalidation explains
+CACHE_STALE_FACTOR = 3
+# Entries the prefetch scheduler keeps warm; the rest (live session, positions) are only
+# refreshed when someone asks, so their age says nothing about this process
+PREFETCHED_CACHES = ("standings", "constructor_standings", "last_session", "next_race")
+
+# Checks that decide liveness; the rest only affect readiness
+LIVENESS_CHECKS = ("event_loop", "queues")
+
+STARTED_AT = time.time()
+
+
+def _loaded(name):
+    return sys.modules.get(name)
+
+
+def check_caches(now):
+    bot = _loaded("f1_bot_live")
+    if bot is None:
+        return {"status": UNKNOWN}
+    # Without the prefetch scheduler entries age whenever nobody asks, which is not a fault
+    scheduler = _loaded("f1_scheduler")
+    task = scheduler.SCHEDULER_STATE["task"] if scheduler else None
+    prefetching = task is not None and not task.done()
+    entries = {}
+    status = OK
+    for key, entry in bot.CACHE.items():
+        ttl = entry.get("ttl", entry["expiry"])
+        if entry["data"] is None or not entry["timestamp"]:
+            entries[key] = {"status": UNKNOWN, "age": None, "ttl": ttl}
+            continue
+        age = now - entry["timestamp"]
+        if age <= ttl:
+            entry_status = OK
+        elif age <= ttl * CACHE_STALE_FACTOR or not prefetching or key not in PREFETCHED_CACHES:
+            entry_status = DEGRADED
+        else:
+            entry_status = CRITICAL
+        entries[key] = {"status": entry_status, "age": round(age, 1), "ttl": ttl}
+        status = max(status, entry_status, key=_SEVERITY.get)
+    return {"status": status, "prefetching": prefetching, "entries": entries}
+
+
+def check_upstreams(now):
+    http = _loaded("f1_http")
+    if http is None:
+        return {"status": UNKNOWN}
+    hosts = {}
+    status = OK
+    for host, state in http.get_upstream_state().items():
+        # Upstream outages degrade the bot (stale data is served) but restarting it won't help
+        if state["state"] != "up":
+            status = DEGRADED
+        hosts[host] = {
+            "state": state["state"],
+            "consecutive_failures": state["consecutive_failures"],
+            "last_status": state["last_status"],
+            "last_success_age": round(now - state["last_success"], 1) if state["last_success"] else None,
+            "last_failure_age": round(now - state["last_failure"], 1) if state["last_failure"] else None,
+        }
+    return {"status": status, "hosts": hosts}
+
+
+def check_live_producer(now):
+    producer = _loaded("f1_live_producer")
+    if producer is None:
+        return {"status": UNKNOWN}
+    snapshot = producer.read_snapshot()
+    demand_age = producer._demand_age()
+    in_demand = demand_age < producer.PRODUCER_IDLE_TIMEOUT
+    snapshot_age = now - snapshot["updated_at"] if snapshot else None
+    thread = producer.PRODUCER_STATE["thread"]
+    scraper = _loaded("f1_playwright_scraper_fixed")
+    status = OK
+    # Upstream trouble (site down, no browser, leftover snapshot file), never grounds for a restart
+    if in_demand and (snapshot_age is None or snapshot_age > LIVE_SNAPSHOT_BUDGET):
+        status = DEGRADED
+    metrics = _loaded("f1_metrics")
+    return {
+        "status": status,
+        "in_demand": in_demand,
+        "snapshot_age": round(snapshot_age, 1) if snapshot_age is not None else None,
+        "snapshot_version": snapshot["version"] if snapshot else None,
+        "leader_pid": snapshot["producer_pid"] if snapshot else None,
+        "scrape": producer.read_scrape_status(),
+        "browser": {
+            "is_leader": producer.PRODUCER_STATE["is_leader"],
+            "candidate_running": thread is not None and thread.is_alive(),
+            "page_open": bool(scraper and scraper._scraper_instance and scraper._scraper_instance.page),
+            # Refreshed by /metrics scrapes; walking /proc here would not be cheap
+            "rss_bytes": metrics.BROWSER_RSS.get() if metrics else None,
+        },
+    }
+
+
+def check_event_loop(now):
+    monitor_module = _loaded("f1_loop_monitor")
+    monitor = monitor_module.MONITOR_STATE["monitor"] if monitor_module else None
+    if monitor is None:
+        return {"status": UNKNOWN}
+    loop = monitor.loop
+    stalled_for = 0.0
+    if not loop.is_closed() and loop.is_running() and not monitor.paused:
+        stalled_for = max(0.0, time.monotonic() - monitor.last_beat - monitor.interval)
+    current_lag = monitor_module.LOOP_LAG_CURRENT.get() or 0.0
+    if stalled_for > LOOP_STALL_BUDGET:
+        status = CRITICAL
+    elif stalled_for > monitor.threshold or current_lag > monitor.threshold:
+        status = DEGRADED
+    else:
+        status = OK
+    return {
+        "status": status,
+        "stalled_for": round(stalled_for, 3),
+        "current_lag": current_lag,
+        "max_lag": round(monitor.max_lag, 4),
+        "blocked": monitor.blocked,
+    }
+
+
+def check_queues(now):
+    outbound = _loaded("f1_outbound")
+    render = _loaded("f1_render")
+    if outbound is None and render is None:
+        return {"status": UNKNOWN}
+    result = {"status": OK}
+    if outbound is not None:
+        scheduler = outbound.OUTBOUND_SCHEDULER
+        depth = sum(len(lane) for lane in scheduler.lanes.values())
+        result["outbound_depth"] = depth
+        result["outbound_inflight"] = len(scheduler.inflight)
+        if depth > QUEUE_DEPTH_BUDGET:
+            result["status"] = CRITICAL
+    if render is not None:
+        result["pending_renders"] = len(render.RENDER_TASKS)
+    return result
+
+
+def check_config(now):
+    missing = [name for name in ("TELEGRAM_BOT_TOKEN",) if not os.getenv(name)]
+    return {"status": CRITICAL if missing else OK, "missing": missing}
+
+
+CHECKS = {
+    "config": check_config,
+    "caches": check_caches,
+    "upstreams": check_upstreams,
+    "live_producer": check_live_producer,
+    "event_loop": check_event_loop,
+    "queues": check_queues,
+}
+
+
+def get_health(readiness=False):
+    """(healthy, report): liveness by default, readiness with readiness=True"""
+    started = time.perf_counter()
+    now = time.time()
+    checks = {}
+    for name, check in CHECKS.items():
+        try:
+            checks[name] = check(now)
+        except Exception as e:
+            checks[name] = {"status": UNKNOWN, "error": str(e)}
+    deciding = checks if readiness else {name: checks[name] for name in LIVENESS_CHECKS}
+    status = max((check["status"] for check in deciding.values()), key=_SEVERITY.get, default=OK)
+    if status == UNKNOWN:
+        status = OK
+    report = {
+        "status": status,
+        "kind": "readiness" if readiness else "liveness",
+        "uptime": round(now - STARTED_AT, 1),
+        "pid": os.getpid(),
+        "checks": checks,
+        "check_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+    return status != CRITICAL, report
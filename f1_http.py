@@ -0,0 +1,430 @@
+"""
+HTTP helpers for upstream F1 APIs (OpenF1, Jolpica, Open-Meteo)
+Retries with jittered exponential backoff, optional hedged requests,
+conditional revalidation (ETag / Last-Modified) and streaming JSON decoding
+"""
+
+import os
+import re
+import json
+import codecs
+import time
+import random
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from email.utils import parsedate_to_datetime
+from datetime import datetime
+from urllib.parse import urlsplit
+from zoneinfo import ZoneInfo
+
+import requests
+
+from f1_metrics import UPSTREAM_REQUESTS, UPSTREAM_LATENCY
+from f1_trace import span, bind_context
+
+# orjson decodes whole batches of streamed elements at C speed when available
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Upstream base URLs; override to point the bot at a local emulator
+# (benchmarks/emulator.py) for offline load tests and profiling
+JOLPICA_URL = os.getenv("F1_JOLPICA_URL", "https://api.jolpi.ca").rstrip("/")
+OPENF1_URL = os.getenv("F1_OPENF1_URL", "https://api.openf1.org").rstrip("/")
+OPEN_METEO_URL = os.getenv("F1_OPEN_METEO_URL", "https://api.open-meteo.com").rstrip("/")
+GEOCODING_URL = os.getenv("F1_GEOCODING_URL", "https://geocoding-api.open-meteo.com").rstrip("/")
+# python-telegram-bot base_url (the token is appended to it)
+TELEGRAM_BOT_API_URL = os.getenv("F1_TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/") + "/bot"
+
+# Status codes worth retrying - rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Hedging is on by default for callers that ask for it; set F1_HTTP_HEDGE=0 to disable globally
+HEDGING_ENABLED = os.getenv("F1_HTTP_HEDGE", "1") != "0"
+
+# Hedge delay used until enough latency samples exist for a host
+DEFAULT_HEDGE_DELAY = 1.0
+MIN_HEDGE_DELAY = 0.05
+LATENCY_SAMPLES = 200
+MIN_LATENCY_SAMPLES = 20
+
+# Counters for tuning the retry and hedging policy
+HTTP_STATS = {
+    "requests": 0,
+    "attempts": 0,
+    "retries": 0,
+    "retry_after_honoured": 0,
+    "hedges": 0,
+    "hedge_wins": 0,
+    "failures": 0,
+    "revalidations": 0,
+    "not_modified": 0,
+    "bytes_saved": 0,
+}
+
+# A host answering this many attempts in a row with errors is reported down
+UPSTREAM_DOWN_AFTER = 5
+
+_STATS_LOCK = threading.Lock()
+_LATENCIES = {}
+# host -> {"last_success", "last_failure", "last_status", "consecutive_failures"}
+_UPSTREAM_STATE = {}
+# url -> {"etag", "last_modified", "size", "data"} from the last 200 response
+_VALIDATORS = {}
+_HEDGE_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="f1-http-hedge")
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, honouring Retry-After"""
+
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=8.0, max_retry_after=30.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    def backoff(self, attempt):
+        """Jittered delay before retry number `attempt` (1-based)"""
+        cap = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, cap)
+
+
+DEFAULT_RETRY = RetryPolicy()
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+def _bump(name, amount=1):
+    with _STATS_LOCK:
+        HTTP_STATS[name] += amount
+
+
+def get_http_stats():
+    """Return a snapshot of retry/hedge counters and per-host p95 latency"""
+    with _STATS_LOCK:
+        stats = dict(HTTP_STATS)
+        hosts = list(_LATENCIES)
+    stats["p95_latency"] = {host: round(get_p95_latency(host), 3) for host in hosts}
+    return stats
+
+
+def record_upstream_outcome(host, status):
+    """Track each attempt's outcome per host (status None = no response)"""
+    failed = status is None or status in RETRY_STATUSES
+    with _STATS_LOCK:
+        state = _UPSTREAM_STATE.get(host)
+        if state is None:
+            state = _UPSTREAM_STATE[host] = {"last_success": None, "last_failure": None,
+                                             "last_status": None, "consecutive_failures": 0}
+        state["last_status"] = status
+        if failed:
+            state["last_failure"] = time.time()
+            state["consecutive_failures"] += 1
+        else:
+            state["last_success"] = time.time()
+            state["consecutive_failures"] = 0
+
+
+def get_upstream_state():
+    """Last success/failure and failure streak per upstream host"""
+    with _STATS_LOCK:
+        hosts = {host: dict(state) for host, state in _UPSTREAM_STATE.items()}
+    for state in hosts.values():
+        state["state"] = "down" if state["consecutive_failures"] >= UPSTREAM_DOWN_AFTER else (
+            "degraded" if state["consecutive_failures"] else "up")
+    return hosts
+
+
+def _record_latency(host, seconds):
+    with _STATS_LOCK:
+        samples = _LATENCIES.get(host)
+        if samples is None:
+            samples = _LATENCIES[host] = deque(maxlen=LATENCY_SAMPLES)
+        samples.append(seconds)
+
+
+def get_p95_latency(host):
+    """Observed p95 latency for a host, or the default hedge delay if too few samples"""
+    with _STATS_LOCK:
+        samples = list(_LATENCIES.get(host, ()))
+    if len(samples) < MIN_LATENCY_SAMPLES:
+        return DEFAULT_HEDGE_DELAY
+    samples.sort()
+    return samples[int(len(samples) * 0.95) - 1]
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=ZoneInfo("UTC"))
+        return max(0.0, (retry_at - datetime.now(ZoneInfo("UTC"))).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _timed_get(url, host, timeout, kwargs):
+    with span("http", host=host, path=urlsplit(url).path) as current:
+        started = time.monotonic()
+        try:
+            response = requests.get(url, timeout=timeout, **kwargs)
+        except requests.RequestException:
+            UPSTREAM_REQUESTS.inc(host, "error")
+            record_upstream_outcome(host, None)
+            raise
+        current.set(status=response.status_code)
+    elapsed = time.monotonic() - started
+    _record_latency(host, elapsed)
+    UPSTREAM_LATENCY.observe(elapsed, host)
+    UPSTREAM_REQUESTS.inc(host, response.status_code)
+    record_upstream_outcome(host, response.status_code)
+    return response
+
+
+def _close_response(future):
+    """Done-callback for the request that lost a hedge: release its pooled connection"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    future.result().close()
+
+
+def _discard(futures):
+    for future in futures:
+        # Not started yet: never sent. Otherwise close it whenever it finishes
+        if not future.cancel():
+            future.add_done_callback(_close_response)
+
+
+def _hedged_get(url, host, timeout, kwargs):
+    """Fire a second request after the host's p95 latency; first response wins"""
+    delay = min(max(get_p95_latency(host), MIN_HEDGE_DELAY), timeout)
+    primary = _HEDGE_EXECUTOR.submit(bind_context(_timed_get), url, host, timeout, kwargs)
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+
+    _bump("hedges")
+    logger.info(f"Hedging request to {host} after {delay:.2f}s")
+    hedge = _HEDGE_EXECUTOR.submit(bind_context(_timed_get), url, host, timeout, kwargs)
+    pending = {primary, hedge}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                response = future.result()
+            except requests.RequestException as e:
+                error = e
+                continue
+            if future is hedge:
+                _bump("hedge_wins")
+            _discard({primary, hedge} - {future})
+            return response
+    raise error
+
+
+def http_get(url, timeout=10, retry=DEFAULT_RETRY, hedge=False, **kwargs):
+    """GET with retries on 429/5xx and network errors, optionally hedged
+
+    Returns the last response once retries are exhausted so callers can keep
+    checking status_code; raises the last network error if no response arrived.
+    """
+    host = urlsplit(url).netloc
+    hedge = hedge and HEDGING_ENABLED
+    _bump("requests")
+
+    response = None
+    for attempt in range(1, retry.max_attempts + 1):
+        _bump("attempts")
+        try:
+            if hedge:
+                response = _hedged_get(url, host, timeout, kwargs)
+            else:
+                response = _timed_get(url, host, timeout, kwargs)
+            error = None
+        except requests.RequestException as e:
+            response = None
+            error = e
+
+        if response is not None and response.status_code not in RETRY_STATUSES:
+            return response
+        if attempt == retry.max_attempts:
+            break
+
+        delay = retry.backoff(attempt)
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                if retry_after > retry.max_retry_after:
+                    logger.warning(f"{host} asked to retry after {retry_after:.0f}s, giving up")
+                    break
+                _bump("retry_after_honoured")
+                delay = max(delay, retry_after)
+            logger.warning(f"{host} returned {response.status_code}, retry {attempt} in {delay:.2f}s")
+        else:
+            logger.warning(f"Request to {host} failed ({error}), retry {attempt} in {delay:.2f}s")
+
+        if response is not None:
+            # Not returned to the caller; a streamed body would otherwise hold its connection
+            response.close()
+        _bump("retries")
+        time.sleep(delay)
+
+    _bump("failures")
+    if response is None:
+        raise error
+    return response
+
+
+def conditional_get_json(url, timeout=30, retry=DEFAULT_RETRY, **kwargs):
+    """GET JSON, revalidating with If-None-Match / If-Modified-Since when possible
+
+    Returns (data, changed). On 304 the previously parsed body is returned with
+    changed=False so callers can refresh their TTL without re-parsing or
+    re-rendering. Returns (None, True) on any other non-200 status.
+    """
+    headers = dict(kwargs.pop("headers", None) or {})
+    with _STATS_LOCK:
+        cached = _VALIDATORS.get(url)
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+        if cached.get("etag") or cached.get("last_modified"):
+            _bump("revalidations")
+
+    response = http_get(url, timeout=timeout, retry=retry, headers=headers, **kwargs)
+
+    if response.status_code == 304 and cached:
+        _bump("not_modified")
+        _bump("bytes_saved", cached["size"])
+        logger.info(f"{url} not modified, saved {cached['size']} bytes")
+        return cached["data"], False
+
+    if response.status_code != 200:
+        return None, True
+
+    data = parse_json(response)
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    with _STATS_LOCK:
+        if etag or last_modified:
+            _VALIDATORS[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "size": len(response.content),
+                "data": data,
+            }
+        else:
+            _VALIDATORS.pop(url, None)
+    return data, True
+
+
+def parse_json(response):
+    """response.json(), timed as its own span"""
+    with span("json_parse", bytes=len(response.content)):
+        return response.json()
+
+
+_ARRAY_SEPARATORS = re.compile(r"[\s,]*")
+_ELEMENT_DELIMITERS = " \t\r\n,]"
+_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+
+def iter_json_array(chunks):
+    """Incrementally decode a top-level JSON array, yielding one element at a time
+
+    Only the current chunk and the element being decoded are held in memory, so
+    callers that reduce as they go stay bounded by their own state, not by the
+    size of the payload.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    opened = closed = False
+
+    def drain(final):
+        nonlocal pos, opened, closed
+        while not closed:
+            if not opened:
+                pos = _ARRAY_SEPARATORS.match(buf, pos).end()
+                if pos >= len(buf):
+                    return
+                if buf[pos] != "[":
+                    raise ValueError("Expected a JSON array")
+                opened = True
+                pos += 1
+            pos = _ARRAY_SEPARATORS.match(buf, pos).end()
+            if pos >= len(buf):
+                return
+            if buf[pos] == "]":
+                closed = True
+                return
+            # Fast path: decode every complete object in the buffer in one call.
+            # The slice only parses if it ends on a top-level element boundary.
+            last_close = buf.rfind("}", pos)
+            if last_close > pos:
+                try:
+                    batch = _loads("[" + buf[pos:last_close + 1] + "]")
+                except ValueError:
+                    batch = None
+                if batch:
+                    pos = last_close + 1
+                    yield from batch
+                    continue
+            try:
+                element, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                return
+            # A number at the buffer edge may be truncated ("2." of "2.5"), so
+            # only accept an element once the following delimiter has arrived
+            if not final and (end >= len(buf) or buf[end] not in _ELEMENT_DELIMITERS):
+                return
+            pos = end
+            yield element
+
+    for chunk in chunks:
+        buf = buf[pos:] + text_decoder.decode(chunk)
+        pos = 0
+        yield from drain(False)
+    buf = buf[pos:] + text_decoder.decode(b"", final=True)
+    pos = 0
+    yield from drain(True)
+    if not closed:
+        raise ValueError("Truncated JSON array")
+
+
+def stream_json_array(url, timeout=10, retry=DEFAULT_RETRY, hedge=False, chunk_size=65536):
+    """GET a JSON array and yield its elements without materializing the whole list
+
+    Returns None on a non-200 status, otherwise a generator that closes the
+    response once exhausted.
+    """
+    response = http_get(url, timeout=timeout, retry=retry, hedge=hedge, stream=True)
+    if response.status_code != 200:
+        response.close()
+        return None
+
+    def elements():
+        try:
+            yield from iter_json_array(response.iter_content(chunk_size=chunk_size))
+        finally:
+            response.close()
+
+    return elements()
@@ -0,0 +1,236 @@
+"""
+Live timing subscriptions
+One shared poller per process reads live timing through f1_live_sources
+(normally the snapshot published by the host's producer, with failover to
+other sources); each subscribed chat gets a single message that is edited
+in place when the rendered text changes.
+"""
+
+import os
+import time
+import asyncio
+import logging
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest, Forbidden
+
+from f1_bot_live import TRANSLATIONS, check_active_f1_session
+from f1_trace import detach
+
+logger = logging.getLogger(__name__)
+
+# Poll cadence for the shared snapshot and minimum gap between edits per chat (seconds)
+LIVE_POLL_INTERVAL = int(os.getenv("F1_LIVE_POLL_INTERVAL", "15"))
+LIVE_EDIT_INTERVAL = int(os.getenv("F1_LIVE_EDIT_INTERVAL", "15"))
+# Subscriptions end after this long without any interaction from the chat (seconds)
+LIVE_INACTIVITY_TIMEOUT = int(os.getenv("F1_LIVE_INACTIVITY_TIMEOUT", "1800"))
+# Concurrent edits per poll tick
+LIVE_EDIT_CONCURRENCY = 10
+
+LIVE_STATE = {
+    "text": None,
+    "data": None,
+    "version": 0,
+    "updated_at": None,
+    "task": None,
+    "bot": None,
+}
+
+# chat_id -> {"message_id", "last_text", "last_edit", "last_activity"}
+LIVE_SUBSCRIPTIONS = {}
+
+LIVE_STATS = {
+    "polls": 0,
+    "snapshots": 0,
+    "edits": 0,
+    "edits_skipped": 0,
+    "edit_errors": 0,
+}
+
+
+# Keyboard attached to every subscribed message (built once)
+SUBSCRIBED_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton(TRANSLATIONS["live_unsubscribe_button"], callback_data="live_unsubscribe")],
+    [InlineKeyboardButton(TRANSLATIONS["back_to_menu_button"], callback_data="back_to_menu")],
+])
+
+
+async def fetch_live_snapshot():
+    """Latest live timing and its rendering, from the best available live source"""
+    from f1_live_sources import get_live_timing
+    from f1_playwright_scraper_fixed import format_timing_data_for_telegram
+
+    snapshot = await get_live_timing(max_age=LIVE_POLL_INTERVAL)
+    if snapshot is None:
+        return None, None
+    return snapshot, format_timing_data_for_telegram(snapshot)
+
+
+async def refresh_live_snapshot():
+    """Update the shared snapshot; returns True when the rendered text changed"""
+    LIVE_STATS["polls"] += 1
+    data, text = await fetch_live_snapshot()
+    if text is None:
+        return False
+    LIVE_STATE["data"] = data
+    LIVE_STATE["updated_at"] = time.time()
+    if text == LIVE_STATE["text"]:
+        return False
+    LIVE_STATE["text"] = text
+    LIVE_STATE["version"] += 1
+    LIVE_STATS["snapshots"] += 1
+    return True
+
+
+async def _edit_subscription(bot, chat_id, subscription, text, reply_markup=None, scheduled_at=None):
+    """Edit a chat's live message; drops the subscription if the message is gone
+
+    scheduled_at: the poll tick the edit belongs to, recorded as its time so
+    the edit's own round trip doesn't push the next one a whole tick later.
+    """
+    # Live edits yield to interactive replies when the outbound scheduler is in use
+    extra = {"rate_limit_args": {"priority": "broadcast"}} if getattr(bot, "rate_limiter", None) else {}
+    try:
+        await bot.edit_message_text(
+            text,
+            chat_id=chat_id,
+            message_id=subscription["message_id"],
+            parse_mode="Markdown",
+            reply_markup=reply_markup,
+            **extra,
+        )
+        subscription["last_text"] = text
+        subscription["last_edit"] = scheduled_at if scheduled_at is not None else time.monotonic()
+        LIVE_STATS["edits"] += 1
+    except BadRequest as e:
+        if "not modified" in str(e).lower():
+            subscription["last_text"] = text
+            return
+        LIVE_STATS["edit_errors"] += 1
+        logger.warning(f"Live edit failed for chat {chat_id}: {e}")
+        if "not found" in str(e).lower():
+            LIVE_SUBSCRIPTIONS.pop(chat_id, None)
+    except Forbidden:
+        LIVE_SUBSCRIPTIONS.pop(chat_id, None)
+    except Exception as e:
+        LIVE_STATS["edit_errors"] += 1
+        logger.warning(f"Live edit failed for chat {chat_id}: {e}")
+
+
+async def push_snapshot(bot):
+    """Edit every subscribed message whose rendered text is out of date"""
+    text = LIVE_STATE["text"]
+    if text is None:
+        return
+    now = time.monotonic()
+    semaphore = asyncio.Semaphore(LIVE_EDIT_CONCURRENCY)
+
+    async def edit(chat_id, subscription):
+        async with semaphore:
+            await _edit_subscription(bot, chat_id, subscription, text, SUBSCRIBED_KEYBOARD, scheduled_at=now)
+
+    edits = []
+    for chat_id, subscription in list(LIVE_SUBSCRIPTIONS.items()):
+        if subscription["last_text"] == text:
+            LIVE_STATS["edits_skipped"] += 1
+            continue
+        if now - subscription["last_edit"] < LIVE_EDIT_INTERVAL:
+            continue
+        edits.append(edit(chat_id, subscription))
+    if edits:
+        await asyncio.gather(*edits)
+
+
+async def end_subscriptions(bot, reason_text, chat_ids=None):
+    """Finalize and remove subscriptions (all, or the given chats)"""
+    for chat_id in list(chat_ids if chat_ids is not None else LIVE_SUBSCRIPTIONS):
+        subscription = LIVE_SUBSCRIPTIONS.pop(chat_id, None)
+        if subscription is None:
+            continue
+        final_text = f"{subscription['last_text'] or ''}\n\n{reason_text}".strip()
+        await _edit_subscription(bot, chat_id, subscription, final_text)
+
+
+async def live_poller():
+    """Single shared poller: runs while at least one chat is subscribed"""
+    detach()
+    logger.info("Live poller started")
+    bot = LIVE_STATE["bot"]
+    try:
+        while LIVE_SUBSCRIPTIONS:
+            started = time.monotonic()
+
+            if not await asyncio.to_thread(check_active_f1_session):
+                await end_subscriptions(bot, TRANSLATIONS["live_subscription_ended"])
+                break
+
+            now = time.monotonic()
+            idle = [
+                chat_id for chat_id, subscription in LIVE_SUBSCRIPTIONS.items()
+                if now - subscription["last_activity"] >= LIVE_INACTIVITY_TIMEOUT
+            ]
+            if idle:
+                await end_subscriptions(bot, TRANSLATIONS["live_subscription_idle"], idle)
+
+            try:
+                await refresh_live_snapshot()
+            except Exception as e:
+                logger.error(f"Live snapshot refresh failed: {e}")
+            await push_snapshot(bot)
+
+            elapsed = time.monotonic() - started
+            await asyncio.sleep(max(0.0, LIVE_POLL_INTERVAL - elapsed))
+    finally:
+        logger.info("Live poller stopped")
+
+
+def _ensure_poller(bot):
+    LIVE_STATE["bot"] = bot
+    task = LIVE_STATE["task"]
+    if task is None or task.done():
+        LIVE_STATE["task"] = asyncio.get_running_loop().create_task(live_poller())
+
+
+async def subscribe_chat(bot, chat_id, message_id):
+    """Attach a chat's message to the live poller (re-subscribing moves it)"""
+    now = time.monotonic()
+    LIVE_SUBSCRIPTIONS[chat_id] = {
+        "message_id": message_id,
+        "last_text": None,
+        "last_edit": 0.0,
+        "last_activity": now,
+    }
+    updated_at = LIVE_STATE["updated_at"]
+    if updated_at is None or time.time() - updated_at >= LIVE_POLL_INTERVAL:
+        await refresh_live_snapshot()
+    await push_snapshot(bot)
+    _ensure_poller(bot)
+
+
+def touch_subscription(chat_id):
+    """Record user interaction so the subscription isn't ended for inactivity"""
+    subscription = LIVE_SUBSCRIPTIONS.get(chat_id)
+    if subscription:
+        subscription["last_activity"] = time.monotonic()
+        return True
+    return False
+
+
+async def unsubscribe_chat(bot, chat_id):
+    if chat_id not in LIVE_SUBSCRIPTIONS:
+        return False
+    await end_subscriptions(bot, TRANSLATIONS["live_subscription_stopped"], [chat_id])
+    return True
+
+
+def get_live_status():
+    """Snapshot age and subscription counts for diagnostics"""
+    updated_at = LIVE_STATE["updated_at"]
+    task = LIVE_STATE["task"]
+    return {
+        "subscriptions": len(LIVE_SUBSCRIPTIONS),
+        "poller_running": task is not None and not task.done(),
+        "snapshot_version": LIVE_STATE["version"],
+        "snapshot_age": round(time.time() - updated_at, 1) if updated_at else None,
+        "stats": dict(LIVE_STATS),
+    }
@@ -0,0 +1,291 @@
+"""
+Leader-elected live timing producer
+Only one process per host runs the Playwright browser. Every process that
+needs live timing signals demand and runs a candidate thread; the candidate
+holding an exclusive flock on the leader file scrapes and publishes versioned
+snapshots to a file in shared memory (/dev/shm), which all processes read
+without a browser. The kernel drops the lock when the leader dies, so the
+next candidate takes over within one election interval.
+"""
+
+import os
+import json
+import time
+import fcntl
+import asyncio
+import logging
+import tempfile
+import threading
+
+from f1_trace import traced
+
+logger = logging.getLogger(__name__)
+
+_SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+SNAPSHOT_PATH = os.getenv("F1_LIVE_SNAPSHOT_PATH", os.path.join(_SHARED_DIR, "f1_live_snapshot.json"))
+LEADER_LOCK_PATH = os.getenv("F1_LIVE_LEADER_LOCK", os.path.join(_SHARED_DIR, "f1_live_leader.lock"))
+DEMAND_PATH = os.getenv("F1_LIVE_DEMAND_PATH", os.path.join(_SHARED_DIR, "f1_live_demand"))
+# The leader's current scrape state, so readers know whether waiting can help
+SCRAPE_STATUS_PATH = os.getenv("F1_LIVE_SCRAPE_STATUS_PATH", os.path.join(_SHARED_DIR, "f1_live_scrape.json"))
+
+# Seconds between scrapes while there is demand
+PRODUCE_INTERVAL = float(os.getenv("F1_LIVE_PRODUCE_INTERVAL", "10"))
+# Candidates retry the leader lock this often (bounds failover time)
+ELECTION_INTERVAL = 1.0
+# Producer stops (closing the browser and releasing leadership) after this long without demand
+PRODUCER_IDLE_TIMEOUT = float(os.getenv("F1_LIVE_PRODUCER_IDLE", "120"))
+# How long a reader waits for a fresh snapshot before settling for what exists
+SNAPSHOT_WAIT = 20.0
+SNAPSHOT_POLL = 0.25
+# How long current_snapshot waits for a scrape that is under way (never for one that isn't)
+IN_PROGRESS_WAIT = float(os.getenv("F1_LIVE_IN_PROGRESS_WAIT", "2.5"))
+# A "scraping" status older than this was left by a leader that died mid-scrape
+SCRAPE_STALL_AFTER = 90.0
+
+PRODUCER_STATE = {
+    "thread": None,
+    "lock_fd": None,
+    "is_leader": False,
+    # (st_mtime_ns, st_ino) of the last parsed snapshot file, and its contents
+    "stamp": None,
+    "snapshot": None,
+}
+
+PRODUCER_STATS = {
+    "elections_won": 0,
+    "scrapes": 0,
+    "scrape_failures": 0,
+    "published": 0,
+    "snapshot_reads": 0,
+    "stale_reads": 0,
+}
+
+_START_LOCK = threading.Lock()
+
+
+def signal_demand():
+    """Tell the leader (in whichever process) that someone is waiting for snapshots"""
+    try:
+        os.utime(DEMAND_PATH)
+    except FileNotFoundError:
+        with open(DEMAND_PATH, "a"):
+            pass
+
+
+def _demand_age():
+    try:
+        return time.time() - os.stat(DEMAND_PATH).st_mtime
+    except FileNotFoundError:
+        return float("inf")
+
+
+def read_snapshot():
+    """Latest published snapshot {"version", "updated_at", "producer_pid", "data", "text"} or None"""
+    try:
+        stat = os.stat(SNAPSHOT_PATH)
+    except FileNotFoundError:
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_ino)
+    if stamp != PRODUCER_STATE["stamp"]:
+        try:
+            with open(SNAPSHOT_PATH, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read live snapshot: {e}")
+            return PRODUCER_STATE["snapshot"]
+        PRODUCER_STATE["stamp"] = stamp
+        PRODUCER_STATE["snapshot"] = snapshot
+        PRODUCER_STATS["snapshot_reads"] += 1
+    return PRODUCER_STATE["snapshot"]
+
+
+def _write_atomically(path, payload):
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def publish_snapshot(data, text):
+    """Atomically replace the shared snapshot with the next version"""
+    previous = read_snapshot()
+    snapshot = {
+        "version": (previous["version"] if previous else 0) + 1,
+        "updated_at": time.time(),
+        "producer_pid": os.getpid(),
+        "data": data,
+        "text": text,
+    }
+    _write_atomically(SNAPSHOT_PATH, snapshot)
+    PRODUCER_STATS["published"] += 1
+    return snapshot
+
+
+def _set_scrape_status(state, error=None):
+    try:
+        _write_atomically(SCRAPE_STATUS_PATH, {"state": state, "at": time.time(), "pid": os.getpid(), "error": error})
+    except OSError as e:
+        logger.warning(f"Could not write live scrape status: {e}")
+
+
+def read_scrape_status():
+    """{"state": "scraping" | "ok" | "failed" | "stopped", "at", "pid", "error"} of the leader's latest scrape, or None"""
+    try:
+        with open(SCRAPE_STATUS_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def scrape_in_progress():
+    status = read_scrape_status()
+    return status is not None and status["state"] == "scraping" and time.time() - status["at"] < SCRAPE_STALL_AFTER
+
+
+def _try_lead():
+    """Take the host-wide leader lock without blocking; True if this process leads"""
+    if PRODUCER_STATE["is_leader"]:
+        return True
+    fd = os.open(LEADER_LOCK_PATH, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return False
+    os.ftruncate(fd, 0)
+    os.write(fd, str(os.getpid()).encode())
+    PRODUCER_STATE["lock_fd"] = fd
+    PRODUCER_STATE["is_leader"] = True
+    PRODUCER_STATS["elections_won"] += 1
+    logger.info(f"Process {os.getpid()} is now the live timing producer")
+    return True
+
+
+def _resign():
+    fd = PRODUCER_STATE["lock_fd"]
+    PRODUCER_STATE["lock_fd"] = None
+    PRODUCER_STATE["is_leader"] = False
+    if fd is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+        logger.info(f"Process {os.getpid()} released live timing leadership")
+
+
+async def _scrape():
+    from f1_playwright_scraper_fixed import get_optimized_live_timing, format_timing_data_for_telegram
+
+    PRODUCER_STATS["scrapes"] += 1
+    _set_scrape_status("scraping")
+    try:
+        data = await get_optimized_live_timing()
+    except Exception as e:
+        _set_scrape_status("failed", str(e))
+        raise
+    if not data:
+        PRODUCER_STATS["scrape_failures"] += 1
+        _set_scrape_status("failed", "no data")
+        return None
+    snapshot = publish_snapshot(data, format_timing_data_for_telegram(data))
+    _set_scrape_status("ok")
+    return snapshot
+
+
+async def _candidate_loop():
+    """Runs in the producer thread's own event loop (the browser never leaves it)"""
+    try:
+        while _demand_age() < PRODUCER_IDLE_TIMEOUT:
+            if not _try_lead():
+                await asyncio.sleep(ELECTION_INTERVAL)
+                continue
+            started = time.monotonic()
+            try:
+                await _scrape()
+            except Exception as e:
+                PRODUCER_STATS["scrape_failures"] += 1
+                logger.error(f"Live producer scrape failed: {e}")
+            await asyncio.sleep(max(0.0, PRODUCE_INTERVAL - (time.monotonic() - started)))
+    finally:
+        if PRODUCER_STATE["is_leader"]:
+            from f1_playwright_scraper_fixed import cleanup_optimized_scraper
+
+            try:
+                await cleanup_optimized_scraper()
+            finally:
+                _set_scrape_status("stopped")
+                _resign()
+
+
+def _run_candidate():
+    try:
+        asyncio.run(_candidate_loop())
+    except Exception as e:
+        logger.error(f"Live producer stopped: {e}")
+
+
+def ensure_producer():
+    """Start this process's candidate thread if it isn't running"""
+    with _START_LOCK:
+        thread = PRODUCER_STATE["thread"]
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=_run_candidate, name="f1-live-producer", daemon=True)
+            PRODUCER_STATE["thread"] = thread
+            thread.start()
+
+
+@traced("live_snapshot")
+async def get_live_snapshot(max_age=PRODUCE_INTERVAL * 2, wait=SNAPSHOT_WAIT):
+    """Shared live snapshot no older than max_age seconds (waits up to `wait` for one)
+
+    Falls back to the newest snapshot available, or None if nothing was ever published.
+    """
+    signal_demand()
+    ensure_producer()
+    deadline = time.monotonic() + wait
+    while True:
+        snapshot = read_snapshot()
+        if snapshot is not None and time.time() - snapshot["updated_at"] < max_age:
+            return snapshot
+        if time.monotonic() >= deadline:
+            if snapshot is not None:
+                PRODUCER_STATS["stale_reads"] += 1
+            return snapshot
+        await asyncio.sleep(SNAPSHOT_POLL)
+
+
+async def current_snapshot(max_age, wait=IN_PROGRESS_WAIT):
+    """Snapshot no older than max_age, or None without waiting on a producer that isn't delivering
+
+    Only waits (up to `wait`) while the leader reports a scrape in progress;
+    a missing or stale snapshot after a failed scrape, or with no leader
+    scraping yet, returns None at once so callers can use another source.
+    """
+    signal_demand()
+    ensure_producer()
+    deadline = time.monotonic() + wait
+    while True:
+        snapshot = read_snapshot()
+        if snapshot is not None and time.time() - snapshot["updated_at"] < max_age:
+            return snapshot
+        if time.monotonic() >= deadline or not scrape_in_progress():
+            return None
+        await asyncio.sleep(SNAPSHOT_POLL)
+
+
+def get_producer_status():
+    snapshot = read_snapshot()
+    thread = PRODUCER_STATE["thread"]
+    return {
+        "is_leader": PRODUCER_STATE["is_leader"],
+        "candidate_running": thread is not None and thread.is_alive(),
+        "leader_pid": snapshot["producer_pid"] if snapshot else None,
+        "snapshot_version": snapshot["version"] if snapshot else None,
+        "snapshot_age": round(time.time() - snapshot["updated_at"], 1) if snapshot else None,
+        "demand_age": round(_demand_age(), 1) if _demand_age() != float("inf") else None,
+        "scrape": read_scrape_status(),
+        "stats": dict(PRODUCER_STATS),
+    }
@@ -0,0 +1,356 @@
+"""
+Pluggable live timing sources
+Every live timing implementation sits behind LiveSource and returns the same
+normalized snapshot:
+
+    {
+        "source": "openf1",
+        "updated_at": 1760000000.0,      # when the data was current (epoch)
+        "latency": 0.42,                 # seconds this fetch took
+        "session": {"name": ..., "meeting": ..., "location": ...},
+        "timing": [{"position", "driver", "driver_number", "team", "interval",
+                    "gap", "best_lap", "last_lap", "tyre_compound", "tyre_age"}],
+        "race_control": [{"time", "message"}],
+    }
+
+Timing rows only carry the fields their source knows, so
+format_timing_data_for_telegram renders any of them. LiveSourceSelector
+scores each source by the staleness of what it delivers (data age plus fetch
+latency, smoothed) plus a fixed handicap for sources with thinner data. It
+tries the best one first and fails over down the ranking. With F1_LIVE_RACE
+it runs the top two concurrently and takes the first valid snapshot.
+Observations expire, so a source that was passed over gets probed again
+instead of losing forever on old numbers.
+"""
+
+import os
+import time
+import asyncio
+import logging
+
+from f1_metrics import counter, histogram
+from f1_trace import span
+
+logger = logging.getLogger(__name__)
+
+# Preference order; also which sources are enabled
+LIVE_SOURCES = [name.strip() for name in os.getenv("F1_LIVE_SOURCES", "formula_timer,openf1").split(",") if name.strip()]
+# Seconds one source may take before the next is tried
+SOURCE_TIMEOUT = float(os.getenv("F1_LIVE_SOURCE_TIMEOUT", "20"))
+# Snapshots older than this are not valid (seconds)
+LIVE_MAX_AGE = float(os.getenv("F1_LIVE_MAX_AGE", "60"))
+# Race the two best-ranked sources and take the first valid snapshot
+RACE_SOURCES = os.getenv("F1_LIVE_RACE", "0") == "1"
+# Observations older than this are forgotten, so a passed-over source gets re-probed (seconds)
+OBSERVATION_TTL = float(os.getenv("F1_LIVE_OBSERVATION_TTL", "120"))
+# Weight of the newest observation in the smoothed latency and age
+SMOOTHING = 0.3
+# Failing sources sit out 2^n seconds (capped) before being ranked normally again
+MAX_COOLDOWN = 60.0
+
+SOURCE_FETCHES = counter("f1_live_source_fetches_total", "Live timing fetches by source and outcome",
+                         ("source", "result"))
+SOURCE_LATENCY = histogram("f1_live_source_duration_seconds", "Live timing fetch duration by source", ("source",))
+
+
+def _position(value):
+    text = str(value).strip()
+    return int(text) if text.isdigit() else None
+
+
+def _row(**fields):
+    """Timing row without the fields the source doesn't know"""
+    return {key: value for key, value in fields.items() if value not in (None, "", "N/A")}
+
+
+class LiveSource:
+    """One live timing implementation; fetch() returns a normalized snapshot or None"""
+
+    name = None
+    # Seconds of staleness the selector accepts from this source before preferring a thinner one
+    handicap = 0.0
+
+    async def fetch(self, max_age, timeout):
+        raise NotImplementedError
+
+
+class FormulaTimerSource(LiveSource):
+    """formula-timer.com via the host's leader-elected Playwright producer"""
+
+    name = "formula_timer"
+
+    async def fetch(self, max_age, timeout):
+        from f1_live_producer import current_snapshot, IN_PROGRESS_WAIT
+
+        # Waits briefly for a scrape that is under way, never for a producer that is failing
+        snapshot = await current_snapshot(max_age, wait=min(IN_PROGRESS_WAIT, timeout / 4))
+        if snapshot is None or not snapshot["data"]:
+            return None
+        data = snapshot["data"]
+        return {
+            "updated_at": snapshot["updated_at"],
+            "session": {"name": data.get("session", {}).get("name")},
+            "timing": [
+                _row(
+                    position=_position(row.get("position")),
+                    driver=row.get("driver"),
+                    interval=row.get("interval"),
+                    gap=row.get("gap"),
+                    best_lap=row.get("best_lap"),
+                    last_lap=row.get("last_lap"),
+                    tyre_compound=row.get("tyre_compound"),
+                    tyre_age=row.get("tyre_age"),
+                )
+                for row in data.get("timing", [])
+            ],
+            "race_control": data.get("race_control", []),
+        }
+
+
+class OpenF1Source(LiveSource):
+    """api.openf1.org session and position feeds (positions only, no lap times)"""
+
+    name = "openf1"
+    handicap = 10.0
+
+    async def fetch(self, max_age, timeout):
+        from f1_bot_live import get_live_session_info, get_live_positions
+
+        session_info = await asyncio.to_thread(get_live_session_info)
+        if not session_info or not session_info.get("session_key"):
+            return None
+        positions = await asyncio.to_thread(get_live_positions, session_info["session_key"])
+        return {
+            # Position rows only change on overtakes, so their dates say nothing about freshness
+            "updated_at": time.time(),
+            "session": {
+                "name": f"{session_info.get('meeting_name', '')} {session_info.get('session_name', '')}".strip(),
+                "meeting": session_info.get("meeting_name"),
+                "location": session_info.get("location"),
+            },
+            "timing": [
+                _row(
+                    position=_position(pos.get("position")),
+                    driver=pos.get("driver_name"),
+                    driver_number=pos.get("driver_number"),
+                    team=pos.get("team_name"),
+                )
+                for pos in positions
+            ],
+            "race_control": [],
+        }
+
+
+class Formula1Source(LiveSource):
+    """formula1.com via F1TimingScraper; starts a browser in this process for every fetch"""
+
+    name = "formula1"
+    handicap = 20.0
+
+    async def fetch(self, max_age, timeout):
+        from f1_bot_live import F1TimingScraper
+
+        async with F1TimingScraper() as scraper:
+            data = await scraper.scrape_live_timing_data()
+        if data.get("error"):
+            raise RuntimeError(data["error"])
+        return {
+            "updated_at": time.time(),
+            "session": {"name": data["session_info"].get("sessionName")},
+            "timing": [
+                _row(
+                    position=_position(row.get("position")),
+                    driver=row.get("driver"),
+                    team=row.get("team"),
+                    gap=row.get("gap"),
+                    last_lap=row.get("lastLap"),
+                )
+                for row in data["drivers"]
+            ],
+            "race_control": [],
+        }
+
+
+SOURCE_TYPES = {
+    FormulaTimerSource.name: FormulaTimerSource,
+    OpenF1Source.name: OpenF1Source,
+    Formula1Source.name: Formula1Source,
+}
+
+
+class LiveSourceSelector:
+    """Ranks sources by observed freshness and latency and fails over between them"""
+
+    def __init__(self, sources, timeout=SOURCE_TIMEOUT, race=RACE_SOURCES):
+        self.sources = {source.name: source for source in sources}
+        self.order = [source.name for source in sources]
+        self.timeout = timeout
+        self.race = race
+        self.observed = {
+            source.name: {
+                "attempts": 0,
+                "successes": 0,
+                "failures": 0,
+                "consecutive_failures": 0,
+                "latency": None,
+                "age": None,
+                "last_observed": 0.0,
+                "last_error": None,
+                "cooldown_until": 0.0,
+            }
+            for source in sources
+        }
+
+    def score(self, name, now=None):
+        """Expected staleness (seconds) of a snapshot from this source, handicap included"""
+        now = now or time.time()
+        observed = self.observed[name]
+        score = self.sources[name].handicap
+        if observed["latency"] is not None and now - observed["last_observed"] < OBSERVATION_TTL:
+            score += observed["latency"] + observed["age"]
+        return score
+
+    def ranked(self):
+        now = time.time()
+        return sorted(
+            self.order,
+            key=lambda name: (self.observed[name]["cooldown_until"] > now, self.score(name, now),
+                              self.order.index(name)),
+        )
+
+    def _record(self, name, started, snapshot=None, error=None):
+        now = time.time()
+        latency = time.perf_counter() - started
+        observed = self.observed[name]
+        observed["attempts"] += 1
+        observed["last_observed"] = now
+        SOURCE_LATENCY.observe(latency, name)
+        if error is None and snapshot is not None and snapshot["timing"]:
+            age = max(0.0, now - snapshot["updated_at"])
+            if observed["latency"] is None:
+                observed["latency"], observed["age"] = latency, age
+            else:
+                observed["latency"] += SMOOTHING * (latency - observed["latency"])
+                observed["age"] += SMOOTHING * (age - observed["age"])
+            observed["successes"] += 1
+            observed["consecutive_failures"] = 0
+            observed["cooldown_until"] = 0.0
+            SOURCE_FETCHES.inc(name, "ok")
+            return
+        observed["failures"] += 1
+        observed["consecutive_failures"] += 1
+        observed["last_error"] = error or "no data"
+        observed["cooldown_until"] = now + min(MAX_COOLDOWN, 2 ** observed["consecutive_failures"])
+        SOURCE_FETCHES.inc(name, "error" if error else "empty")
+
+    async def _attempt(self, name, max_age):
+        started = time.perf_counter()
+        with span(f"live_source:{name}") as current:
+            try:
+                snapshot = await asyncio.wait_for(self.sources[name].fetch(max_age, self.timeout), self.timeout)
+            except asyncio.TimeoutError:
+                self._record(name, started, error=f"timed out after {self.timeout:g}s")
+                return None
+            except Exception as e:
+                logger.warning(f"Live source {name} failed: {e}")
+                self._record(name, started, error=str(e))
+                return None
+            self._record(name, started, snapshot)
+            if snapshot is None:
+                return None
+            snapshot["source"] = name
+            snapshot["latency"] = round(time.perf_counter() - started, 3)
+            current.set(rows=len(snapshot["timing"]), age=round(time.time() - snapshot["updated_at"], 1))
+            return snapshot
+
+    async def _race(self, names, max_age, stale):
+        tasks = [asyncio.create_task(self._attempt(name, max_age)) for name in names]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                snapshot = await next_done
+                if _valid(snapshot):
+                    return snapshot
+                if snapshot is not None and snapshot["timing"]:
+                    stale.append(snapshot)
+        finally:
+            # The loser's result is not needed; OpenF1's worker thread finishes on its own
+            for task in tasks:
+                task.cancel()
+        return None
+
+    async def fetch(self, max_age=LIVE_MAX_AGE):
+        """Best valid snapshot, trying sources in ranked order; else the least stale one, else None
+
+        max_age is how fresh sources should try to be (the producer waits for a
+        scrape that new); anything within LIVE_MAX_AGE is accepted.
+        """
+        ranked = self.ranked()
+        stale = []
+        if self.race and len(ranked) >= 2:
+            snapshot = await self._race(ranked[:2], max_age, stale)
+            if snapshot is not None:
+                return snapshot
+            ranked = ranked[2:]
+        for name in ranked:
+            snapshot = await self._attempt(name, max_age)
+            if _valid(snapshot):
+                return snapshot
+            if snapshot is not None and snapshot["timing"]:
+                stale.append(snapshot)
+        if stale:
+            return max(stale, key=lambda snapshot: snapshot["updated_at"])
+        return None
+
+    def status(self):
+        now = time.time()
+        return {
+            "race": self.race,
+            "ranking": self.ranked(),
+            "sources": {
+                name: {
+                    **{key: value for key, value in observed.items() if key not in ("cooldown_until", "last_observed")},
+                    "latency": round(observed["latency"], 3) if observed["latency"] is not None else None,
+                    "age": round(observed["age"], 1) if observed["age"] is not None else None,
+                    "score": round(self.score(name, now), 2),
+                    "cooling_down": observed["cooldown_until"] > now,
+                }
+                for name, observed in self.observed.items()
+            },
+        }
+
+
+def _valid(snapshot):
+    return bool(snapshot and snapshot["timing"]) and time.time() - snapshot["updated_at"] <= LIVE_MAX_AGE
+
+
+SELECTOR_STATE = {
+    "selector": None,
+}
+
+
+def get_selector():
+    selector = SELECTOR_STATE["selector"]
+    if selector is None:
+        sources = []
+        for name in LIVE_SOURCES:
+            if name in SOURCE_TYPES:
+                sources.append(SOURCE_TYPES[name]())
+            else:
+                logger.warning(f"Unknown live source {name!r} in F1_LIVE_SOURCES")
+        selector = SELECTOR_STATE["selector"] = LiveSourceSelector(sources)
+    return selector
+
+
+async def get_live_timing(max_age=LIVE_MAX_AGE):
+    """Normalized live timing snapshot from the best available source, or None"""
+    return await get_selector().fetch(max_age)
+
+
+def get_live_source_status():
+    selector = SELECTOR_STATE["selector"]
+    return {
+        "configured": LIVE_SOURCES,
+        "timeout": SOURCE_TIMEOUT,
+        "max_age": LIVE_MAX_AGE,
+        "selector": selector.status() if selector else None,
+    }
@@ -0,0 +1,189 @@
+"""
+Event-loop lag monitor
+A heartbeat callback is scheduled on the loop every LAG_INTERVAL; how late it
+fires is the loop's scheduling delay, recorded as a histogram. A watchdog
+thread notices a heartbeat that is overdue by more than LAG_THRESHOLD while
+the loop is still blocked, and captures the loop thread's stack and the task
+that was running, so the blocking call (a sync requests.get, a BeautifulSoup
+parse) is named rather than only measured.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+
+from f1_metrics import histogram, counter, gauge
+
+logger = logging.getLogger(__name__)
+
+LAG_INTERVAL = float(os.getenv("F1_LOOP_LAG_INTERVAL", "0.1"))
+# Blocks longer than this are attributed (seconds)
+LAG_THRESHOLD = float(os.getenv("F1_LOOP_LAG_THRESHOLD", "0.25"))
+BLOCKING_EVENTS_SIZE = 50
+STACK_LIMIT = 40
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LOOP_LAG = histogram("f1_event_loop_lag_seconds", "Event loop scheduling delay of the heartbeat", buckets=LAG_BUCKETS)
+LOOP_LAG_CURRENT = gauge("f1_event_loop_lag_current_seconds", "Scheduling delay of the latest heartbeat")
+LOOP_BLOCKED = counter("f1_event_loop_blocked_total", "Loop stalls longer than the lag threshold")
+
+BLOCKING_EVENTS = deque(maxlen=BLOCKING_EVENTS_SIZE)
+
+MONITOR_STATE = {
+    "monitor": None,
+}
+
+
+class LoopMonitor:
+    """Heartbeat on `loop` plus a watchdog thread that attributes long stalls"""
+
+    def __init__(self, loop, interval=LAG_INTERVAL, threshold=LAG_THRESHOLD, on_block=None):
+        self.loop = loop
+        self.interval = interval
+        self.threshold = threshold
+        self.on_block = on_block
+        self.loop_thread = None
+        self.expected = None
+        self.last_beat = None
+        # Set while the owner isn't driving the loop (serverless between updates)
+        self.paused = False
+        self.handle = None
+        self.pending_event = None
+        self.samples = 0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.blocked = 0
+        self._stop = threading.Event()
+        self._watchdog = None
+
+    def start(self):
+        """Call from the loop's thread (or before the loop runs)"""
+        self.last_beat = time.monotonic()
+        self.expected = self.loop.time() + self.interval
+        self.handle = self.loop.call_at(self.expected, self._beat)
+        self._watchdog = threading.Thread(target=self._watch, name="f1-loop-watchdog", daemon=True)
+        self._watchdog.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self.handle is not None:
+            self.handle.cancel()
+        if self._watchdog is not None and self._watchdog is not threading.current_thread():
+            self._watchdog.join()
+
+    def pause(self):
+        """The loop is about to stop running; the next heartbeat's delay isn't lag"""
+        self.paused = True
+
+    def _beat(self):
+        now = self.loop.time()
+        self.loop_thread = threading.get_ident()
+        if self.paused:
+            self.paused = False
+        else:
+            lag = max(0.0, now - self.expected)
+            self.samples += 1
+            self.total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+            LOOP_LAG.observe(lag)
+            LOOP_LAG_CURRENT.set(round(lag, 6))
+            event = self.pending_event
+            if event is not None:
+                # The watchdog saw this stall while it was happening; now its length is known
+                event["lag"] = round(lag, 4)
+                self.pending_event = None
+        self.last_beat = time.monotonic()
+        self.expected = now + self.interval
+        self.handle = self.loop.call_at(self.expected, self._beat)
+
+    def _watch(self):
+        poll = max(0.01, min(self.interval, self.threshold) / 2)
+        while not self._stop.wait(poll):
+            if self.loop.is_closed():
+                return
+            if self.paused or not self.loop.is_running() or self.pending_event is not None:
+                continue
+            overdue = time.monotonic() - self.last_beat - self.interval
+            if overdue > self.threshold:
+                self._capture(overdue)
+
+    def _capture(self, overdue):
+        frame = sys._current_frames().get(self.loop_thread)
+        if frame is None:
+            return
+        task = None
+        try:
+            task = asyncio.current_task(self.loop)
+        except RuntimeError:
+            pass
+        stack = traceback.format_stack(frame, limit=STACK_LIMIT)
+        event = {
+            "at": time.time(),
+            "detected_after": round(overdue, 4),
+            # Filled in by the heartbeat once the loop is free again
+            "lag": None,
+            "task": task.get_name() if task is not None else None,
+            "coroutine": getattr(task.get_coro(), "__qualname__", None) if task is not None else None,
+            "blocking_frame": f"{frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}",
+            "stack": [line.rstrip() for line in stack],
+        }
+        self.pending_event = event
+        self.blocked += 1
+        BLOCKING_EVENTS.append(event)
+        LOOP_BLOCKED.inc()
+        logger.warning(f"Event loop blocked for {overdue:.2f}s+ in {event['coroutine'] or 'callback'} "
+                       f"at {event['blocking_frame']}")
+        if self.on_block is not None:
+            self.on_block(event)
+
+    def summary(self):
+        return {
+            "interval": self.interval,
+            "threshold": self.threshold,
+            "samples": self.samples,
+            "avg_lag": round(self.total_lag / self.samples, 4) if self.samples else None,
+            "max_lag": round(self.max_lag, 4),
+            "blocked": self.blocked,
+        }
+
+
+def start_loop_monitor(loop=None, interval=LAG_INTERVAL, threshold=LAG_THRESHOLD):
+    """Monitor `loop` (default: the running loop); idempotent per loop"""
+    loop = loop or asyncio.get_running_loop()
+    monitor = MONITOR_STATE["monitor"]
+    if monitor is not None and monitor.loop is loop and not loop.is_closed():
+        return monitor
+    if monitor is not None:
+        monitor.stop()
+    monitor = MONITOR_STATE["monitor"] = LoopMonitor(loop, interval, threshold).start()
+    return monitor
+
+
+def pause_loop_monitor():
+    monitor = MONITOR_STATE["monitor"]
+    if monitor is not None:
+        monitor.pause()
+
+
+def get_blocking_events(limit=None):
+    """Attributed stalls, newest first"""
+    events = list(BLOCKING_EVENTS)
+    events.reverse()
+    return events[:limit] if limit else events
+
+
+def get_loop_status():
+    monitor = MONITOR_STATE["monitor"]
+    return {
+        "monitor": monitor.summary() if monitor else None,
+        "recent_blocks": [
+            {key: event[key] for key in ("at", "lag", "coroutine", "blocking_frame")}
+            for event in get_blocking_events(5)
+        ],
+    }
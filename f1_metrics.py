@@ -0,0 +1,298 @@
+"""
+In-process metrics registry with Prometheus text exposition
+Counters, gauges and histograms keyed by label values, plus collectors that
+refresh gauges (snapshot age, browser RSS) at scrape time. Metrics are per
+process: on serverless each warm instance reports its own.
+"""
+
+import os
+import math
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans cache hits (~1 ms) through slow upstreams and Playwright loads
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_LOCK = threading.Lock()
+_METRICS = {}
+_COLLECTORS = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.values = {}
+
+    def _key(self, labels):
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {labels}")
+        return tuple(str(value) for value in labels)
+
+    def clear(self):
+        with _LOCK:
+            self.values.clear()
+
+    def samples(self):
+        with _LOCK:
+            items = list(self.values.items())
+        for key, value in sorted(items):
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with _LOCK:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, *labels):
+        return self.values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        key = self._key(labels)
+        with _LOCK:
+            self.values[key] = value
+
+    def get(self, *labels):
+        return self.values.get(self._key(labels))
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        key = self._key(labels)
+        with _LOCK:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["counts"][index] += 1
+                    break
+            entry["sum"] += value
+            entry["count"] += 1
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def samples(self):
+        with _LOCK:
+            items = [(key, dict(entry, counts=list(entry["counts"]))) for key, entry in self.values.items()]
+        for key, entry in sorted(items):
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry["counts"]):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, [("le", _format_value(float(bound)))])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.label_names, key, [("le", "+Inf")])
+            yield f"{self.name}_bucket{labels} {entry['count']}"
+            labels = _format_labels(self.label_names, key)
+            yield f"{self.name}_sum{labels} {_format_value(round(entry['sum'], 6))}"
+            yield f"{self.name}_count{labels} {entry['count']}"
+
+
+class _Timer:
+    """Context manager observing the elapsed time of its block"""
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+
+def _register(metric):
+    with _LOCK:
+        existing = _METRICS.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.label_names != metric.label_names:
+                raise ValueError(f"Metric {metric.name!r} registered twice with different types or labels")
+            return existing
+        _METRICS[metric.name] = metric
+        return metric
+
+
+def counter(name, help_text, labels=()):
+    return _register(Counter(name, help_text, labels))
+
+
+def gauge(name, help_text, labels=()):
+    return _register(Gauge(name, help_text, labels))
+
+
+def histogram(name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+    return _register(Histogram(name, help_text, labels, buckets))
+
+
+def register_collector(collect):
+    """Run collect() before every exposition, to refresh gauges that are cheaper to read than to track"""
+    if collect not in _COLLECTORS:
+        _COLLECTORS.append(collect)
+    return collect
+
+
+# Metrics shared across modules
+UPDATE_LATENCY = histogram("f1_update_duration_seconds",
+                           "Time to handle one Telegram update, by command or callback route", ("route",))
+UPDATE_ERRORS = counter("f1_update_errors_total", "Updates whose handling raised", ("route",))
+DEDUP_DROPS = counter("f1_update_duplicates_total", "Redelivered updates dropped by the dedup claim")
+UPSTREAM_REQUESTS = counter("f1_upstream_requests_total",
+                            "Upstream HTTP attempts by host and status (\"error\" = no response)", ("host", "status"))
+UPSTREAM_LATENCY = histogram("f1_upstream_request_duration_seconds",
+                             "Upstream HTTP attempt latency by host", ("host",))
+CACHE_LOOKUPS = counter("f1_cache_lookups_total", "Response cache lookups by key and result", ("key", "result"))
+LIVE_SNAPSHOT_AGE = gauge("f1_live_snapshot_age_seconds", "Age of the newest shared live timing snapshot")
+PAGE_READY = histogram("f1_playwright_page_ready_seconds",
+                       "Time for the live timing page to reach DOMContentLoaded")
+BROWSER_RSS = gauge("f1_playwright_browser_rss_bytes",
+                    "Resident memory of this process's Playwright browser processes")
+PROCESS_RSS = gauge("f1_process_rss_bytes", "Resident memory of this process")
+
+
+# Route labels are limited to registered commands and callback routes: users can
+# send any "/text" or callback data, and every distinct label value is kept forever
+KNOWN_COMMANDS = set()
+KNOWN_CALLBACKS = set()
+
+
+def register_routes(commands=(), callbacks=()):
+    KNOWN_COMMANDS.update(command.lower() for command in commands)
+    KNOWN_CALLBACKS.update(callbacks)
+
+
+def update_route(update):
+    """Metric label for an update: "/command", "callback:name", the update type or "other" """
+    message = getattr(update, "message", None)
+    text = getattr(message, "text", None) or ""
+    if text.startswith("/"):
+        command = text.split()[0].split("@")[0][1:].lower()
+        return f"/{command}" if command in KNOWN_COMMANDS else "other"
+    query = getattr(update, "callback_query", None)
+    if query is not None:
+        name = (query.data or "").split(":", 1)[0]
+        return f"callback:{name}" if name in KNOWN_CALLBACKS else "other"
+    return "message" if message is not None else "other"
+
+
+def _rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _descendants(pid):
+    """PIDs of every process below `pid`, from /proc/*/stat parent links"""
+    children = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; fields resume after its closing paren
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    found = []
+    stack = [pid]
+    while stack:
+        for child in children.get(stack.pop(), ()):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def _collect_process():
+    pid = os.getpid()
+    PROCESS_RSS.set(_rss_bytes(pid))
+    browser_rss = 0
+    for child in _descendants(pid):
+        try:
+            with open(f"/proc/{child}/comm") as f:
+                name = f.read().strip()
+        except OSError:
+            continue
+        if "chrom" in name or "headless" in name:
+            browser_rss += _rss_bytes(child)
+    BROWSER_RSS.set(browser_rss)
+
+
+def _collect_live_snapshot():
+    from f1_live_producer import read_snapshot
+
+    snapshot = read_snapshot()
+    if snapshot is None:
+        LIVE_SNAPSHOT_AGE.clear()
+    else:
+        LIVE_SNAPSHOT_AGE.set(round(time.time() - snapshot["updated_at"], 3))
+
+
+register_collector(_collect_process)
+register_collector(_collect_live_snapshot)
+
+
+def render_metrics():
+    """All registered metrics in the Prometheus text exposition format"""
+    for collect in list(_COLLECTORS):
+        try:
+            collect()
+        except Exception as e:
+            logger.warning(f"Metrics collector {collect.__name__} failed: {e}")
+    with _LOCK:
+        metrics = sorted(_METRICS.values(), key=lambda metric: metric.name)
+    return "\n".join(metric.render() for metric in metrics) + "\n"
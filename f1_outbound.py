@@ -0,0 +1,340 @@
+"""
+Outbound Telegram send scheduler
+Plugs into python-telegram-bot as a rate limiter so every reply_text,
+edit_text and send_chat_action goes through token buckets (global,
+per-chat, per-group), priority lanes and RetryAfter-aware requeueing.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from urllib.parse import urlsplit
+
+from telegram.error import RetryAfter, BadRequest, Forbidden
+from telegram.ext import BaseRateLimiter
+
+from f1_http import TELEGRAM_BOT_API_URL, record_upstream_outcome
+from f1_metrics import UPSTREAM_REQUESTS, UPSTREAM_LATENCY
+from f1_trace import span, detach
+
+logger = logging.getLogger(__name__)
+
+# Telegram limits: ~30 messages/s overall, ~1/s per chat, 20/min per group
+GLOBAL_RATE = float(os.getenv("F1_TG_GLOBAL_RATE", "30"))
+CHAT_RATE = 1.0
+CHAT_BURST = 3
+GROUP_RATE = 20 / 60
+GROUP_BURST = 5
+
+# Lanes in priority order; requests pick a lane via rate_limit_args={"priority": ...}
+INTERACTIVE = "interactive"
+BROADCAST = "broadcast"
+LANES = (INTERACTIVE, BROADCAST)
+
+# Entries examined per lane when the head of the lane is waiting on its chat bucket
+SCAN_WINDOW = 64
+MAX_RETRIES = 3
+LATENCY_SAMPLES = 1000
+# Idle chat buckets are dropped after this long (seconds)
+BUCKET_IDLE = 300
+
+# Endpoints where only the newest pending request per key matters
+COALESCE_ENDPOINTS = {"editMessageText", "editMessageReplyMarkup", "sendChatAction"}
+
+# Host label for Bot API calls in the upstream metrics
+TELEGRAM_HOST = urlsplit(TELEGRAM_BOT_API_URL).netloc
+
+
+def _error_status(error):
+    """Bot API status code for an exception raised by a request, as far as PTB exposes it"""
+    if isinstance(error, BadRequest):
+        return 400
+    if isinstance(error, Forbidden):
+        return 403
+    return "error"
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `rate` tokens/second"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated", "blocked_until")
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        """Seconds until a token is available (0 if one is available now)"""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, until):
+        self.blocked_until = max(self.blocked_until, until)
+
+
+class _Request:
+    __slots__ = ("callback", "args", "kwargs", "endpoint", "chat_id", "lane", "key",
+                 "future", "enqueued", "not_before", "attempts", "superseded_by")
+
+    def __init__(self, callback, args, kwargs, endpoint, chat_id, lane, key):
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs
+        self.endpoint = endpoint
+        self.chat_id = chat_id
+        self.lane = lane
+        self.key = key
+        self.future = asyncio.get_running_loop().create_future()
+        self.enqueued = time.monotonic()
+        self.not_before = 0.0
+        self.attempts = 0
+        self.superseded_by = None
+
+
+class OutboundScheduler(BaseRateLimiter):
+    """Rate limiter with priority lanes, edit coalescing and RetryAfter requeueing"""
+
+    def __init__(self, global_rate=GLOBAL_RATE):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_buckets = {}
+        self.lanes = {lane: deque() for lane in LANES}
+        self.pending_by_key = {}
+        self.wakeup = None
+        self.task = None
+        self.inflight = set()
+        self.stats = {
+            "sent": 0,
+            "passthrough": 0,
+            "coalesced": 0,
+            "retry_after": 0,
+            "failed": 0,
+        }
+        self.latencies = {lane: deque(maxlen=LATENCY_SAMPLES) for lane in LANES}
+
+    async def initialize(self):
+        self._ensure_dispatcher()
+
+    async def shutdown(self):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+        self.task = None
+
+    def _ensure_dispatcher(self):
+        # Serverless entry points run each update in a fresh event loop, so the
+        # dispatcher is (re)started on whichever loop is current
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.task.get_loop() is not loop:
+            self.wakeup = asyncio.Event()
+            self.task = loop.create_task(self._dispatch())
+
+    def _bucket_for(self, chat_id):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            is_group = isinstance(chat_id, int) and chat_id < 0 or str(chat_id).startswith("@")
+            bucket = TokenBucket(GROUP_RATE, GROUP_BURST) if is_group else TokenBucket(CHAT_RATE, CHAT_BURST)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        # The span covers queueing as well as the request itself
+        with span(f"telegram:{endpoint}"):
+            return await self._schedule(callback, args, kwargs, endpoint, data, rate_limit_args)
+
+    async def _schedule(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        chat_id = data.get("chat_id")
+        if chat_id is None:
+            # answerCallbackQuery and friends are not message sends - never delay them
+            self.stats["passthrough"] += 1
+            return await callback(*args, **kwargs)
+
+        lane = INTERACTIVE
+        if isinstance(rate_limit_args, dict) and rate_limit_args.get("priority") in LANES:
+            lane = rate_limit_args["priority"]
+
+        key = None
+        if endpoint in COALESCE_ENDPOINTS:
+            key = (endpoint, chat_id, data.get("message_id"))
+
+        self._ensure_dispatcher()
+        request = _Request(callback, args, kwargs, endpoint, chat_id, lane, key)
+        if key is not None:
+            previous = self.pending_by_key.get(key)
+            if previous is not None:
+                # A newer edit of the same message supersedes the queued one;
+                # its caller gets the newer edit's result
+                previous.superseded_by = request
+                self._relay(request.future, previous.future)
+                self.stats["coalesced"] += 1
+            self.pending_by_key[key] = request
+        self.lanes[lane].append(request)
+        self.wakeup.set()
+        return await request.future
+
+    def _pick(self, now):
+        """Next sendable request by lane priority, or the time to wait for one"""
+        wait = None
+        for lane in LANES:
+            queue = self.lanes[lane]
+            # Superseded entries are already answered through their successor;
+            # cancelled ones have no caller left to answer and must not spend a token
+            while queue and (queue[0].superseded_by is not None or queue[0].future.cancelled()):
+                self._forget(queue.popleft())
+            for index, request in enumerate(queue):
+                if index >= SCAN_WINDOW:
+                    break
+                if request.superseded_by is not None or request.future.cancelled():
+                    continue
+                delay = max(request.not_before - now, self._bucket_for(request.chat_id).wait_time(now))
+                if delay <= 0:
+                    del queue[index]
+                    return request, None
+                wait = delay if wait is None else min(wait, delay)
+        return None, wait
+
+    def _forget(self, request):
+        if request.key is not None and self.pending_by_key.get(request.key) is request:
+            del self.pending_by_key[request.key]
+
+    def _requeue(self, request):
+        """Put a flood-controlled request back at the head of its lane"""
+        if request.future.cancelled():
+            return
+        if request.key is not None:
+            newer = self.pending_by_key.get(request.key)
+            if newer is not None:
+                # The message was edited again while this edit was in flight
+                request.superseded_by = newer
+                self._relay(newer.future, request.future)
+                self.stats["coalesced"] += 1
+                return
+            self.pending_by_key[request.key] = request
+        self.lanes[request.lane].appendleft(request)
+        self.wakeup.set()
+
+    @staticmethod
+    def _relay(source, target):
+        """Resolve `target` with whatever `source` resolves to"""
+        def relay(done):
+            if target.done():
+                return
+            if done.cancelled():
+                target.cancel()
+            elif done.exception() is not None:
+                target.set_exception(done.exception())
+            else:
+                target.set_result(done.result())
+
+        source.add_done_callback(relay)
+
+    async def _dispatch(self):
+        detach()
+        while True:
+            now = time.monotonic()
+            global_wait = self.global_bucket.wait_time(now)
+            if global_wait > 0:
+                await asyncio.sleep(global_wait)
+                continue
+
+            request, wait = self._pick(now)
+            if request is None:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=wait if wait is not None else BUCKET_IDLE)
+                except asyncio.TimeoutError:
+                    if wait is None:
+                        self._drop_idle_buckets()
+                continue
+
+            self.global_bucket.take(now)
+            self._bucket_for(request.chat_id).take(now)
+            self._forget(request)
+            if request.attempts == 0:
+                self.latencies[request.lane].append(now - request.enqueued)
+            task = asyncio.get_running_loop().create_task(self._send(request))
+            self.inflight.add(task)
+            task.add_done_callback(self.inflight.discard)
+
+    async def _send(self, request):
+        request.attempts += 1
+        started = time.perf_counter()
+        status = "error"
+        try:
+            result = await request.callback(*request.args, **request.kwargs)
+            status = 200
+        except RetryAfter as e:
+            status = 429
+            self.stats["retry_after"] += 1
+            retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else float(e.retry_after)
+            if request.attempts > MAX_RETRIES:
+                self.stats["failed"] += 1
+                request.future.set_exception(e)
+                return
+            logger.warning(f"Telegram flood control on chat {request.chat_id}, requeue in {retry_after}s")
+            until = time.monotonic() + retry_after
+            self._bucket_for(request.chat_id).block(until)
+            request.not_before = until
+            self._requeue(request)
+            return
+        except Exception as e:
+            status = _error_status(e)
+            self.stats["failed"] += 1
+            if not request.future.done():
+                request.future.set_exception(e)
+            return
+        finally:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - started, TELEGRAM_HOST)
+            UPSTREAM_REQUESTS.inc(TELEGRAM_HOST, status)
+            record_upstream_outcome(TELEGRAM_HOST, status if isinstance(status, int) else None)
+        self.stats["sent"] += 1
+        if not request.future.done():
+            request.future.set_result(result)
+
+    def _drop_idle_buckets(self):
+        now = time.monotonic()
+        for chat_id, bucket in list(self.chat_buckets.items()):
+            if bucket.tokens >= bucket.capacity and now - bucket.updated > BUCKET_IDLE:
+                del self.chat_buckets[chat_id]
+
+    def get_status(self):
+        """Queue depth and queue-latency metrics per lane"""
+        lanes = {}
+        for lane in LANES:
+            samples = sorted(self.latencies[lane])
+            lanes[lane] = {
+                "depth": len(self.lanes[lane]),
+                "samples": len(samples),
+                "avg_wait": round(sum(samples) / len(samples), 4) if samples else None,
+                "p95_wait": round(samples[max(0, int(len(samples) * 0.95) - 1)], 4) if samples else None,
+                "max_wait": round(samples[-1], 4) if samples else None,
+            }
+        return {
+            "lanes": lanes,
+            "inflight": len(self.inflight),
+            "chat_buckets": len(self.chat_buckets),
+            "stats": dict(self.stats),
+        }
+
+
+# Shared instance used by the webhook application
+OUTBOUND_SCHEDULER = OutboundScheduler()
+
+
+def get_outbound_status():
+    return OUTBOUND_SCHEDULER.get_status()
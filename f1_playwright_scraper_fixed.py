@@ -1,10 +1,19 @@
+import os
+import time
 import asyncio
 import logging
+import importlib.util
 from bs4 import BeautifulSoup
 from datetime import datetime
 
+from f1_metrics import PAGE_READY
+from f1_executor import run_cpu
+
 logging.basicConfig(level=logging.INFO)
 
+# lxml builds the tree in C; html.parser is the pure-Python fallback
+HTML_PARSER = os.getenv("F1_HTML_PARSER") or ("lxml" if importlib.util.find_spec("lxml") else "html.parser")
+
 class OptimizedLiveTimingScraper:
     def __init__(self):
         self.browser = None
@@ -25,7 +34,9 @@ class OptimizedLiveTimingScraper:
             self.page = await self.context.new_page()
 
             logging.info("Loading formula-timer.com live timing (one time)...")
+            started = time.perf_counter()
             await self.page.goto('https://formula-timer.com/livetiming', wait_until='domcontentloaded')
+            PAGE_READY.observe(time.perf_counter() - started)
             await self.page.wait_for_timeout(3000)
 
             return True
@@ -41,23 +52,15 @@ class OptimizedLiveTimingScraper:
 
             # Just read current DOM - no reload!
             content = await self.page.content()
-            soup = BeautifulSoup(content, "html.parser")
-
-            session_info = self._extract_session_info(soup)
-            timing_data = self._extract_timing_data(soup)
-            race_control = self._extract_race_control_messages(soup)
-
-            return {
-                "session": session_info,
-                "timing": timing_data,
-                "race_control": race_control[:5] if race_control else []
-            }
+            # Only the page source goes to the CPU stage; plain dicts come back
+            return await run_cpu(parse_live_timing_html, content)
 
         except Exception as e:
             logging.error(f"Error getting live data: {e}")
             return None
 
-    def _extract_session_info(self, soup):
+    @staticmethod
+    def _extract_session_info(soup):
         """Extract current session information"""
         try:
             session_title = soup.find('h1')
@@ -68,7 +71,8 @@ class OptimizedLiveTimingScraper:
             pass
         return {"name": "Unknown Session"}
 
-    def _extract_timing_data(self, soup):
+    @staticmethod
+    def _extract_timing_data(soup):
         """Extract live timing data from the main timing table"""
         timing_data = []
 
@@ -149,7 +153,8 @@ class OptimizedLiveTimingScraper:
 
         return timing_data
 
-    def _extract_race_control_messages(self, soup):
+    @staticmethod
+    def _extract_race_control_messages(soup):
         """Extract race control messages"""
         messages = []
 
@@ -192,6 +197,22 @@ class OptimizedLiveTimingScraper:
         except Exception as e:
             logging.error(f"Error during cleanup: {e}")
 
+def parse_live_timing_html(html):
+    """Parse a formula-timer.com live timing page into session, timing and race control dicts"""
+    soup = BeautifulSoup(html, HTML_PARSER)
+    race_control = OptimizedLiveTimingScraper._extract_race_control_messages(soup)
+    return {
+        "session": OptimizedLiveTimingScraper._extract_session_info(soup),
+        "timing": OptimizedLiveTimingScraper._extract_timing_data(soup),
+        "race_control": race_control[:5] if race_control else []
+    }
+
+LIVE_SOURCE_LABELS = {
+    "formula_timer": "formula-timer.com",
+    "openf1": "openf1.org",
+    "formula1": "formula1.com",
+}
+
 def format_timing_data_for_telegram(data):
     """Format the scraped data for Telegram bot display"""
     if not data:
@@ -207,16 +228,19 @@ def format_timing_data_for_telegram(data):
         for driver in timing:
             pos = driver.get('position', 'N/A')
             name = driver.get('driver', 'N/A')
-            interval = driver.get('interval', 'N/A')
-            best_lap = driver.get('best_lap', 'N/A')
-            tyre = driver.get('tyre_compound', 'N/A')
+            # Sources other than formula-timer.com don't have every column
+            columns = [driver.get(key) for key in ('interval', 'best_lap', 'tyre_compound')]
+            columns = [str(value) for value in columns if value not in (None, '', 'N/A')]
 
-            message += f"P{pos}: {name} | {interval} | {best_lap} | {tyre}\n"
+            message += f"P{pos}: {' | '.join([name] + columns)}\n"
     else:
         message += "No timing data available - session may not be active\n"
 
-    now = datetime.now()
-    message += f"\nLast update: {now.strftime('%H:%M:%S')}"
+    # A normalized snapshot (f1_live_sources) says when its data was current
+    updated = datetime.fromtimestamp(data['updated_at']) if data.get('updated_at') else datetime.now()
+    message += f"\nLast update: {updated.strftime('%H:%M:%S')}"
+    if data.get('source'):
+        message += f"\nSource: {LIVE_SOURCE_LABELS.get(data['source'], data['source'])}"
 
     return message
 
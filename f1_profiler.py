@@ -0,0 +1,275 @@
+"""
+On-demand CPU and memory profiling for the running bot
+A sampling profiler reads every thread's Python stack (sys._current_frames)
+on a timer, so the event loop, its to_thread workers and the live producer's
+Playwright/BeautifulSoup thread are covered without instrumenting them.
+Profiles export as collapsed stacks (flamegraph.pl, speedscope) or speedscope
+JSON. Memory profiling wraps tracemalloc: snapshots are diffed against the
+previous one and can be downloaded for tracemalloc.Snapshot.load().
+"""
+
+import os
+import sys
+import time
+import logging
+import tempfile
+import threading
+import tracemalloc
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.005
+# Profiles stop on their own so a forgotten start doesn't tax production forever
+MAX_PROFILE_SECONDS = float(os.getenv("F1_PROFILE_MAX_SECONDS", "300"))
+TRACEMALLOC_FRAMES = int(os.getenv("F1_TRACEMALLOC_FRAMES", "25"))
+TOP_ALLOCATORS = 25
+
+# Leaf frames of threads that are waiting rather than running; skipped unless include_idle
+IDLE_LEAVES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+PROFILER_STATE = {
+    "cpu": None,
+    "last_cpu": None,
+    "memory_baseline": None,
+    "memory_snapshots": 0,
+}
+
+
+class SamplingProfiler:
+    """Samples all threads' stacks every `interval` seconds in a daemon thread"""
+
+    def __init__(self, interval=DEFAULT_INTERVAL, max_seconds=MAX_PROFILE_SECONDS, include_idle=False):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.include_idle = include_idle
+        # (thread name, (code, ...) root first) -> samples
+        self.stacks = Counter()
+        self.samples = 0
+        self.idle_samples = 0
+        self.started = None
+        self.stopped = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self.started = time.time()
+        self._thread = threading.Thread(target=self._run, name="f1-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval):
+            if time.monotonic() >= deadline:
+                logger.info(f"CPU profile stopped after its {self.max_seconds:.0f}s limit")
+                break
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                if not codes:
+                    continue
+                leaf = codes[0]
+                if not self.include_idle and (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_LEAVES:
+                    self.idle_samples += 1
+                    continue
+                codes.reverse()
+                self.stacks[(names.get(ident, str(ident)), tuple(codes))] += 1
+                self.samples += 1
+        self.stopped = time.time()
+
+    def duration(self):
+        return (self.stopped or time.time()) - self.started if self.started else 0.0
+
+    def collapsed(self):
+        """Brendan Gregg's folded format: "thread;frame;frame count" per line"""
+        lines = []
+        for (thread_name, codes), count in self.stacks.most_common():
+            frames = ";".join(_frame_name(code) for code in codes)
+            lines.append(f"{thread_name};{frames} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self):
+        """speedscope.app file format: one sampled profile per thread"""
+        frame_index = {}
+        frames = []
+        profiles = {}
+        for (thread_name, codes), count in self.stacks.items():
+            stack = []
+            for code in codes:
+                key = (code.co_filename, code.co_name, code.co_firstlineno)
+                if key not in frame_index:
+                    frame_index[key] = len(frames)
+                    frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+                stack.append(frame_index[key])
+            profile = profiles.setdefault(thread_name, {"samples": [], "weights": []})
+            profile["samples"].append(stack)
+            profile["weights"].append(round(count * self.interval, 6))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"f1-bot pid {os.getpid()}",
+            "exporter": "f1_profiler",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": thread_name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": round(sum(profile["weights"]), 6),
+                    "samples": profile["samples"],
+                    "weights": profile["weights"],
+                }
+                for thread_name, profile in sorted(profiles.items())
+            ],
+        }
+
+    def top_functions(self, limit=20):
+        """Functions by self samples (the leaf of each stack)"""
+        leaves = Counter()
+        for (_, codes), count in self.stacks.items():
+            leaves[_frame_name(codes[-1])] += count
+        total = self.samples or 1
+        return [{"function": name, "samples": count, "share": round(count / total, 4)}
+                for name, count in leaves.most_common(limit)]
+
+    def summary(self):
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "duration": round(self.duration(), 2),
+            "samples": self.samples,
+            "idle_samples": self.idle_samples,
+            "distinct_stacks": len(self.stacks),
+        }
+
+
+def _frame_name(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+
+
+def start_cpu_profile(interval=DEFAULT_INTERVAL, max_seconds=MAX_PROFILE_SECONDS, include_idle=False):
+    """Start sampling; raises RuntimeError if a profile is already running"""
+    if interval <= 0:
+        raise ValueError("interval must be positive")
+    current = PROFILER_STATE["cpu"]
+    if current is not None and current.running:
+        raise RuntimeError("A CPU profile is already running")
+    profiler = SamplingProfiler(interval, min(max_seconds, MAX_PROFILE_SECONDS), include_idle)
+    profiler.start()
+    PROFILER_STATE["cpu"] = profiler
+    logger.info(f"CPU profile started (interval {interval * 1000:.1f}ms)")
+    return profiler
+
+
+def stop_cpu_profile():
+    """Stop the running profile (or return the one that hit its time limit); None if none"""
+    profiler = PROFILER_STATE["cpu"]
+    if profiler is None:
+        return PROFILER_STATE["last_cpu"]
+    profiler.stop()
+    PROFILER_STATE["cpu"] = None
+    PROFILER_STATE["last_cpu"] = profiler
+    logger.info(f"CPU profile stopped: {profiler.samples} samples over {profiler.duration():.1f}s")
+    return profiler
+
+
+def start_memory_tracing(frames=TRACEMALLOC_FRAMES):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    PROFILER_STATE["memory_baseline"] = tracemalloc.take_snapshot()
+    PROFILER_STATE["memory_snapshots"] = 0
+
+
+def stop_memory_tracing():
+    PROFILER_STATE["memory_baseline"] = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def _filtered(snapshot):
+    return snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+
+
+def take_memory_snapshot(limit=TOP_ALLOCATORS, group_by="lineno"):
+    """Top allocation growth since the previous snapshot; the new snapshot becomes the baseline"""
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("Memory tracing is not running")
+    snapshot = _filtered(tracemalloc.take_snapshot())
+    baseline = PROFILER_STATE["memory_baseline"]
+    PROFILER_STATE["memory_baseline"] = snapshot
+    PROFILER_STATE["memory_snapshots"] += 1
+    current, peak = tracemalloc.get_traced_memory()
+    result = {
+        "traced_bytes": current,
+        "peak_traced_bytes": peak,
+        "group_by": group_by,
+    }
+    if baseline is None:
+        result["top"] = [_stat_dict(stat) for stat in snapshot.statistics(group_by)[:limit]]
+    else:
+        result["top_growth"] = [_stat_dict(stat) for stat in
+                                snapshot.compare_to(_filtered(baseline), group_by)[:limit]]
+    return result
+
+
+def _stat_dict(stat):
+    entry = {
+        "location": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+        "size_bytes": stat.size,
+        "count": stat.count,
+    }
+    if isinstance(stat, tracemalloc.StatisticDiff):
+        entry["size_diff_bytes"] = stat.size_diff
+        entry["count_diff"] = stat.count_diff
+    return entry
+
+
+def dump_memory_snapshot():
+    """Current snapshot in tracemalloc's own file format (load with tracemalloc.Snapshot.load)"""
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("Memory tracing is not running")
+    snapshot = tracemalloc.take_snapshot()
+    fd, path = tempfile.mkstemp(prefix="f1-tracemalloc-", suffix=".snapshot")
+    os.close(fd)
+    try:
+        snapshot.dump(path)
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.unlink(path)
+
+
+def get_profiler_status():
+    profiler = PROFILER_STATE["cpu"] or PROFILER_STATE["last_cpu"]
+    return {
+        "cpu": profiler.summary() if profiler else None,
+        "memory_tracing": tracemalloc.is_tracing(),
+        "memory_snapshots": PROFILER_STATE["memory_snapshots"],
+        "traced_bytes": tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None,
+    }
@@ -0,0 +1,116 @@
+"""
+Deferred rendering for callback queries
+The button's message is edited to a lightweight placeholder right away and
+the heavy render (upstream fetches, formatting) runs as a tracked background
+task. A newer tap on the same message cancels the older pending render.
+"""
+
+import os
+import asyncio
+import logging
+
+from telegram.error import BadRequest
+
+from f1_trace import span
+
+logger = logging.getLogger(__name__)
+
+# Seconds a render may take before the placeholder is replaced with an error
+RENDER_TIMEOUT = float(os.getenv("F1_RENDER_TIMEOUT", "25"))
+
+# (chat_id, message_id) -> pending render task
+RENDER_TASKS = {}
+
+RENDER_STATS = {
+    "started": 0,
+    "completed": 0,
+    "superseded": 0,
+    "timed_out": 0,
+    "failed": 0,
+}
+
+
+async def _call(render):
+    with span("deferred_render", render=getattr(render, "__name__", "render")):
+        if asyncio.iscoroutinefunction(render):
+            return await render()
+        # Blocking fetchers run in a worker thread; a cancelled render's thread
+        # finishes in the background and its result is discarded
+        return await asyncio.to_thread(render)
+
+
+async def _safe_edit(message, text, reply_markup=None, parse_mode="Markdown"):
+    try:
+        await message.edit_text(text, parse_mode=parse_mode, reply_markup=reply_markup)
+    except BadRequest as e:
+        if "not modified" not in str(e).lower():
+            raise
+
+
+async def _render_and_edit(message, render, reply_markup, timeout, timeout_text, error_text):
+    try:
+        result = await asyncio.wait_for(_call(render), timeout)
+    except asyncio.TimeoutError:
+        RENDER_STATS["timed_out"] += 1
+        logger.warning(f"Render for message {message.message_id} timed out after {timeout}s")
+        await _safe_edit(message, timeout_text, reply_markup)
+        return
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        RENDER_STATS["failed"] += 1
+        logger.error(f"Render for message {message.message_id} failed: {e}")
+        await _safe_edit(message, error_text.format(str(e)), reply_markup)
+        return
+
+    # A render may choose its own keyboard by returning (text, reply_markup)
+    if isinstance(result, tuple):
+        result, reply_markup = result
+    await _safe_edit(message, result, reply_markup)
+    RENDER_STATS["completed"] += 1
+
+
+def _forget(key, task):
+    if RENDER_TASKS.get(key) is task:
+        del RENDER_TASKS[key]
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Deferred edit of message {key[1]} failed: {task.exception()}")
+
+
+async def deferred_edit(message, render, placeholder, reply_markup=None, *,
+                        timeout=RENDER_TIMEOUT, timeout_text, error_text):
+    """Edit `message` to `placeholder` now and to render()'s text when it is ready
+
+    render: blocking callable or coroutine function returning the message text
+    (or a (text, reply_markup) tuple). error_text gets the exception via format().
+    Returns the background task.
+    """
+    key = (message.chat_id, message.message_id)
+    previous = RENDER_TASKS.get(key)
+    if previous is not None and not previous.done():
+        previous.cancel()
+        RENDER_STATS["superseded"] += 1
+
+    await _safe_edit(message, placeholder, parse_mode=None)
+
+    RENDER_STATS["started"] += 1
+    task = asyncio.get_running_loop().create_task(
+        _render_and_edit(message, render, reply_markup, timeout, timeout_text, error_text)
+    )
+    RENDER_TASKS[key] = task
+    task.add_done_callback(lambda done: _forget(key, done))
+    return task
+
+
+async def wait_pending_renders(timeout=RENDER_TIMEOUT + 5):
+    """Wait for in-flight renders (serverless entry points close the loop after each update)"""
+    tasks = [task for task in RENDER_TASKS.values() if not task.done()]
+    if tasks:
+        await asyncio.wait(tasks, timeout=timeout)
+
+
+def get_render_status():
+    return {
+        "pending": sum(1 for task in RENDER_TASKS.values() if not task.done()),
+        "stats": dict(RENDER_STATS),
+    }
@@ -0,0 +1,91 @@
+"""
+Table-driven callback query router
+Callback data has the form "name" or "name:arg1:arg2"; the name selects a
+registered handler in one dict lookup and the args are passed through, so
+parameterised and paginated views don't add branches to the dispatcher.
+"""
+
+import time
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Default per-route budget for the handler itself (deferred renders return early)
+DEFAULT_ROUTE_TIMEOUT = 30.0
+
+
+class Route:
+    __slots__ = ("name", "handler", "timeout", "calls", "errors", "timeouts", "total_time", "max_time")
+
+    def __init__(self, name, handler, timeout):
+        self.name = name
+        self.handler = handler
+        self.timeout = timeout
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def to_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "avg_ms": round(self.total_time / self.calls * 1000, 1) if self.calls else None,
+            "max_ms": round(self.max_time * 1000, 1),
+        }
+
+
+class CallbackRouter:
+    """Maps callback data names to `async handler(query, context, *args)`"""
+
+    def __init__(self, separator=":"):
+        self.separator = separator
+        self.routes = {}
+        self.fallback = None
+
+    def route(self, name, timeout=DEFAULT_ROUTE_TIMEOUT):
+        """Decorator registering a handler for callback data `name[:args...]`"""
+        def register(handler):
+            if name in self.routes:
+                raise ValueError(f"Callback route {name!r} registered twice")
+            self.routes[name] = Route(name, handler, timeout)
+            return handler
+        return register
+
+    def set_fallback(self, handler):
+        """Handler for unknown callback data, called as handler(query, context)"""
+        self.fallback = handler
+        return handler
+
+    async def dispatch(self, query, context):
+        """Run the handler for query.data; returns False if no route matched"""
+        name, _, raw_args = (query.data or "").partition(self.separator)
+        route = self.routes.get(name)
+        if route is None:
+            if self.fallback is not None:
+                await self.fallback(query, context)
+            return False
+
+        args = raw_args.split(self.separator) if raw_args else []
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(route.handler(query, context, *args), route.timeout)
+        except asyncio.TimeoutError:
+            route.timeouts += 1
+            logger.warning(f"Callback route {name} timed out after {route.timeout}s")
+            raise
+        except Exception:
+            route.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            route.calls += 1
+            route.total_time += elapsed
+            route.max_time = max(route.max_time, elapsed)
+        return True
+
+    def get_status(self):
+        return {name: route.to_dict() for name, route in self.routes.items()}
@@ -0,0 +1,347 @@
+"""
+Calendar-aware prefetch scheduler
+Warms caches ahead of each session and refreshes standings after races,
+so the first users of a session don't pay for cold upstream fetches.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from f1_calendar import get_season_races, race_sessions, current_season, RESULTS_DELAY
+from f1_ttl import update_ttl_calendar
+from f1_weather import refresh_upcoming_forecasts
+from f1_store import shared_get, shared_set
+from f1_trace import detach
+
+logger = logging.getLogger(__name__)
+
+# How long before a session starts caches are warmed
+PREWARM_LEAD = timedelta(minutes=int(os.getenv("F1_PREWARM_LEAD_MINUTES", "30")))
+# Only sessions starting within this horizon are scheduled
+SCHEDULE_HORIZON = timedelta(days=14)
+# Re-read the calendar this often so reschedules are picked up
+SCHEDULE_REFRESH = timedelta(hours=12)
+# Upcoming weekend forecasts are checked this often (each is re-fetched when older than its refresh age)
+WEATHER_CHECK = timedelta(minutes=30)
+# Failed jobs are retried after this delay, up to MAX_ATTEMPTS times
+RETRY_DELAY = timedelta(minutes=5)
+MAX_ATTEMPTS = 3
+# Finished jobs kept for the status endpoint
+HISTORY_LIMIT = 50
+# Sessions announced to "reminders" subscribers when their prewarm job runs
+REMINDER_SESSIONS = {"SprintQualifying", "SprintShootout", "Sprint", "Qualifying", "Race"}
+
+SCHEDULER_STATE = {
+    "jobs": {},
+    "history": [],
+    # IDs of finished jobs; a calendar refresh re-emits them while their session is ahead
+    "completed": set(),
+    "schedule_built_at": None,
+    "weather_checked_at": None,
+    "task": None,
+    "bot": None,
+}
+
+
+class PrefetchJob:
+    """A single scheduled warm-up or refresh"""
+
+    def __init__(self, job_id, kind, run_at, race_name, session_key, session_name=None, session_start=None):
+        self.job_id = job_id
+        self.kind = kind
+        self.run_at = run_at
+        self.race_name = race_name
+        self.session_key = session_key
+        self.session_name = session_name
+        self.session_start = session_start
+        self.status = "pending"
+        self.attempts = 0
+        self.last_run = None
+        self.duration = None
+        self.error = None
+        self.steps = {}
+
+    def to_dict(self):
+        return {
+            "id": self.job_id,
+            "kind": self.kind,
+            "run_at": self.run_at.isoformat(),
+            "race": self.race_name,
+            "session": self.session_key,
+            "session_start": self.session_start.isoformat() if self.session_start else None,
+            "status": self.status,
+            "attempts": self.attempts,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "duration": round(self.duration, 3) if self.duration is not None else None,
+            "error": self.error,
+            "steps": self.steps,
+        }
+
+
+def build_schedule(races, now=None):
+    """Plan prewarm and post-session refresh jobs for sessions within the horizon"""
+    now = now or datetime.now(ZoneInfo("UTC"))
+    jobs = []
+    for race in races:
+        race_name = race.get("raceName", "Grand Prix")
+        round_no = race.get("round", "?")
+        for session in race_sessions(race):
+            start = session["start"]
+            if start > now + SCHEDULE_HORIZON:
+                continue
+            key = session["key"]
+            prewarm_at = start - PREWARM_LEAD
+            job_prefix = f"{race.get('season')}-{round_no}-{key}"
+            if start >= now:
+                jobs.append(PrefetchJob(f"{job_prefix}-prewarm", "prewarm", prewarm_at, race_name, key, session["name"], start))
+            delay = RESULTS_DELAY.get(key)
+            if delay and start + delay >= now:
+                jobs.append(PrefetchJob(f"{job_prefix}-results", "results", start + delay, race_name, key, session["name"], start))
+    return jobs
+
+
+def refresh_schedule(now=None):
+    """Reload the calendar and merge new jobs, keeping state of known ones"""
+    now = now or datetime.now(ZoneInfo("UTC"))
+    races = get_season_races(current_season(now))
+    if not races:
+        logger.warning("Prefetch scheduler: no calendar available")
+        return False
+    update_ttl_calendar(races)
+
+    jobs = SCHEDULER_STATE["jobs"]
+    completed = SCHEDULER_STATE["completed"]
+    for job in build_schedule(races, now):
+        existing = jobs.get(job.job_id)
+        if existing is None:
+            if job.job_id in completed:
+                continue
+            if shared_get(f"scheduler:done:{job.job_id}"):
+                # Finished by another instance (a fresh serverless instance starts with no history)
+                completed.add(job.job_id)
+                continue
+            jobs[job.job_id] = job
+        elif existing.status == "pending":
+            # Session may have been rescheduled
+            existing.run_at = job.run_at
+    SCHEDULER_STATE["schedule_built_at"] = now
+    return True
+
+
+def _prewarm_steps(session_key):
+    from f1_bot_live import (
+        get_driver_data,
+        get_constructor_data,
+        get_next_race,
+        get_cached_data,
+        invalidate_cached_data,
+    )
+    from f1_http import conditional_get_json, OPENF1_URL
+
+    season = current_season()
+
+    def sessions_index():
+        data, _ = conditional_get_json(f"{OPENF1_URL}/v1/sessions?year={season}", timeout=10)
+        if data is None:
+            raise RuntimeError("OpenF1 sessions index unavailable")
+
+    def schedule_and_weather():
+        invalidate_cached_data("next_race")
+        get_next_race()
+        if get_cached_data("next_race") is None:
+            raise RuntimeError("next race not refreshed")
+        refresh_upcoming_forecasts()
+
+    def required(fetcher, what):
+        def step():
+            if not fetcher(season):
+                raise RuntimeError(f"{what} unavailable")
+        return step
+
+    return [
+        ("sessions_index", sessions_index),
+        ("drivers", required(get_driver_data, "driver data")),
+        ("constructors", required(get_constructor_data, "constructor data")),
+        ("schedule_weather", schedule_and_weather),
+    ]
+
+
+def _results_steps(session_key):
+    from f1_bot_live import (
+        get_current_standings,
+        get_constructor_standings,
+        get_last_session_results,
+        get_cached_data,
+        invalidate_cached_data,
+    )
+
+    def refresh(cache_key, fetcher):
+        # Fetchers return error text instead of raising; only a re-filled cache counts
+        def step():
+            invalidate_cached_data(cache_key)
+            fetcher()
+            if get_cached_data(cache_key) is None:
+                raise RuntimeError(f"{cache_key} not refreshed")
+        return step
+
+    steps = [("last_session", refresh("last_session", get_last_session_results))]
+    if session_key in ("Race", "Sprint"):
+        steps.append(("standings", refresh("standings", get_current_standings)))
+        steps.append(("constructor_standings", refresh("constructor_standings", get_constructor_standings)))
+    return steps
+
+
+async def _warm_browser():
+    # Signals demand so the elected producer (possibly another worker) starts its browser
+    from f1_live_producer import get_live_snapshot
+
+    if await get_live_snapshot() is None:
+        raise RuntimeError("Live timing producer did not publish a snapshot")
+
+
+def _queue_notification(job, failed):
+    """Render the job's subscriber notification once and queue its broadcast"""
+    from f1_bot_live import TRANSLATIONS, get_cached_data
+    from f1_broadcast import create_broadcast
+
+    if job.kind == "prewarm":
+        if job.session_key not in REMINDER_SESSIONS or job.session_start is None:
+            return
+        if datetime.now(ZoneInfo("UTC")) >= job.session_start:
+            # A retried prewarm that ran past the start is no longer a reminder
+            return
+        baku_time = job.session_start.astimezone(ZoneInfo("Asia/Baku")).strftime("%d.%m %H:%M")
+        text = TRANSLATIONS["notify_session_reminder"].format(
+            job.race_name, TRANSLATIONS.get(job.session_name, job.session_key), baku_time
+        )
+        create_broadcast(job.job_id, "reminders", text)
+    elif "last_session" not in failed:
+        results = get_cached_data("last_session")
+        if results:
+            create_broadcast(job.job_id, "results", TRANSLATIONS["notify_results"].format(results))
+
+
+async def run_job(job):
+    """Execute a job's steps; blocking fetchers run in a worker thread"""
+    job.status = "running"
+    job.attempts += 1
+    job.last_run = datetime.now(ZoneInfo("UTC"))
+    job.steps = {}
+    started = time.monotonic()
+
+    steps = _prewarm_steps(job.session_key) if job.kind == "prewarm" else _results_steps(job.session_key)
+    failed = []
+    for name, step in steps:
+        try:
+            await asyncio.to_thread(step)
+            job.steps[name] = "ok"
+        except Exception as e:
+            logger.error(f"Prefetch job {job.job_id} step {name} failed: {e}")
+            job.steps[name] = f"error: {e}"
+            failed.append(name)
+
+    if job.kind == "prewarm":
+        try:
+            await _warm_browser()
+            job.steps["browser"] = "ok"
+        except Exception as e:
+            logger.warning(f"Prefetch job {job.job_id} browser warm-up failed: {e}")
+            job.steps["browser"] = f"error: {e}"
+
+    try:
+        await asyncio.to_thread(_queue_notification, job, failed)
+    except Exception as e:
+        logger.error(f"Prefetch job {job.job_id} could not queue notification: {e}")
+
+    job.duration = time.monotonic() - started
+    if failed and job.attempts < MAX_ATTEMPTS:
+        job.status = "pending"
+        job.error = f"failed steps: {', '.join(failed)}"
+        job.run_at = datetime.now(ZoneInfo("UTC")) + RETRY_DELAY
+    else:
+        job.status = "failed" if failed else "ok"
+        job.error = f"failed steps: {', '.join(failed)}" if failed else None
+    logger.info(f"Prefetch job {job.job_id} finished: {job.status} in {job.duration:.1f}s")
+    return job
+
+
+async def run_due_jobs(now=None):
+    """Run every pending job whose time has come (one tick of the scheduler)"""
+    now = now or datetime.now(ZoneInfo("UTC"))
+    built_at = SCHEDULER_STATE["schedule_built_at"]
+    if built_at is None or now - built_at >= SCHEDULE_REFRESH:
+        await asyncio.to_thread(refresh_schedule, now)
+
+    checked_at = SCHEDULER_STATE["weather_checked_at"]
+    if checked_at is None or now - checked_at >= WEATHER_CHECK:
+        try:
+            await asyncio.to_thread(refresh_upcoming_forecasts, now)
+        except Exception as e:
+            logger.error(f"Weather refresh failed: {e}")
+        SCHEDULER_STATE["weather_checked_at"] = now
+
+    jobs = SCHEDULER_STATE["jobs"]
+    due = sorted(
+        (job for job in jobs.values() if job.status == "pending" and job.run_at <= now),
+        key=lambda job: job.run_at,
+    )
+    for job in due:
+        await run_job(job)
+        if job.status != "pending":
+            del jobs[job.job_id]
+            SCHEDULER_STATE["completed"].add(job.job_id)
+            await asyncio.to_thread(
+                shared_set, f"scheduler:done:{job.job_id}", True, SCHEDULE_HORIZON.total_seconds()
+            )
+            history = SCHEDULER_STATE["history"]
+            history.append(job)
+            del history[:-HISTORY_LIMIT]
+    return due
+
+
+async def scheduler_loop(interval=60):
+    """Long-running loop for deployments with a persistent process"""
+    detach()
+    logger.info("Prefetch scheduler started")
+    while True:
+        try:
+            await run_due_jobs()
+        except Exception as e:
+            logger.error(f"Prefetch scheduler tick failed: {e}")
+        if SCHEDULER_STATE["bot"] is not None:
+            try:
+                from f1_broadcast import start_broadcast_worker
+                start_broadcast_worker(SCHEDULER_STATE["bot"])
+            except Exception as e:
+                logger.error(f"Broadcast worker could not start: {e}")
+        await asyncio.sleep(interval)
+
+
+def start_prefetch_scheduler(interval=60, bot=None):
+    """Start the scheduler loop on the running event loop (idempotent)
+
+    With a bot, queued notification broadcasts are delivered from the loop too.
+    """
+    if bot is not None:
+        SCHEDULER_STATE["bot"] = bot
+    task = SCHEDULER_STATE["task"]
+    if task is None or task.done():
+        SCHEDULER_STATE["task"] = asyncio.get_running_loop().create_task(scheduler_loop(interval))
+    return SCHEDULER_STATE["task"]
+
+
+def get_scheduler_status():
+    """Upcoming jobs and recent outcomes for the status endpoint"""
+    built_at = SCHEDULER_STATE["schedule_built_at"]
+    task = SCHEDULER_STATE["task"]
+    return {
+        "running": task is not None and not task.done(),
+        "schedule_built_at": built_at.isoformat() if built_at else None,
+        "prewarm_lead_minutes": int(PREWARM_LEAD.total_seconds() // 60),
+        "pending": [job.to_dict() for job in sorted(SCHEDULER_STATE["jobs"].values(), key=lambda job: job.run_at)],
+        "history": [job.to_dict() for job in reversed(SCHEDULER_STATE["history"])],
+    }
@@ -0,0 +1,482 @@
+"""
+Pluggable shared cache / dedup backend
+One interface with in-memory (single process), SQLite (processes on one host)
+and Redis-protocol (multiple hosts) implementations. Besides get/set it offers
+atomic set-if-absent for update dedup and single-flight locks so only one
+process refills an expired cache entry while the others wait for it.
+
+Selected with F1_CACHE_BACKEND=memory|sqlite|redis and F1_CACHE_URL
+(SQLite path or redis://[:password@]host:port/db).
+"""
+
+import os
+import time
+import json
+import uuid
+import socket
+import sqlite3
+import logging
+import functools
+import threading
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# How long a process waits for another process's single-flight fill (seconds)
+SINGLE_FLIGHT_WAIT = 15.0
+SINGLE_FLIGHT_POLL = 0.1
+
+
+def _dumps(value):
+    """JSON bytes for a stored value; objects may provide to_json() returning plain data"""
+    return json.dumps(value, default=_to_json, separators=(",", ":")).encode()
+
+
+def _to_json(value):
+    to_json = getattr(value, "to_json", None)
+    if to_json is None:
+        raise TypeError(f"{type(value).__name__} is not JSON serializable")
+    return to_json()
+
+
+def _loads(payload):
+    # JSON rather than pickle: whoever can write to a shared backend must not be able to run code here
+    return json.loads(payload)
+
+
+class CacheBackend:
+    """Interface shared by all backends; values must be JSON-serializable (tuples come back as lists)"""
+
+    name = "base"
+    # Whether other processes see what this backend stores
+    shared = False
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def set_if_absent(self, key, value, ttl=None):
+        """Atomically store value unless key exists; True if this call stored it"""
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def delete_if_equal(self, key, value):
+        """Atomically delete key only while it still holds value"""
+        raise NotImplementedError
+
+    def acquire_lock(self, name, ttl=30):
+        """Token if the lock was taken, None if another holder has it"""
+        token = uuid.uuid4().hex
+        return token if self.set_if_absent(f"lock:{name}", token, ttl) else None
+
+    def release_lock(self, name, token):
+        return self.delete_if_equal(f"lock:{name}", token)
+
+    def wait_for_lock(self, name, wait=SINGLE_FLIGHT_WAIT):
+        """Block until the lock is released (or `wait` seconds pass)"""
+        deadline = time.monotonic() + wait
+        while time.monotonic() < deadline and self.get(f"lock:{name}") is not None:
+            time.sleep(SINGLE_FLIGHT_POLL)
+
+
+class MemoryBackend(CacheBackend):
+    """Process-local dictionary (the previous behaviour)"""
+
+    name = "memory"
+
+    # Expired keys are swept once the dict grows past this size
+    SWEEP_SIZE = 10000
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= now:
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key, time.time())
+        return entry[0] if entry else None
+
+    def _sweep(self, now):
+        if len(self._data) > self.SWEEP_SIZE:
+            for key in [key for key, entry in self._data.items() if entry[1] is not None and entry[1] <= now]:
+                del self._data[key]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            now = time.time()
+            self._sweep(now)
+            self._data[key] = (value, now + ttl if ttl else None)
+
+    def set_if_absent(self, key, value, ttl=None):
+        with self._lock:
+            now = time.time()
+            if self._live(key, now) is not None:
+                return False
+            self._sweep(now)
+            self._data[key] = (value, now + ttl if ttl else None)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_if_equal(self, key, value):
+        with self._lock:
+            entry = self._live(key, time.time())
+            if entry is None or entry[0] != value:
+                return False
+            del self._data[key]
+            return True
+
+
+class SQLiteBackend(CacheBackend):
+    """Shared between processes (gunicorn workers) through one database file"""
+
+    name = "sqlite"
+    shared = True
+
+    # Expired rows (mostly update dedup claims) are deleted at most this often (seconds)
+    PURGE_INTERVAL = 300
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS kv (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        expires_at REAL
+    )
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Autocommit mode; writes that must be atomic use explicit BEGIN IMMEDIATE
+        self._connection = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(self._SCHEMA)
+        self._lock = threading.Lock()
+        self._purged_at = time.monotonic()
+
+    def get(self, key):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time()),
+            ).fetchone()
+        return _loads(row[0]) if row else None
+
+    def _maybe_purge(self):
+        # Expired keys are otherwise only replaced when the same key is written again
+        if time.monotonic() - self._purged_at >= self.PURGE_INTERVAL:
+            self._purged_at = time.monotonic()
+            self.purge_expired()
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, _dumps(value), time.time() + ttl if ttl else None),
+            )
+        self._maybe_purge()
+
+    def set_if_absent(self, key, value, ttl=None):
+        now = time.time()
+        with self._lock:
+            connection = self._connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute("DELETE FROM kv WHERE key = ? AND expires_at IS NOT NULL AND expires_at <= ?", (key, now))
+                stored = connection.execute(
+                    "INSERT OR IGNORE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, _dumps(value), now + ttl if ttl else None),
+                ).rowcount == 1
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        self._maybe_purge()
+        return stored
+
+    def delete(self, key):
+        with self._lock:
+            self._connection.execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def delete_if_equal(self, key, value):
+        with self._lock:
+            return self._connection.execute(
+                "DELETE FROM kv WHERE key = ? AND value = ?", (key, _dumps(value))
+            ).rowcount == 1
+
+    def purge_expired(self):
+        with self._lock:
+            return self._connection.execute(
+                "DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            ).rowcount
+
+
+class RespError(Exception):
+    """Error reply from a Redis-protocol server"""
+
+
+class RedisBackend(CacheBackend):
+    """Minimal RESP client: works with Redis, Valkey, KeyDB or a local stand-in"""
+
+    name = "redis"
+    shared = True
+
+    # Compare-and-delete for lock release
+    _RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+    def __init__(self, url, timeout=5.0, prefix="f1:"):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self.prefix = prefix
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+        if self.password:
+            self._roundtrip(("AUTH", self.password))
+        if self.db:
+            self._roundtrip(("SELECT", self.db))
+
+    def _close(self):
+        try:
+            if self._sock is not None:
+                self._sock.close()
+        finally:
+            self._sock = None
+            self._reader = None
+
+    @staticmethod
+    def _encode(args):
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if isinstance(arg, str):
+                arg = arg.encode()
+            elif isinstance(arg, (int, float)):
+                arg = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RespError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(payload)
+            if count < 0:
+                return None
+            return [self._read_reply() for _ in range(count)]
+        raise RespError(f"Unexpected reply type {kind!r}")
+
+    def _roundtrip(self, args):
+        self._sock.sendall(self._encode(args))
+        return self._read_reply()
+
+    def command(self, *args, retry=True):
+        """Send one command; retry=False for writes that must not be applied twice"""
+        with self._lock:
+            for attempt in range(2 if retry else 1):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._roundtrip(args)
+                except RespError:
+                    raise
+                except (OSError, ConnectionError):
+                    self._close()
+                    if attempt or not retry:
+                        raise
+
+    def get(self, key):
+        value = self.command("GET", self.prefix + key)
+        return _loads(value) if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        args = ["SET", self.prefix + key, _dumps(value)]
+        if ttl:
+            args += ["PX", int(ttl * 1000)]
+        self.command(*args)
+
+    def set_if_absent(self, key, value, ttl=None):
+        payload = _dumps(value)
+        args = ["SET", self.prefix + key, payload, "NX"]
+        if ttl:
+            args += ["PX", int(ttl * 1000)]
+        try:
+            return self.command(*args, retry=False) == "OK"
+        except (OSError, ConnectionError):
+            # The SET may have been applied before the connection dropped; resending
+            # it would report our own write as someone else's. The key holding our
+            # value is what tells whether this call stored it.
+            return self.command("GET", self.prefix + key) == payload
+
+    def delete(self, key):
+        self.command("DEL", self.prefix + key)
+
+    def delete_if_equal(self, key, value):
+        return self.command("EVAL", self._RELEASE_SCRIPT, 1, self.prefix + key, _dumps(value)) == 1
+
+
+STORE_STATS = {
+    "shared_hits": 0,
+    "shared_misses": 0,
+    "single_flight_leads": 0,
+    "single_flight_waits": 0,
+    "backend_errors": 0,
+}
+
+_BACKEND = None
+_BACKEND_LOCK = threading.Lock()
+# Used for dedup claims while the configured backend is unreachable
+_FALLBACK = MemoryBackend()
+
+
+def create_backend(kind=None, url=None):
+    kind = (kind or os.getenv("F1_CACHE_BACKEND", "memory")).lower()
+    url = url or os.getenv("F1_CACHE_URL")
+    if kind == "sqlite":
+        return SQLiteBackend(url or "/tmp/f1_cache.sqlite3")
+    if kind == "redis":
+        return RedisBackend(url or "redis://127.0.0.1:6379/0")
+    return MemoryBackend()
+
+
+def get_backend():
+    """Process-wide backend instance (created from the environment on first use)"""
+    global _BACKEND
+    if _BACKEND is None:
+        with _BACKEND_LOCK:
+            if _BACKEND is None:
+                _BACKEND = create_backend()
+                logger.info(f"Cache backend: {_BACKEND.name}")
+    return _BACKEND
+
+
+def set_backend(backend):
+    global _BACKEND
+    _BACKEND = backend
+
+
+def _backend_error(action, key, error):
+    STORE_STATS["backend_errors"] += 1
+    logger.warning(f"Cache backend {action} of {key} failed: {error}")
+
+
+def shared_get(key):
+    """Value another process stored under key (None for process-local backends or on errors)"""
+    backend = get_backend()
+    if not backend.shared:
+        return None
+    try:
+        value = backend.get(key)
+    except Exception as e:
+        _backend_error("read", key, e)
+        return None
+    STORE_STATS["shared_hits" if value is not None else "shared_misses"] += 1
+    return value
+
+
+def shared_set(key, value, ttl=None):
+    """Publish a value to other processes (no-op for process-local backends)"""
+    backend = get_backend()
+    if not backend.shared:
+        return
+    try:
+        backend.set(key, value, ttl)
+    except Exception as e:
+        _backend_error("write", key, e)
+
+
+def claim(key, ttl):
+    """Atomic set-if-absent; True if this process is the first to claim key.
+    Falls back to a process-local claim while the shared backend is unreachable."""
+    # A unique value, so a claim interrupted mid-write can tell its own write from another claimant's
+    token = uuid.uuid4().hex
+    try:
+        return get_backend().set_if_absent(key, token, ttl)
+    except Exception as e:
+        _backend_error("claim", key, e)
+        return _FALLBACK.set_if_absent(key, token, ttl)
+
+
+def single_flight(name, ready=None, ttl=30, wait=SINGLE_FLIGHT_WAIT):
+    """Decorator letting one process at a time run a cache-filling function
+
+    Callers that lose the race wait for the leader and then call the function
+    themselves, which normally finds the leader's result in the shared cache.
+    ready(): optional check that skips the lock entirely (e.g. a local cache hit).
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            backend = get_backend()
+            if not backend.shared or (ready is not None and ready()):
+                return fn(*args, **kwargs)
+            try:
+                token = backend.acquire_lock(name, ttl)
+            except Exception as e:
+                _backend_error("lock", name, e)
+                return fn(*args, **kwargs)
+            if token is None:
+                STORE_STATS["single_flight_waits"] += 1
+                try:
+                    backend.wait_for_lock(name, wait)
+                except Exception as e:
+                    _backend_error("lock wait", name, e)
+                return fn(*args, **kwargs)
+            STORE_STATS["single_flight_leads"] += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                try:
+                    backend.release_lock(name, token)
+                except Exception as e:
+                    _backend_error("unlock", name, e)
+        return wrapper
+    return decorate
+
+
+def get_store_status():
+    backend = get_backend()
+    return {
+        "backend": backend.name,
+        "shared": backend.shared,
+        "stats": dict(STORE_STATS),
+    }
@@ -0,0 +1,152 @@
+"""
+Per-chat timezone preferences and timezone-aware schedule rendering
+Session times are parsed once per calendar load into UTC epoch seconds; each
+timezone's rendering is computed on first use and cached on the schedule, so
+serving any timezone afterwards is a dictionary lookup.
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError, available_timezones
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEZONE = "Asia/Baku"
+PREFS_PATH = os.getenv("F1_PREFS_PATH", "/tmp/f1_chat_prefs.sqlite3")
+
+# Rendered variants kept per schedule (one per distinct timezone in use)
+MAX_RENDERINGS = 128
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_timezones (
+    chat_id INTEGER PRIMARY KEY,
+    timezone TEXT NOT NULL
+)
+"""
+
+_LOCK = threading.Lock()
+_CONNECTION = None
+# chat_id -> timezone name; chats without a row map to None
+_TIMEZONE_MEMO = {}
+
+
+def _connect():
+    global _CONNECTION
+    if _CONNECTION is None:
+        directory = os.path.dirname(PREFS_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _CONNECTION = sqlite3.connect(PREFS_PATH, check_same_thread=False)
+        _CONNECTION.execute(_SCHEMA)
+        _CONNECTION.commit()
+    return _CONNECTION
+
+
+@lru_cache(maxsize=None)
+def get_zone(name):
+    """Shared ZoneInfo instance for a timezone name"""
+    return ZoneInfo(name)
+
+
+@lru_cache(maxsize=1)
+def _timezone_aliases():
+    """Lower-case IANA names and their city part ("london") -> canonical name"""
+    aliases = {}
+    for name in available_timezones():
+        aliases.setdefault(name.rsplit("/", 1)[-1].lower(), name)
+    for name in available_timezones():
+        aliases[name.lower()] = name
+    return aliases
+
+
+def resolve_timezone(text):
+    """Canonical timezone name for user input ("Europe/London", "london", "utc"), or None"""
+    if not text:
+        return None
+    key = text.strip().replace(" ", "_").lower()
+    name = _timezone_aliases().get(key)
+    if name is None:
+        return None
+    try:
+        get_zone(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+    return name
+
+
+def display_name(name):
+    """Timezone name safe for Markdown text (underscores would start italics)"""
+    return name.replace("_", " ")
+
+
+def get_chat_timezone(chat_id):
+    """Timezone preference of a chat (DEFAULT_TIMEZONE if none set)"""
+    if chat_id is None:
+        return DEFAULT_TIMEZONE
+    if chat_id not in _TIMEZONE_MEMO:
+        try:
+            with _LOCK:
+                row = _connect().execute(
+                    "SELECT timezone FROM chat_timezones WHERE chat_id = ?", (chat_id,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading timezone preference: {e}")
+            return DEFAULT_TIMEZONE
+        _TIMEZONE_MEMO[chat_id] = row[0] if row else None
+    return _TIMEZONE_MEMO[chat_id] or DEFAULT_TIMEZONE
+
+
+def set_chat_timezone(chat_id, name):
+    try:
+        with _LOCK:
+            connection = _connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO chat_timezones (chat_id, timezone) VALUES (?, ?)",
+                (chat_id, name),
+            )
+            connection.commit()
+    except sqlite3.Error as e:
+        logger.error(f"Error writing timezone preference: {e}")
+        return False
+    _TIMEZONE_MEMO[chat_id] = name
+    return True
+
+
+class SessionSchedule:
+    """A weekend's session times as UTC epochs with per-timezone renderings cached"""
+
+    __slots__ = ("labels", "epochs", "_renderings")
+
+    def __init__(self, sessions):
+        """sessions: iterable of (aware datetime, label)"""
+        ordered = sorted((start.timestamp(), label) for start, label in sessions)
+        self.epochs = [int(epoch) for epoch, _ in ordered]
+        self.labels = [label for _, label in ordered]
+        self._renderings = {}
+
+    def to_json(self):
+        """Plain data for the shared cache backend"""
+        return {"epochs": self.epochs, "labels": self.labels}
+
+    @classmethod
+    def from_json(cls, state):
+        return cls((datetime.fromtimestamp(epoch, ZoneInfo("UTC")), label)
+                   for epoch, label in zip(state["epochs"], state["labels"]))
+
+    def render(self, timezone=DEFAULT_TIMEZONE):
+        """Session lines ("*Label:* 24 Oct 21:00") in the given timezone"""
+        rendering = self._renderings.get(timezone)
+        if rendering is None:
+            zone = get_zone(timezone)
+            rendering = "".join(
+                f"*{label}:* {datetime.fromtimestamp(epoch, zone).strftime('%d %b %H:%M')}\n"
+                for epoch, label in zip(self.epochs, self.labels)
+            )
+            if len(self._renderings) >= MAX_RENDERINGS:
+                self._renderings.clear()
+            self._renderings[timezone] = rendering
+        return rendering
@@ -0,0 +1,239 @@
+"""
+Lightweight per-update tracing
+Each update runs under a trace; spans time its stages (decode, cache lookups,
+upstream calls, JSON parsing, rendering, Telegram sends). The current span
+lives in a context variable, so it follows the update into tasks and
+asyncio.to_thread workers. Finished traces slower than a threshold (and an
+optional random sample of the rest) are kept in a ring buffer for dumping;
+nothing is exported to an external collector.
+"""
+
+import os
+import time
+import random
+import asyncio
+import logging
+import secrets
+import functools
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Traces at least this slow are always kept
+SLOW_TRACE_MS = float(os.getenv("F1_SLOW_TRACE_MS", "2000"))
+# Share of faster traces kept as a baseline for comparison
+TRACE_SAMPLE_RATE = float(os.getenv("F1_TRACE_SAMPLE_RATE", "0"))
+TRACE_BUFFER_SIZE = int(os.getenv("F1_TRACE_BUFFER", "100"))
+# Bounds memory for pathological updates (e.g. a loop of upstream calls)
+MAX_SPANS_PER_TRACE = 500
+
+_CURRENT_SPAN = contextvars.ContextVar("f1_current_span", default=None)
+
+TRACES = deque(maxlen=TRACE_BUFFER_SIZE)
+_TRACES_LOCK = threading.Lock()
+
+TRACE_STATS = {
+    "traces": 0,
+    "kept_slow": 0,
+    "kept_sampled": 0,
+    "spans": 0,
+    "spans_dropped": 0,
+}
+
+
+class Trace:
+    __slots__ = ("trace_id", "name", "started_at", "started", "duration", "spans", "lock")
+
+    def __init__(self, name):
+        self.trace_id = secrets.token_hex(8)
+        self.name = name
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.duration = None
+        self.spans = []
+        self.lock = threading.Lock()
+
+    def to_dict(self):
+        with self.lock:
+            spans = [span.to_dict(self.started) for span in self.spans]
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 2) if self.duration is not None else None,
+            "spans": spans,
+        }
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attrs", "started", "duration", "error")
+
+    def __init__(self, trace, name, parent_id, attrs):
+        self.trace = trace
+        self.span_id = secrets.token_hex(4)
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.started = time.perf_counter()
+        self.duration = None
+        self.error = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self, trace_started):
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ms": round((self.started - trace_started) * 1000, 2),
+            # None while the span is still open (e.g. a background task outlived the update)
+            "duration_ms": round(self.duration * 1000, 2) if self.duration is not None else None,
+            "attrs": self.attrs,
+            "error": self.error,
+        }
+
+
+class _NullSpan:
+    """Returned outside a trace so call sites never need to check"""
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+def current_span():
+    return _CURRENT_SPAN.get()
+
+
+def current_trace_id():
+    span = _CURRENT_SPAN.get()
+    return span.trace.trace_id if span is not None else None
+
+
+def detach():
+    """Drop the inherited trace in a long-lived task started from inside an update
+
+    Tasks copy the context they were created in; a poller or dispatcher loop
+    would otherwise keep adding spans to whichever update happened to start it.
+    """
+    _CURRENT_SPAN.set(None)
+
+
+def _finish(span, error):
+    span.duration = time.perf_counter() - span.started
+    if error is not None:
+        span.error = f"{type(error).__name__}: {error}"
+
+
+@contextmanager
+def start_trace(name, **attrs):
+    """Root span for one unit of work (an update, a scheduler tick)"""
+    trace = Trace(name)
+    root = Span(trace, name, None, attrs)
+    trace.spans.append(root)
+    token = _CURRENT_SPAN.set(root)
+    error = None
+    try:
+        yield root
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _CURRENT_SPAN.reset(token)
+        _finish(root, error)
+        trace.duration = root.duration
+        _keep(trace)
+
+
+def _keep(trace):
+    TRACE_STATS["traces"] += 1
+    if trace.duration * 1000 >= SLOW_TRACE_MS:
+        TRACE_STATS["kept_slow"] += 1
+        logger.info(f"Slow trace {trace.trace_id} ({trace.name}) took {trace.duration * 1000:.0f}ms")
+    elif TRACE_SAMPLE_RATE and random.random() < TRACE_SAMPLE_RATE:
+        TRACE_STATS["kept_sampled"] += 1
+    else:
+        return
+    with _TRACES_LOCK:
+        TRACES.append(trace)
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time a stage of the current trace; a no-op when there is none"""
+    parent = _CURRENT_SPAN.get()
+    if parent is None:
+        yield NULL_SPAN
+        return
+    trace = parent.trace
+    with trace.lock:
+        if len(trace.spans) >= MAX_SPANS_PER_TRACE:
+            TRACE_STATS["spans_dropped"] += 1
+            child = None
+        else:
+            child = Span(trace, name, parent.span_id, attrs)
+            trace.spans.append(child)
+            TRACE_STATS["spans"] += 1
+    if child is None:
+        yield NULL_SPAN
+        return
+    token = _CURRENT_SPAN.set(child)
+    error = None
+    try:
+        yield child
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _CURRENT_SPAN.reset(token)
+        _finish(child, error)
+
+
+def traced(name):
+    """Decorator wrapping every call of a sync or async function in a span"""
+    def decorate(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def bind_context(func):
+    """Carry the caller's trace context into a plain thread pool worker"""
+    context = contextvars.copy_context()
+    return functools.partial(context.run, func)
+
+
+def get_traces(min_ms=0.0, limit=None):
+    """Buffered traces, newest first"""
+    with _TRACES_LOCK:
+        traces = list(TRACES)
+    traces.reverse()
+    selected = [trace.to_dict() for trace in traces if trace.duration * 1000 >= min_ms]
+    return selected[:limit] if limit else selected
+
+
+def get_trace_status():
+    with _TRACES_LOCK:
+        buffered = len(TRACES)
+    return {
+        "slow_trace_ms": SLOW_TRACE_MS,
+        "sample_rate": TRACE_SAMPLE_RATE,
+        "buffered": buffered,
+        "stats": dict(TRACE_STATS),
+    }
@@ -0,0 +1,165 @@
+"""
+Race-weekend-adaptive TTL policy
+Derives cache expiries from the season calendar instead of fixed durations:
+standings live until the next points session has settled, live checks run
+at minute granularity only inside weekend windows and sleep otherwise.
+"""
+
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from f1_calendar import get_season_races, race_sessions, current_season, RESULTS_DELAY
+
+logger = logging.getLogger(__name__)
+
+# Weekend window around the timed sessions in which live checks are frequent
+WINDOW_BEFORE = timedelta(hours=1)
+WINDOW_AFTER = timedelta(hours=3)
+# TTLs inside a weekend window (seconds)
+WINDOW_TTL = {
+    "active_session": 60,
+    "live_session": 30,
+}
+# Bounds applied to every calendar-derived TTL (seconds)
+MIN_TTL = 60
+MAX_TTL = 7 * 86400
+# Calendar is reloaded in the background after this long
+TIMELINE_MAX_AGE = 12 * 3600
+
+TTL_STATE = {
+    "sessions": [],      # [(start, key)] sorted
+    "windows": [],       # [(window_start, window_end)] sorted
+    "settled": {},       # {"points": [...], "results": [...]} settle times
+    "loaded_at": None,
+    "loading": False,
+}
+_LOCK = threading.Lock()
+
+
+def update_ttl_calendar(races):
+    """Rebuild the session timeline from Jolpica races (called wherever the calendar is loaded)"""
+    sessions = []
+    windows = []
+    points = []
+    results = []
+    for race in races:
+        weekend = race_sessions(race)
+        if not weekend:
+            continue
+        windows.append((weekend[0]["start"] - WINDOW_BEFORE, weekend[-1]["start"] + WINDOW_AFTER))
+        for session in weekend:
+            sessions.append((session["start"], session["key"]))
+            delay = RESULTS_DELAY.get(session["key"])
+            if delay:
+                results.append(session["start"] + delay)
+                if session["key"] in ("Race", "Sprint"):
+                    points.append(session["start"] + delay)
+    with _LOCK:
+        TTL_STATE["sessions"] = sorted(sessions)
+        TTL_STATE["windows"] = sorted(windows)
+        TTL_STATE["settled"] = {"points": sorted(points), "results": sorted(results)}
+        TTL_STATE["loaded_at"] = time.monotonic()
+
+
+def _load_timeline():
+    try:
+        races = get_season_races(current_season())
+        if races:
+            update_ttl_calendar(races)
+    except Exception as e:
+        logger.error(f"TTL policy: could not load calendar: {e}")
+    finally:
+        TTL_STATE["loading"] = False
+
+
+def _ensure_timeline():
+    """Kick off a background calendar load when missing or stale; never blocks"""
+    loaded_at = TTL_STATE["loaded_at"]
+    if loaded_at is not None and time.monotonic() - loaded_at < TIMELINE_MAX_AGE:
+        return
+    with _LOCK:
+        if TTL_STATE["loading"]:
+            return
+        TTL_STATE["loading"] = True
+    threading.Thread(target=_load_timeline, name="f1-ttl-calendar", daemon=True).start()
+
+
+def _next_after(times, now):
+    for moment in times:
+        if moment > now:
+            return moment
+    return None
+
+
+def in_weekend_window(now=None):
+    """Whether `now` falls inside a race-weekend window (None if calendar unknown)"""
+    now = now or datetime.now(ZoneInfo("UTC"))
+    windows = TTL_STATE["windows"]
+    if not windows:
+        return None
+    return any(start <= now <= end for start, end in windows)
+
+
+def _seconds_until(moment, now):
+    return (moment - now).total_seconds()
+
+
+def _clamp(seconds):
+    return int(min(max(seconds, MIN_TTL), MAX_TTL))
+
+
+def get_ttl(cache_key, default, now=None, value=None):
+    """Expiry in seconds for a cache entry written now; falls back to `default`
+
+    value: what is being cached; live checks only sleep through to the next
+    weekend window on a negative (falsy) answer.
+    """
+    _ensure_timeline()
+    now = now or datetime.now(ZoneInfo("UTC"))
+    settled = TTL_STATE["settled"]
+    windows = TTL_STATE["windows"]
+    if not windows:
+        return default
+
+    if cache_key in ("standings", "constructor_standings"):
+        # Valid until the next sprint/race has finished and settled
+        moment = _next_after(settled.get("points", []), now)
+        return _clamp(_seconds_until(moment, now)) if moment else default
+
+    if cache_key == "last_session":
+        # Valid until the next qualifying/sprint/race result is published
+        moment = _next_after(settled.get("results", []), now)
+        return _clamp(_seconds_until(moment, now)) if moment else default
+
+    if cache_key == "next_race":
+        # The "next race" changes once the current one starts
+        moment = _next_after([start for start, key in TTL_STATE["sessions"] if key == "Race"], now)
+        if moment is None:
+            return default
+        seconds = _seconds_until(moment, now)
+        return _clamp(min(seconds, default) if default else seconds)
+
+    if cache_key in WINDOW_TTL:
+        # OpenF1 also reports sessions the calendar lacks (testing) and a red-flagged
+        # race can outrun its window, so a positive answer is always rechecked soon
+        if value or in_weekend_window(now):
+            return WINDOW_TTL[cache_key]
+        # A negative answer holds until the next weekend window opens
+        moment = _next_after([start for start, _ in windows], now)
+        return _clamp(_seconds_until(moment, now)) if moment else default
+
+    return default
+
+
+def get_ttl_status(now=None):
+    """Current calendar-derived TTLs for diagnostics"""
+    now = now or datetime.now(ZoneInfo("UTC"))
+    keys = ("standings", "constructor_standings", "last_session", "next_race", "active_session", "live_session")
+    return {
+        "calendar_loaded": bool(TTL_STATE["windows"]),
+        "in_weekend_window": in_weekend_window(now),
+        "ttl": {key: get_ttl(key, None, now) for key in keys},
+    }
@@ -0,0 +1,375 @@
+"""
+Race-weekend weather service
+Forecasts are keyed by (circuit, weekend) and fetched with one Open-Meteo
+request covering every weekend day plus hourly values at session start times.
+Geocoding results are memoized in SQLite, and forecasts are refreshed by the
+prefetch scheduler rather than on user demand.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import quote
+from zoneinfo import ZoneInfo
+
+from f1_http import http_get, parse_json, OPEN_METEO_URL, GEOCODING_URL
+from f1_calendar import get_season_races, race_sessions, current_season, parse_session_datetime
+
+logger = logging.getLogger(__name__)
+
+WEATHER_PATH = os.getenv("F1_WEATHER_PATH", "/tmp/f1_weather.sqlite3")
+
+# Forecasts are re-fetched this often by the scheduler (seconds)
+FORECAST_REFRESH = 3 * 3600
+# Open-Meteo only forecasts this far ahead
+FORECAST_HORIZON = timedelta(days=15)
+# After a failed inline fetch, user requests don't retry for this long (seconds)
+FORECAST_RETRY = 600
+# Failed geocoding lookups are retried after this long (seconds)
+GEOCODE_NEGATIVE_TTL = 86400
+
+DAILY_FIELDS = "temperature_2m_max,precipitation_probability_max,wind_speed_10m_max"
+HOURLY_FIELDS = "temperature_2m,precipitation_probability,wind_speed_10m"
+
+# Comprehensive F1 circuit coordinates for weather API
+CIRCUIT_COORDS = {
+    # Current F1 Circuits (2024-2025) - Official names
+    "Bahrain International Circuit": (26.0325, 50.5106),
+    "Jeddah Corniche Circuit": (21.6319, 39.1044),
+    "Albert Park Circuit": (-37.8497, 144.9680),
+    "Suzuka Circuit": (34.8431, 136.5410),
+    "Shanghai International Circuit": (31.3389, 121.2197),
+    "Miami International Autodrome": (25.9581, -80.2389),
+    "Autodromo Enzo e Dino Ferrari": (44.3439, 11.7167),
+    "Circuit de Monaco": (43.7347, 7.4206),
+    "Circuit de Barcelona-Catalunya": (41.5699, 2.2570),
+    "Circuit Gilles Villeneuve": (45.5000, -73.5228),
+    "Red Bull Ring": (47.2197, 14.7647),
+    "Silverstone Circuit": (52.0720, -1.0170),
+    "Hungaroring": (47.5789, 19.2486),
+    "Circuit de Spa-Francorchamps": (50.4372, 5.9714),
+    "Circuit Zandvoort": (52.3888, 4.5409),
+    "Autodromo Nazionale di Monza": (45.6190, 9.2816),
+    "Marina Bay Street Circuit": (1.2914, 103.8632),
+    "Baku City Circuit": (40.4093, 49.8671),
+    "Circuit of the Americas": (30.1328, -97.6411),
+    "Autodromo Hermanos Rodriguez": (19.4042, -99.0907),
+    "Autodromo Jose Carlos Pace": (-23.7036, -46.6997),
+    "Las Vegas Street Circuit": (36.1147, -115.1739),
+    "Lusail International Circuit": (25.4888, 51.4543),
+    "Yas Marina Circuit": (24.4672, 54.6031),
+    # Alternative/common names for matching
+    "Sakhir": (26.0325, 50.5106),
+    "Jeddah": (21.6319, 39.1044),
+    "Melbourne": (-37.8497, 144.9680),
+    "Suzuka": (34.8431, 136.5410),
+    "Shanghai": (31.3389, 121.2197),
+    "Miami": (25.9581, -80.2389),
+    "Imola": (44.3439, 11.7167),
+    "Monaco": (43.7347, 7.4206),
+    "Barcelona": (41.5699, 2.2570),
+    "Montreal": (45.5000, -73.5228),
+    "Spielberg": (47.2197, 14.7647),
+    "Silverstone": (52.0720, -1.0170),
+    "Budapest": (47.5789, 19.2486),
+    "Spa": (50.4372, 5.9714),
+    "Zandvoort": (52.3888, 4.5409),
+    "Monza": (45.6190, 9.2816),
+    "Singapore": (1.2914, 103.8632),
+    "Baku": (40.4093, 49.8671),
+    "Austin": (30.1328, -97.6411),
+    "Mexico City": (19.4042, -99.0907),
+    "Sao Paulo": (-23.7036, -46.6997),
+    "Interlagos": (-23.7036, -46.6997),
+    "Las Vegas": (36.1147, -115.1739),
+    "Lusail": (25.4888, 51.4543),
+    "Abu Dhabi": (24.4672, 54.6031),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocodes (
+    name TEXT PRIMARY KEY,
+    latitude REAL,
+    longitude REAL,
+    resolved_at REAL NOT NULL
+)
+"""
+
+_LOCK = threading.Lock()
+_CONNECTION = None
+# name -> (lat, lon) or None; mirrors the geocodes table
+_GEOCODE_MEMO = {}
+
+# (circuit_id, race_date) -> forecast dict
+FORECASTS = {}
+# (circuit_id, race_date) -> time of the last failed inline fetch
+_FAILED_FETCHES = {}
+
+WEATHER_STATS = {
+    "forecast_fetches": 0,
+    "forecast_errors": 0,
+    "geocode_lookups": 0,
+    "served_without_forecast": 0,
+}
+
+
+def _connect():
+    global _CONNECTION
+    if _CONNECTION is None:
+        directory = os.path.dirname(WEATHER_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _CONNECTION = sqlite3.connect(WEATHER_PATH, check_same_thread=False)
+        _CONNECTION.execute(_SCHEMA)
+        _CONNECTION.commit()
+    return _CONNECTION
+
+
+def _remembered_geocode(name):
+    """(found, coords) from the memo table; found is False when never looked up or expired"""
+    if name in _GEOCODE_MEMO:
+        return True, _GEOCODE_MEMO[name]
+    try:
+        with _LOCK:
+            row = _connect().execute(
+                "SELECT latitude, longitude, resolved_at FROM geocodes WHERE name = ?", (name,)
+            ).fetchone()
+    except sqlite3.Error as e:
+        logger.error(f"Error reading geocode memo: {e}")
+        return False, None
+    if row is None:
+        return False, None
+    latitude, longitude, resolved_at = row
+    if latitude is None:
+        if time.time() - resolved_at >= GEOCODE_NEGATIVE_TTL:
+            return False, None
+        coords = None
+    else:
+        coords = (latitude, longitude)
+    _GEOCODE_MEMO[name] = coords
+    return True, coords
+
+
+def _remember_geocode(name, coords):
+    _GEOCODE_MEMO[name] = coords
+    latitude, longitude = coords if coords else (None, None)
+    try:
+        with _LOCK:
+            connection = _connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO geocodes (name, latitude, longitude, resolved_at) VALUES (?, ?, ?, ?)",
+                (name, latitude, longitude, time.time()),
+            )
+            connection.commit()
+    except sqlite3.Error as e:
+        logger.error(f"Error writing geocode memo: {e}")
+
+
+def geocode(name):
+    """Coordinates for a place name via Open-Meteo geocoding, memoized persistently"""
+    if not name:
+        return None
+    found, coords = _remembered_geocode(name)
+    if found:
+        return coords
+    WEATHER_STATS["geocode_lookups"] += 1
+    coords = None
+    try:
+        response = http_get(f"{GEOCODING_URL}/v1/search?name={quote(name)}&count=1", timeout=10)
+        if response.status_code == 200:
+            results = parse_json(response).get("results")
+            if results:
+                coords = (results[0]["latitude"], results[0]["longitude"])
+        else:
+            # Don't remember upstream errors as "not found"
+            return None
+    except Exception as e:
+        logger.error(f"Geocoding {name} failed: {e}")
+        return None
+    _remember_geocode(name, coords)
+    return coords
+
+
+def resolve_coordinates(circuit):
+    """Coordinates for a Jolpica Circuit dict or a place name
+
+    Uses the coordinates Jolpica ships with the circuit, then exact table
+    lookups, then a substring match, and only then a (memoized) geocoding call.
+    """
+    if isinstance(circuit, dict):
+        location = circuit.get("Location", {})
+        try:
+            return (float(location["lat"]), float(location["long"]))
+        except (KeyError, TypeError, ValueError):
+            pass
+        names = [circuit.get("circuitName"), location.get("locality")]
+    else:
+        names = [circuit]
+    names = [name for name in names if name]
+
+    for name in names:
+        if name in CIRCUIT_COORDS:
+            return CIRCUIT_COORDS[name]
+    for name in names:
+        name_lower = name.lower()
+        for circuit_name, coords in CIRCUIT_COORDS.items():
+            if name_lower in circuit_name.lower() or circuit_name.lower() in name_lower:
+                return coords
+    for name in names:
+        coords = geocode(name)
+        if coords:
+            return coords
+    return None
+
+
+def weekend_key(race):
+    """Cache key of a race weekend: (circuit_id, race date)"""
+    circuit = race.get("Circuit", {})
+    return (circuit.get("circuitId") or circuit.get("circuitName") or race.get("raceName"), race.get("date"))
+
+
+def _weekend_dates(race, sessions):
+    race_day = datetime.fromisoformat(race["date"]).date()
+    first_day = sessions[0]["start"].date() if sessions else race_day - timedelta(days=2)
+    return min(first_day, race_day - timedelta(days=2)), race_day
+
+
+def _value(values, index):
+    if values is None or index is None or index >= len(values):
+        return None
+    return values[index]
+
+
+def fetch_weekend_forecast(race):
+    """One Open-Meteo request for the weekend's daily and session-hour forecast"""
+    coords = resolve_coordinates(race.get("Circuit", {}))
+    if not coords or not race.get("date"):
+        return None
+    sessions = race_sessions(race)
+    start_date, end_date = _weekend_dates(race, sessions)
+    url = (
+        f"{OPEN_METEO_URL}/v1/forecast?latitude={coords[0]}&longitude={coords[1]}"
+        f"&daily={DAILY_FIELDS}&hourly={HOURLY_FIELDS}&timezone=UTC"
+        f"&start_date={start_date}&end_date={end_date}"
+    )
+    WEATHER_STATS["forecast_fetches"] += 1
+    response = http_get(url, timeout=15)
+    if response.status_code != 200:
+        WEATHER_STATS["forecast_errors"] += 1
+        logger.warning(f"Open-Meteo returned {response.status_code} for {weekend_key(race)}")
+        return None
+    data = parse_json(response)
+
+    daily = data.get("daily", {})
+    days = []
+    for i, date in enumerate(daily.get("time", [])):
+        days.append({
+            "date": date,
+            "temp_max": _value(daily.get("temperature_2m_max"), i),
+            "rain": _value(daily.get("precipitation_probability_max"), i),
+            "wind": _value(daily.get("wind_speed_10m_max"), i),
+        })
+
+    hourly = data.get("hourly", {})
+    hour_index = {moment: i for i, moment in enumerate(hourly.get("time", []))}
+    session_forecasts = []
+    for session in sessions:
+        index = hour_index.get(session["start"].astimezone(ZoneInfo("UTC")).strftime("%Y-%m-%dT%H:00"))
+        session_forecasts.append({
+            "key": session["key"],
+            "name": session["name"],
+            "start": session["start"],
+            "temp": _value(hourly.get("temperature_2m"), index),
+            "rain": _value(hourly.get("precipitation_probability"), index),
+            "wind": _value(hourly.get("wind_speed_10m"), index),
+        })
+
+    return {
+        "key": weekend_key(race),
+        "days": days,
+        "sessions": session_forecasts,
+        "fetched_at": time.time(),
+    }
+
+
+def _store(race, forecast):
+    if forecast:
+        FORECASTS[weekend_key(race)] = forecast
+        _FAILED_FETCHES.pop(weekend_key(race), None)
+    return forecast
+
+
+def get_weekend_forecast(race, allow_fetch=True):
+    """Forecast for a race weekend from the scheduler-maintained store
+
+    Only fetches inline when nothing has been stored for the weekend yet
+    (cold start); otherwise refreshing is the scheduler's job.
+    """
+    key = weekend_key(race)
+    forecast = FORECASTS.get(key)
+    if forecast is not None:
+        return forecast
+    failed_at = _FAILED_FETCHES.get(key)
+    if not allow_fetch or (failed_at and time.time() - failed_at < FORECAST_RETRY):
+        WEATHER_STATS["served_without_forecast"] += 1
+        return None
+    try:
+        forecast = _store(race, fetch_weekend_forecast(race))
+    except Exception as e:
+        WEATHER_STATS["forecast_errors"] += 1
+        logger.error(f"Error fetching weather for {key}: {e}")
+        forecast = None
+    if forecast is None:
+        _FAILED_FETCHES[key] = time.time()
+    return forecast
+
+
+def _weekend_window(race):
+    sessions = race_sessions(race)
+    race_start = parse_session_datetime(race.get("date"), race.get("time") or "12:00:00Z")
+    if not race_start:
+        return None, None
+    first = sessions[0]["start"] if sessions else race_start - timedelta(days=2)
+    return first, race_start + timedelta(hours=3)
+
+
+def refresh_upcoming_forecasts(now=None, races=None):
+    """Re-fetch forecasts older than FORECAST_REFRESH for weekends within the forecast horizon"""
+    now = now or datetime.now(ZoneInfo("UTC"))
+    races = races if races is not None else get_season_races(current_season(now))
+    refreshed = []
+    live_keys = set()
+    for race in races:
+        first, end = _weekend_window(race)
+        if first is None or end < now or first > now + FORECAST_HORIZON:
+            continue
+        key = weekend_key(race)
+        live_keys.add(key)
+        forecast = FORECASTS.get(key)
+        if forecast and time.time() - forecast["fetched_at"] < FORECAST_REFRESH:
+            continue
+        try:
+            if _store(race, fetch_weekend_forecast(race)):
+                refreshed.append(key)
+        except Exception as e:
+            WEATHER_STATS["forecast_errors"] += 1
+            logger.error(f"Error refreshing weather for {key}: {e}")
+    # Past weekends are never shown again
+    for key in list(FORECASTS):
+        if key not in live_keys and races:
+            del FORECASTS[key]
+    return refreshed
+
+
+def get_weather_status():
+    return {
+        "forecasts": {
+            f"{circuit}@{date}": round(time.time() - forecast["fetched_at"])
+            for (circuit, date), forecast in FORECASTS.items()
+        },
+        "geocodes_memoized": len(_GEOCODE_MEMO),
+        "stats": dict(WEATHER_STATS),
+    }